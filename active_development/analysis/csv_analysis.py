@@ -17,11 +17,15 @@
     Run like so (from physor2026_andrew/Testing_w_sun/analysis):
         python csv_analysis.py
 
+    Or import it: run_analysis(...) does the same and returns the tables as
+    DataFrames (case reports can be passed in memory via case_frames).
+
     [] Fix issue with compilation of source documents: https://chatgpt.com/c/691cc205-fbe4-8331-816d-29e8d43973da 
 
 """
 
-import argparse, pathlib, re
+import argparse, pathlib, re, sqlite3
+from contextlib import closing
 
 import numpy as np
 import pandas as pd
@@ -286,6 +290,9 @@ def compute_errors_for_row(row, exp_df=None, ref_map=None, mode="exp"):
         - sam_* is the current row.
         - We compute per-site errors for COMPARISON_SITES,
           plus RMSE, max_abs_err, and delta_T (TP6-TP2) errors.
+
+    main() uses compute_errors_frame(), which computes the same columns for
+    all rows at once; this single-row version is kept for spot checks.
     """
     prefix = row["prefixes"]
 
@@ -384,6 +391,101 @@ def compute_errors_for_row(row, exp_df=None, ref_map=None, mode="exp"):
 
     return new_vals
 
+def _reference_table(case_df, exp_df=None, ref_map=None, mode="exp"):
+    """
+    Reference values as a DataFrame (one row per reference, columns
+    COMPARISON_SITES + 'delta_T'), plus the key of every case_df row into it.
+
+    mode == "exp"                   : one row per prefix (experiment column
+                                      PREFIX_TO_EXP_COLUMN[prefix]); key = prefix
+    mode == "self_ref"              : ref_map rows; key = (prefix, order)
+    mode == "self_ref_second_order" : ref_map rows; key = prefix
+    """
+    if mode == "exp":
+        if exp_df is None:
+            raise RuntimeError("exp_df is None but ERROR_MODE == 'exp'.")
+        prefixes = [p for p in pd.unique(case_df["prefixes"]) if p in PREFIX_TO_EXP_COLUMN]
+        exp_cols = [PREFIX_TO_EXP_COLUMN[p] for p in prefixes]
+        ref = exp_df.loc[COMPARISON_SITES, exp_cols].T.astype(float)
+        ref["delta_T"] = (exp_df.loc["TP6", exp_cols] - exp_df.loc["TP2", exp_cols]).astype(float).to_numpy()
+        ref.index = pd.Index(prefixes)
+        return ref, pd.Index(case_df["prefixes"])
+
+    if mode not in ("self_ref", "self_ref_second_order"):
+        raise ValueError(f"Unknown error mode: {mode}")
+    if ref_map is None:
+        raise RuntimeError(f"ref_map is None but ERROR_MODE == '{mode}'.")
+    ref = pd.DataFrame(list(ref_map.values()), columns=COMPARISON_SITES + ["delta_T"], dtype=float)
+    if mode == "self_ref":
+        ref.index = pd.MultiIndex.from_tuples(list(ref_map.keys())) if ref_map else pd.MultiIndex.from_arrays([[], []])
+        keys = pd.MultiIndex.from_arrays([case_df["prefixes"], case_df["order"]])
+    else:
+        ref.index = pd.Index(list(ref_map.keys()))
+        keys = pd.Index(case_df["prefixes"])
+    return ref, keys
+
+
+def compute_errors_frame(case_df, exp_df=None, ref_map=None, mode="exp"):
+    """
+    Columnar version of compute_errors_for_row() for a whole case table.
+
+    The reference values of every row are gathered into (n_rows, n_sites)
+    arrays in one indexing step, and diff / abs / rel / RMSE / max-abs /
+    delta-T are computed as NumPy operations across COMPARISON_SITES.
+
+    Returns
+    -------
+    pd.DataFrame
+        The rows of case_df that have a reference (others are dropped, as
+        compute_errors_for_row() returns None for them) with the same
+        error columns appended, re-indexed from 0.
+    """
+    ref, keys = _reference_table(case_df, exp_df=exp_df, ref_map=ref_map, mode=mode)
+    pos = ref.index.get_indexer(keys) if len(ref) else np.full(len(case_df), -1)
+    has_ref = pos >= 0
+    out = case_df[has_ref].reset_index(drop=True)
+    pos = pos[has_ref]
+
+    ref_vals = ref[COMPARISON_SITES].to_numpy(dtype=float)[pos]          # (n, sites)
+    sam_vals = out[COMPARISON_SITES].to_numpy(dtype=float)               # (n, sites)
+    diff = sam_vals - ref_vals
+    abs_diff = np.abs(diff)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel_pct = np.where(ref_vals != 0, diff / ref_vals * 100.0, np.nan)
+
+    new_cols = {}
+    for j, site in enumerate(COMPARISON_SITES):
+        new_cols[f"ref_{site}"] = ref_vals[:, j]
+        new_cols[f"sam_{site}"] = sam_vals[:, j]
+        new_cols[f"err_{site}"] = diff[:, j]
+        new_cols[f"abs_err_{site}"] = abs_diff[:, j]
+        new_cols[f"rel_err_{site}_pct"] = rel_pct[:, j]
+
+    if COMPARISON_SITES:
+        new_cols["rmse_K"] = np.sqrt(np.mean(diff ** 2, axis=1))
+        new_cols["max_abs_err_K"] = np.max(abs_diff, axis=1)
+    else:
+        new_cols["rmse_K"] = np.full(len(out), np.nan)
+        new_cols["max_abs_err_K"] = np.full(len(out), np.nan)
+
+    # Delta T (TP6 - TP2)
+    ref_delta = ref["delta_T"].to_numpy(dtype=float)[pos]
+    sam_delta = out["delta_Temp_TP6-TP2"].to_numpy(dtype=float)
+    delta_diff = sam_delta - ref_delta
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta_rel = np.where(ref_delta != 0, delta_diff / ref_delta * 100.0, np.nan)
+    new_cols["ref_delta_TP6_TP2"] = ref_delta
+    new_cols["sam_delta_TP6_TP2"] = sam_delta
+    new_cols["err_delta_TP6_TP2"] = delta_diff
+    new_cols["abs_err_delta_TP6_TP2"] = np.abs(delta_diff)
+    new_cols["rel_err_delta_TP6_TP2_pct"] = delta_rel
+
+    # Existing columns of the same name are overwritten in place (as
+    # dict.update did in the row loop); the rest are appended in one go.
+    for col in [c for c in new_cols if c in out.columns]:
+        out[col] = new_cols.pop(col)
+    return pd.concat([out, pd.DataFrame(new_cols, index=out.index)], axis=1)
+
 def compute_exp_errors_for_row(row, exp_df):
     """
     Compute SAM-vs-experiment error metrics for a single row.
@@ -711,10 +813,33 @@ def make_runtime_plots(full_df, out_dir, max_nodes_global=None, max_nodes_by_pre
 
         print(f"[RUNTIME PLOTS] Saved runtime plot for prefix {prefix!r}: {out_path}")
 
+def read_runtime_log(runtime_log_path: str = "runtimes_master.csv",
+                     run_store_path: str = "runs.sqlite"):
+    """
+    Load sam_tuner's runtime log: the SQLite run store if there is one
+    (sam_tuner.run_store), otherwise the CSV. Returns None if neither exists.
+    """
+    store = pathlib.Path(run_store_path)
+    if store.exists():
+        with closing(sqlite3.connect(str(store))) as conn:
+            has_runs = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='runs'"
+            ).fetchone()
+            if has_runs:
+                print(f"[RUNTIME MERGE] Reading runs from {store}")
+                return pd.read_sql_query("SELECT * FROM runs", conn)
+    path = pathlib.Path(runtime_log_path)
+    if path.exists():
+        return pd.read_csv(path)
+    return None
+
+
 def merge_runtime_from_master(full_df: pd.DataFrame,
-                              runtime_log_path: str = "runtimes_master.csv") -> pd.DataFrame:
+                              runtime_log_path: str = "runtimes_master.csv",
+                              run_store_path: str = "runs.sqlite") -> pd.DataFrame:
     """
-    Merge runtime information from runtimes_master.csv into the analysis DataFrame.
+    Merge runtime information from the run store (runs.sqlite) or
+    runtimes_master.csv into the analysis DataFrame.
 
     - Derives an 'input_basename' from full_df['source_file'], e.g.
         'jsalt1_nodes_mult_by_6_ord2_csv.csv' -> 'jsalt1_nodes_mult_by_6_ord2.i'
@@ -728,14 +853,13 @@ def merge_runtime_from_master(full_df: pd.DataFrame,
 
     If anything is missing, it will create 'runtime_merged_sec' filled with NaN.
     """
-    path = pathlib.Path(runtime_log_path)
-    if not path.exists():
-        print(f"[RUNTIME MERGE] No runtime log found at {path}, skipping merge.")
+    rt = read_runtime_log(runtime_log_path, run_store_path)
+    if rt is None:
+        print(f"[RUNTIME MERGE] No runtime log found at {run_store_path} or "
+              f"{runtime_log_path}, skipping merge.")
         full_df = full_df.copy()
         full_df["runtime_merged_sec"] = pd.NA
         return full_df
-
-    rt = pd.read_csv(path)
     if "sam_input_path" not in rt.columns or "runtime_sec" not in rt.columns:
         print("[RUNTIME MERGE] 'sam_input_path' or 'runtime_sec' missing in runtime log; "
               "cannot merge. Creating runtime_merged_sec as NaN.")
@@ -749,8 +873,8 @@ def merge_runtime_from_master(full_df: pd.DataFrame,
         lambda s: pathlib.Path(s).name
     )
 
-    # Filter to successful runs and non-NaN runtimes
-    mask_ok = (rt["status"] == "success") & rt["runtime_sec"].notna()
+    # Filter to successful runs (incl. steady-state early stops) and non-NaN runtimes
+    mask_ok = rt["status"].isin(["success", "success_steady"]) & rt["runtime_sec"].notna()
     rt_ok = rt[mask_ok].copy()
     if rt_ok.empty:
         print("[RUNTIME MERGE] No successful runs with runtime_sec; "
@@ -794,64 +918,59 @@ def merge_runtime_from_master(full_df: pd.DataFrame,
 
     return full_df
 
-# ---------- Main ----------
+# ---------- Library API ----------
+# main() below is the command line; sam_tuner imports these instead
+# (run_analysis with the case_report frames from csv_maker.make_case_reports).
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--exp_csv",
-        default="../../Validation_Data/validation_data.csv",
-        help="CSV with experimental data (Kelvin, Salt Test 1..4, Water Test 1..4)",
-    )
-    parser.add_argument(
-        "--case_csv",
-        nargs="+",
-        default= csv_cases,
-        help="One or more CSVs with SAM case reports (your big tables)",
-    )
-    parser.add_argument(
-        "--out_dir",
-        default="analysis",
-        help="Output directory for the generated CSV files",
-    )
-    args = parser.parse_args()
-
-    out_dir = pathlib.Path(args.out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
+def load_experimental_data(exp_csv):
+    """
+    Read the experimental table (Kelvin, Salt Test 1..4, Water Test 1..4),
+    indexed by the stripped 'Kelvin' label, every other column numeric.
+    """
+    exp_df = pd.read_csv(exp_csv)
 
-    #### --- Load experimental data (if needed) --- #####
-    if ERROR_MODE == "exp":
-        exp_df = pd.read_csv(args.exp_csv)
+    # Strip whitespace from column names
+    exp_df.columns = exp_df.columns.str.strip()
 
-        # Strip whitespace from column names
-        exp_df.columns = exp_df.columns.str.strip()
+    if "Kelvin" not in exp_df.columns:
+        raise RuntimeError(
+            f"Expected a 'Kelvin' column in {exp_csv}, got columns: {list(exp_df.columns)}"
+        )
 
-        if "Kelvin" not in exp_df.columns:
-            raise RuntimeError(
-                f"Expected a 'Kelvin' column in {args.exp_csv}, got columns: {list(exp_df.columns)}"
-            )
+    exp_df["Kelvin"] = exp_df["Kelvin"].astype(str).str.strip()
+    exp_df = exp_df.set_index("Kelvin")
+    exp_df.index = exp_df.index.astype(str).str.strip()
 
-        exp_df["Kelvin"] = exp_df["Kelvin"].astype(str).str.strip()
-        exp_df = exp_df.set_index("Kelvin")
-        exp_df.index = exp_df.index.astype(str).str.strip()
+    for col in exp_df.columns:
+        exp_df[col] = pd.to_numeric(exp_df[col], errors="coerce")
+    return exp_df
 
-        for col in exp_df.columns:
-            exp_df[col] = pd.to_numeric(exp_df[col], errors="coerce")
-    else:
-        exp_df = None
 
+def load_case_reports(case_csvs, frames=None):
+    """
+    Load and combine case_report tables, tagging each with its 'order'
+    (inferred from the folder name) and parsing nodes_mult.
+
+    Parameters
+    ----------
+    case_csvs : list of str or Path
+        case_report.csv paths.
+    frames : dict {path: DataFrame}, optional
+        Reports already in memory (csv_maker.make_case_reports); used instead
+        of reading the file for any path in case_csvs they match.
+    """
+    frames = {pathlib.Path(p).resolve(): df for p, df in (frames or {}).items()}
 
-    # --- Load and combine case report data ---
-    # --- Load and combine case report data ---
     case_frames = []
-    for path_str in args.case_csv:
+    for path_str in case_csvs:
         path = pathlib.Path(path_str)
-        df = pd.read_csv(path)
+        in_memory = frames.get(path.resolve())
+        df = in_memory.copy() if in_memory is not None else pd.read_csv(path)
 
         # 1) Strip whitespace from column names
         df.columns = df.columns.str.strip()
 
-        if "tracking_cols_keeping" in Debug:        
+        if "tracking_cols_keeping" in Debug:
             print("\n--- LOADED FILE:", path_str, "---")
             print(df.columns.tolist())
             print("Num rows:", len(df))
@@ -860,6 +979,10 @@ def main():
         for col in ["case", "source_file", "prefixes", "reached_end_any"]:
             if col in df.columns:
                 df[col] = df[col].astype(str).str.strip()
+        # ... and numeric ones (in-memory reports can hold these as objects)
+        for col in ["last_time", "matched_end_time", "script_runtime"]:
+            if col in df.columns:
+                df[col] = pd.to_numeric(df[col], errors="coerce")
 
         # 3) FIX DUPLICATE COLUMNS (if any)
         if df.columns.duplicated().any():
@@ -894,11 +1017,24 @@ def main():
 
     # Extract nodes_mult from source_file
     case_df["nodes_mult"] = case_df["source_file"].apply(parse_nodes_mult)
+    return case_df
 
-    # Saving full to file
-    debug_path = out_dir / "full_cases.csv"
-    case_df.to_csv(debug_path, index=False)
 
+def analyze_cases(case_df, exp_df=None,
+                  runtime_log_path="runtimes_master.csv",
+                  run_store_path="runs.sqlite"):
+    """
+    Error metrics for every finished run in case_df (from load_case_reports),
+    against exp_df or the refined SAM runs depending on ERROR_MODE, with the
+    runtimes from the run log merged in.
+
+    Returns
+    -------
+    (full_df, case_df_full)
+        full_df: one row per run with the error columns, sorted by
+        prefix / order / nodes_mult. case_df_full: the finished runs before
+        any plotting filter (used for the SAM-vs-SAM summaries).
+    """
     if "tracking_cols_keeping" in Debug:
         # ---------- DEBUG BLOCK 1 ----------
         print("\nDEBUG BEFORE reached_end_any FILTER:")
@@ -985,26 +1121,19 @@ def main():
         ref_map = None
 
 
-    # --- Compute error metrics for each row ---
-    all_rows = []
-    for _, row in case_df.iterrows():
-        extra = compute_errors_for_row(row, exp_df=exp_df, ref_map=ref_map, mode=ERROR_MODE)
-        if extra is None:
-            # No experimental mapping for this prefix, just skip it.
-            continue
-        combined = dict(row)  # original fields (includes 'order')
-        combined.update(extra)  # add error metrics
-        all_rows.append(combined)
+    # --- Compute error metrics for all rows at once ---
+    # (rows without a reference, e.g. no experimental mapping for the prefix, are skipped)
+    full_df = compute_errors_frame(case_df, exp_df=exp_df, ref_map=ref_map, mode=ERROR_MODE)
 
-    if not all_rows:
+    if full_df.empty:
         raise RuntimeError("No rows could be matched to experimental data. Check prefix->column mapping.")
 
-    full_df = pd.DataFrame(all_rows)
     # Force script_runtime to numeric (important!)
     full_df["script_runtime"] = pd.to_numeric(full_df["script_runtime"], errors="coerce")
     
     # Merge in runtimes from runtimes_master.csv, if available
-    full_df = merge_runtime_from_master(full_df, runtime_log_path="runtimes_master.csv")
+    full_df = merge_runtime_from_master(full_df, runtime_log_path=runtime_log_path,
+                                       run_store_path=run_store_path)
     
     # If we have merged runtimes, use them to fill missing script_runtime.
     if "runtime_merged_sec" in full_df.columns:
@@ -1038,16 +1167,159 @@ def main():
     # Sort nicely by prefix, order, and nodes_mult
     sort_cols = [c for c in ["prefixes", "order", "nodes_mult"] if c in full_df.columns]
     full_df = full_df.sort_values(sort_cols).reset_index(drop=True)
+    return full_df, case_df_full
+
+
+def summarize_cases(full_df, case_df_full, exp_df):
+    """
+    Per-prefix summary table (validation_analysis_summary.csv).
+
+    For ERROR_MODE == "exp":
+        - keep existing behavior: best (min rmse_K) vs experiment per prefix.
+
+    For ERROR_MODE in {"self_ref", "self_ref_second_order"}:
+        - take *only* the refined reference case(s) and compare those to experiment
+          (exp_df is needed here regardless of ERROR_MODE).
+    """
+    # ---- Case 1: ERROR_MODE == "exp" (already comparing vs experiment) ----
+    if ERROR_MODE == "exp":
+        summary_df = (
+            full_df.sort_values(["prefixes", "rmse_K"])
+            .groupby("prefixes", as_index=False)
+            .first()
+        )
+        summary_cols = [c for c in SUMMARY_COLS if c in summary_df.columns]
+        summary_df = summary_df[summary_cols].copy()
+
+    # ---- Case 2: SAM-vs-SAM modes -> summary is refined SAM vs experiment ----
+    else:
+        summary_rows = []
+
+        if ERROR_MODE == "self_ref_second_order":
+            # One reference per prefix: finest second-order row
+            df_second = case_df_full[case_df_full["order"] == "second_order"].copy()
+            grouped = df_second.groupby("prefixes", dropna=False)
+
+            for prefix, grp in grouped:
+                cap = get_nodes_cap_for_prefix(prefix)
+                if cap is not None:
+                    grp = grp[grp["nodes_mult"] <= cap]
+                if grp.empty:
+                    # no rows for this prefix under the cap, skip
+                    continue
+
+                idx = grp["nodes_mult"].idxmax()
+                base_row = grp.loc[idx]
+                extra = compute_exp_errors_for_row(base_row, exp_df)
+                if extra is None:
+                    continue
+                combined = dict(base_row)
+                combined.update(extra)
+                summary_rows.append(combined)
+
+
+        elif ERROR_MODE == "self_ref":
+            # One reference per (prefix, order): finest mesh of that family
+            grouped = case_df_full.groupby(["prefixes", "order"])
+
+            for (prefix, order), grp in grouped:
+                cap = get_nodes_cap_for_prefix(prefix)
+                if cap is not None:
+                    grp = grp[grp["nodes_mult"] <= cap]
+                if grp.empty:
+                    continue
+
+                idx = grp["nodes_mult"].idxmax()
+                base_row = grp.loc[idx]
+                extra = compute_exp_errors_for_row(base_row, exp_df)
+                if extra is None:
+                    continue
+                combined = dict(base_row)
+                combined.update(extra)
+                summary_rows.append(combined)
+
+
+        else:
+            raise ValueError(f"Unexpected ERROR_MODE in summary block: {ERROR_MODE}")
+
+        if not summary_rows:
+            raise RuntimeError(
+                "No rows could be matched to experimental data for summary. "
+                "Check prefix->column mapping and ERROR_MODE."
+            )
+
+        summary_df = pd.DataFrame(summary_rows)
+
+        # Nice, paper-ready columns: refined SAM vs experiment
+        summary_cols = [c for c in SUMMARY_COLS if c in summary_df.columns]
+        summary_df = summary_df[summary_cols].copy()
+
+    # Apply column toggles (note: filter_columns is written for ref_*,
+    # so it will generally leave exp_* columns alone, which is what we want)
+    return filter_columns(summary_df)
+
+
+def run_analysis(case_csvs=csv_cases, exp_csv="../../Validation_Data/validation_data.csv",
+                 out_dir="analysis", case_frames=None, write=True, plots=make_plots,
+                 runtime_log_path="runtimes_master.csv", run_store_path="runs.sqlite"):
+    """
+    The whole script as a function: load the case reports, compute the
+    errors, write the CSVs / plots (write=True) and return the tables.
+
+    Parameters
+    ----------
+    case_csvs : list of str or Path
+        case_report.csv paths (as --case_csv).
+    exp_csv : str or Path
+        Experimental data (as --exp_csv).
+    out_dir : str or Path
+        Output directory (as --out_dir).
+    case_frames : dict {path: DataFrame}, optional
+        Case reports already in memory, see load_case_reports.
+    write, plots : bool
+        Write the output CSVs / make the plots.
+    runtime_log_path, run_store_path : str or Path
+        Run log the runtimes are merged from (see merge_runtime_from_master).
+
+    Returns
+    -------
+    dict
+        "full" (as written to validation_analysis_full.csv), plus "paper"
+        and "summary" when write_paper / write_summary are on.
+    """
+    out_dir = pathlib.Path(out_dir)
+    if write or plots:
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+    #### --- Load experimental data (if needed) --- #####
+    exp_df = load_experimental_data(exp_csv) if (ERROR_MODE == "exp" or write_summary) else None
+
+    # --- Load and combine case report data ---
+    case_df = load_case_reports(case_csvs, frames=case_frames)
+
+    if write:
+        # Saving full to file
+        debug_path = out_dir / "full_cases.csv"
+        case_df.to_csv(debug_path, index=False)
+
+    full_df, case_df_full = analyze_cases(
+        case_df,
+        exp_df=exp_df if ERROR_MODE == "exp" else None,
+        runtime_log_path=runtime_log_path,
+        run_store_path=run_store_path,
+    )
+
     # ---- MAKE PLOTS (optional) ----
-    if make_plots:
+    if plots:
         make_convergence_plots(full_df, out_dir, max_nodes_global=MAX_NODES_GLOBAL, max_nodes_by_prefix=MAX_NODES_BY_PREFIX)
         make_runtime_plots(full_df,out_dir,max_nodes_global=MAX_NODES_GLOBAL,max_nodes_by_prefix=MAX_NODES_BY_PREFIX)
+
     # --- Output 1: Full analysis CSV ---
-    
-    full_path = out_dir / "validation_analysis_full.csv"
-    full_df_out = filter_columns(full_df)
-    full_df_out.to_csv(full_path, index=False)
-    print(f"Wrote full analysis to: {full_path}")
+    results = {"full": filter_columns(full_df)}
+    if write:
+        full_path = out_dir / "validation_analysis_full.csv"
+        results["full"].to_csv(full_path, index=False)
+        print(f"Wrote full analysis to: {full_path}")
 
 
     # --- Output 2: Short paper-style table ---
@@ -1055,119 +1327,48 @@ def main():
         paper_cols = PAPER_COLS
         paper_cols = [c for c in paper_cols if c in full_df.columns]  # safety
         paper_df = full_df[paper_cols].copy()
-        paper_df = filter_columns(paper_df, paper=True)
-        
-        paper_path = out_dir / "validation_analysis_paper_table.csv"
-        paper_df.to_csv(paper_path, index=False)
-        print(f"Wrote paper table to: {paper_path}")
-    # --- Output 3: Summary for another script / paper table ---
-    # For ERROR_MODE == "exp":
-    #     - keep existing behavior: best (min rmse_K) vs experiment per prefix.
-    #
-    # For ERROR_MODE in {"self_ref", "self_ref_second_order"}:
-    #     - take *only* the refined reference case(s) and compare those to experiment.
-    #
-    if write_summary:
-
-        # Ensure experimental data is available for summary, regardless of ERROR_MODE
-        if exp_df is None:
-            exp_df_local = pd.read_csv(args.exp_csv)
-            exp_df_local.columns = exp_df_local.columns.str.strip()
+        results["paper"] = filter_columns(paper_df, paper=True)
 
-            if "Kelvin" not in exp_df_local.columns:
-                raise RuntimeError(
-                    f"Expected a 'Kelvin' column in {args.exp_csv}, got columns: {list(exp_df_local.columns)}"
-                )
+        if write:
+            paper_path = out_dir / "validation_analysis_paper_table.csv"
+            results["paper"].to_csv(paper_path, index=False)
+            print(f"Wrote paper table to: {paper_path}")
 
-            exp_df_local["Kelvin"] = exp_df_local["Kelvin"].astype(str).str.strip()
-            exp_df_local = exp_df_local.set_index("Kelvin")
-            exp_df_local.index = exp_df_local.index.astype(str).str.strip()
-            for col in exp_df_local.columns:
-                exp_df_local[col] = pd.to_numeric(exp_df_local[col], errors="coerce")
-        else:
-            exp_df_local = exp_df
-
-        # ---- Case 1: ERROR_MODE == "exp" (already comparing vs experiment) ----
-        if ERROR_MODE == "exp":
-            summary_df = (
-                full_df.sort_values(["prefixes", "rmse_K"])
-                .groupby("prefixes", as_index=False)
-                .first()
-            )
-            summary_cols = [c for c in SUMMARY_COLS if c in summary_df.columns]
-            summary_df = summary_df[summary_cols].copy()
+    # --- Output 3: Summary for another script / paper table ---
+    if write_summary:
+        results["summary"] = summarize_cases(full_df, case_df_full, exp_df)
 
-        # ---- Case 2: SAM-vs-SAM modes -> summary is refined SAM vs experiment ----
-        else:
-            summary_rows = []
-
-            if ERROR_MODE == "self_ref_second_order":
-                # One reference per prefix: finest second-order row
-                df_second = case_df_full[case_df_full["order"] == "second_order"].copy()
-                grouped = df_second.groupby("prefixes", dropna=False)
-
-                for prefix, grp in grouped:
-                    cap = get_nodes_cap_for_prefix(prefix)
-                    if cap is not None:
-                        grp = grp[grp["nodes_mult"] <= cap]
-                    if grp.empty:
-                        # no rows for this prefix under the cap, skip
-                        continue
-
-                    idx = grp["nodes_mult"].idxmax()
-                    base_row = grp.loc[idx]
-                    extra = compute_exp_errors_for_row(base_row, exp_df_local)
-                    if extra is None:
-                        continue
-                    combined = dict(base_row)
-                    combined.update(extra)
-                    summary_rows.append(combined)
-
-
-            elif ERROR_MODE == "self_ref":
-                # One reference per (prefix, order): finest mesh of that family
-                grouped = case_df_full.groupby(["prefixes", "order"])
-
-                for (prefix, order), grp in grouped:
-                    cap = get_nodes_cap_for_prefix(prefix)
-                    if cap is not None:
-                        grp = grp[grp["nodes_mult"] <= cap]
-                    if grp.empty:
-                        continue
-
-                    idx = grp["nodes_mult"].idxmax()
-                    base_row = grp.loc[idx]
-                    extra = compute_exp_errors_for_row(base_row, exp_df_local)
-                    if extra is None:
-                        continue
-                    combined = dict(base_row)
-                    combined.update(extra)
-                    summary_rows.append(combined)
-
-
-            else:
-                raise ValueError(f"Unexpected ERROR_MODE in summary block: {ERROR_MODE}")
-
-            if not summary_rows:
-                raise RuntimeError(
-                    "No rows could be matched to experimental data for summary. "
-                    "Check prefix->column mapping and ERROR_MODE."
-                )
+        if write:
+            summary_path = out_dir / "validation_analysis_summary.csv"
+            results["summary"].to_csv(summary_path, index=False)
+            print(f"Wrote summary to: {summary_path}")
 
-            summary_df = pd.DataFrame(summary_rows)
+    return results
 
-            # Nice, paper-ready columns: refined SAM vs experiment
-            summary_cols = [c for c in SUMMARY_COLS if c in summary_df.columns]
-            summary_df = summary_df[summary_cols].copy()    
 
-        # Apply column toggles (note: filter_columns is written for ref_*,
-        # so it will generally leave exp_* columns alone, which is what we want)
-        summary_df = filter_columns(summary_df)
+# ---------- Main ----------
 
-        summary_path = out_dir / "validation_analysis_summary.csv"
-        summary_df.to_csv(summary_path, index=False)
-        print(f"Wrote summary to: {summary_path}")
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--exp_csv",
+        default="../../Validation_Data/validation_data.csv",
+        help="CSV with experimental data (Kelvin, Salt Test 1..4, Water Test 1..4)",
+    )
+    parser.add_argument(
+        "--case_csv",
+        nargs="+",
+        default= csv_cases,
+        help="One or more CSVs with SAM case reports (your big tables)",
+    )
+    parser.add_argument(
+        "--out_dir",
+        default="analysis",
+        help="Output directory for the generated CSV files",
+    )
+    args = parser.parse_args()
 
+    run_analysis(case_csvs=args.case_csv, exp_csv=args.exp_csv, out_dir=args.out_dir)
 
 
 if __name__ == "__main__":
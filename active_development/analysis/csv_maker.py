@@ -5,6 +5,9 @@
 # ⭐️ BEFORE USING: make sure to ⭐️
 #       rm ../Templates/*_cp*
 #       mv ../Templates/*_nodes_mult_* ./analysis/<case_identifier_of_choice>/
+#   (runs launched through sam_tuner live in ../runs/<input stem>/ instead;
+#    sam_tuner.file_ops.collect_run_outputs copies them over, and the
+#    pipeline's analysis stage does that for you)
 
 # Purpose of this script: 
 #   Makes case reports and summary from full run csv. 
@@ -30,24 +33,30 @@
 # 3. Save:
     # analysis/{case}_analysis/case_report.csv (structured table).
     # analysis/{case}_analysis/summary.txt (human-readable summary)
+# Run it as a script (python csv_maker.py [--workers N] to read the files on N processes), or import it:
+#   make_case_reports(...) does all of the above and also returns {report path: case_report DataFrame}
+#   (sam_tuner's analysis stage calls it in-process and hands the frames to csv_analysis.run_analysis)
 #~
 ##############################################
 
-import glob, os, re
+import argparse, glob, io, os, re, sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, closing
 from natsort import natsorted, index_natsorted, natsort_keygen
 import pandas as pd
 from pathlib import Path
 
-from collections import defaultdict
-case_records = defaultdict(list)  # case -> list of dict rows (one per prefix file's last row)
 TOL = 1e-10
 
 case_identifiers = [ "analysis/temp_test"] # "analysis/coarse_second_order_nm_nureth26", "analysis/coarse_first_order_nm_physor_not_nureth26"] #, "Fine_first_order_nm_nureth26_analysis", "Fine_second_order_nm_exp_nureth26_analysis"] #  # Where files are, name of directory you want to search # search uses: os.path.expanduser(f"~/projects/physor2026_andrew/Testing_w_sun/{case}/{prefix}*.txt"))
 prefixes = ["jsalt1", "jsalt2", "jsalt3", "jsalt4"] # Name of type of file you want to parse csv
 end_times = [700, 850, 100000] # possible end times in your file. 
+SCAN_WORKERS = 1 # processes reading the CSVs: 1 = serial, 0 = one per CPU (pays off with thousands of files, e.g. archived anl_runs/)
 
 RUNTIME_CSV = "sam_runtime.csv"
 RUNTIME_TXT = "sam_runtimes.txt"
+RUNTIME_MASTER = "runtimes_master.csv"  # sam_tuner's central log (has status / steady_time)
+RUN_STORE = "runs.sqlite"               # ... or its SQLite run store, if present
 
 # Search in base directory
 THIS_DIR = Path(__file__).resolve().parent
@@ -69,6 +78,40 @@ def _nearest_end_time(t, ends, tol):
             return True, e
     return False, None
 
+def read_last_row(path, block_size=1 << 16):
+    # Header + last complete data row of a SAM CSV, as a 1-row DataFrame (0 rows if there is no data).
+    # Reads blocks backwards from the end of the file instead of parsing the whole time history,
+    # so the cost does not grow with the length of the transient.
+    # An unterminated last line (SAM still writing it) and rows with the wrong number of fields are skipped.
+    with open(path, "rb") as fh:
+        header = fh.readline()
+        if not header.strip():
+            return pd.DataFrame()
+        header = header.rstrip(b"\r\n") + b"\n"
+        n_fields = header.count(b",") + 1
+        data_start = fh.tell()
+        fh.seek(0, os.SEEK_END)
+        pos = fh.tell()
+        carry = b""                       # oldest (possibly cut-off) line of the blocks read so far
+        first = True
+        while pos > data_start:
+            step = min(block_size, pos - data_start)
+            pos -= step
+            fh.seek(pos)
+            lines = (fh.read(step) + carry).split(b"\n")
+            if first:
+                lines.pop()               # after the final '\n': empty, or a partially written line
+                if not lines:
+                    continue              # no '\n' yet: still inside that partial line
+                first = False
+            carry = lines.pop(0) if pos > data_start else b""
+            for line in reversed(lines):
+                line = line.strip()
+                if line and line.count(b",") + 1 == n_fields:
+                    return pd.read_csv(io.BytesIO(header + line + b"\n"))
+    return pd.read_csv(io.BytesIO(header))
+
+
 def load_runtime_map(case_identifiers):
     """
     Look for runtime logs:
@@ -137,20 +180,100 @@ def load_runtime_map(case_identifiers):
 
 
 
-# Build global map once
-runtime_by_source = load_runtime_map(case_identifiers)
-# Sanity check
-if not runtime_by_source:
-    print("[WARN] runtime_by_source is empty – check that your sam_runtime.csv or sam_runtimes.txt is in the working directory.")
+def load_steady_map():
+    """
+    Runs that sam_tuner stopped early at steady state (status "success_steady")
+    never reach end_time, but their last row IS the converged answer.
 
+    Return: dict mapping '<input stem>_csv.csv' -> steady_time, read from
+    runs.sqlite or runtimes_master.csv next to this script (empty dict if
+    neither is there).
+    """
+    store = THIS_DIR / RUN_STORE
+    path = THIS_DIR / RUNTIME_MASTER
+    if store.exists():
+        with closing(sqlite3.connect(str(store))) as conn:
+            df = pd.read_sql_query("SELECT * FROM runs", conn)
+    elif path.exists():
+        df = pd.read_csv(path)
+    else:
+        return {}
+    if "status" not in df.columns or "steady_time" not in df.columns:
+        return {}
+    df = df[df["status"] == "success_steady"]
+    steady = {}
+    for _, row in df.iterrows():
+        csv_name = Path(str(row["sam_input_path"])).stem + "_csv.csv"
+        steady[csv_name] = float(row["steady_time"])
+    print(f"[INFO] Loaded {len(steady)} steady-state stopped runs.")
+    return steady
+
+
+def scan_file(file, prefix, case, end_times, tol, runtime_val, steady_time):
+    # Last row of one CSV tagged with its metadata; the unit of work of collect_last_rows
+    # (top-level and free of globals, so it can run in a worker process).
+    # Returns ("ok", 1-row DataFrame), ("empty", None) or ("error", message).
+    try: # Read header + last complete row only (seeks from the end of the file)
+        df = read_last_row(file)
+
+        ## Taking onlly last row last row
+        if df.empty:
+            # Skipping empty files
+            return "empty", None
+        last = df.copy() # last is the last entry in csv
+        last.insert(1, "prefix", prefix)
+        last.insert(2, "case", case)
+        last_time_val = float(last[_find_time_col(df)].iloc[0]) # returns the time value of the final line in that csv
+        reached, matched_end = _nearest_end_time(last_time_val, end_times, tol)
+        if not reached and steady_time is not None:
+            # stopped early at steady state: counts as finished
+            reached, matched_end = True, steady_time
+        last["last_time"] = last_time_val
+        last["stopped_steady"] = steady_time is not None
+        last["reached_end"] = reached
+        last["matched_end_time"] = matched_end
+
+        last.insert(0, "source_file", os.path.basename(file))  # put filename as first column # Headers made automatically by pandas
+        last["script_runtime"] = runtime_val
+        return "ok", last
+
+    except Exception as e: # if unable to read csv
+        return "error", str(e)
+
+
+def _scan_job(job):
+    return scan_file(*job)
+
+
+def collect_last_rows(case, prefixes, end_times, runtime_by_source, steady_by_source,
+                      tol=TOL, base_dir=THIS_DIR, write=True, executor=None, workers=1):
+    """
+    For each prefix: the last row of every matching CSV in base_dir/case, tagged with
+    prefix / case / source_file / last_time / reached_end / matched_end_time / script_runtime.
 
+    executor: optional ProcessPoolExecutor with `workers` processes; the files of all prefixes
+    are then read on it. Results are gathered in file order, so the output is the same as the
+    serial scan.
 
-# Main code
-    # Loops over all cases and prefixes
-for case in case_identifiers: 
+    Return: dict prefix -> combined DataFrame (one row per file). With write=True each one is
+    also written to {base_dir}/{case}_analysis/combined_last_lines_<prefix>.csv.
+    """
+    search_dir = Path(base_dir) / case
+    files_by_prefix = {prefix: natsorted(glob.glob(str(search_dir / f"{prefix}*.csv"))) # This is how to search for files
+                       for prefix in prefixes}
+    jobs = [(file, prefix, case, end_times, tol,
+             runtime_by_source.get(os.path.basename(file)),
+             steady_by_source.get(os.path.basename(file)))
+            for prefix in prefixes for file in files_by_prefix[prefix]]
+    if executor is not None and len(jobs) > 1:
+        chunksize = max(1, len(jobs) // (4 * max(1, workers)))  # a few chunks per worker
+        results = iter(executor.map(_scan_job, jobs, chunksize=chunksize))
+    else:
+        results = map(_scan_job, jobs)
+
+    combined_by_prefix = {}
     for prefix in prefixes:
-        search_dir = THIS_DIR / case
-        files = natsorted(glob.glob(str(search_dir / f"{prefix}*.csv"))) # This is how to search for files
+        files = files_by_prefix[prefix]
 
 
         # Outputs What  I am reading, and did if it worked
@@ -158,188 +281,235 @@ for case in case_identifiers:
         if not files:
             print(f"[WARN] No files for {prefix} \n")
             continue
-        
 
-            
+
+
         ### Collecting outrows and making csv
         out_rows = []
         for file in files:
-            try: # Read whole CSV 
-                df = pd.read_csv(file, engine="python", on_bad_lines="skip")
-                
-                ## Taking onlly last row last row
-                if df.empty: 
-                    # Skipping empty files
-                    print(f"[SKIP] Empty file: {file}\n")
-                    continue
-                last = df.tail(1).copy() # last is the last entry in csv
-                last.insert(1, "prefix", prefix)
-                last.insert(2, "case", case)
-                last_time_val = float(last[_find_time_col(df)].iloc[0]) # returns the time value of the final line in that csv
-                reached, matched_end = _nearest_end_time(last_time_val, end_times, TOL)
-                last["last_time"] = last_time_val
-                last["reached_end"] = reached
-                last["matched_end_time"] = matched_end
-
-                last.insert(0, "source_file", os.path.basename(file))  # put filename as first column # Headers made automatically by pandas
-                runtime_val = runtime_by_source.get(os.path.basename(file))
-                last["script_runtime"] = runtime_val
-                
-                out_rows.append(last)
-                case_records[case].append(last) # capture into case_records for per-case report later
-
-                
-                
-
-
-            except Exception as e: # if unable to read csv
-                print(f"[ERROR] {file}: {e}\n")
-            
+            status, payload = next(results)
+            if status == "ok":
+                out_rows.append(payload)
+            elif status == "empty":
+                print(f"[SKIP] Empty file: {file}\n")
+            else: # if unable to read csv
+                print(f"[ERROR] {file}: {payload}\n")
+
         if out_rows:
             combined = pd.concat(out_rows, ignore_index=True) # Makes a file with all the last rows
-            out_path = f"{case}_analysis/combined_last_lines_{prefix}.csv" # if no files to be made
-
-            os.makedirs(os.path.dirname(out_path), exist_ok=True) # will make the directory needed if analysis doesn't exist yet
-            combined.to_csv(out_path, index=False)
-            print(f"[OK] Wrote {len(combined)} rows → {out_path} \n")
+            combined_by_prefix[prefix] = combined
+            if write:
+                out_path = Path(base_dir) / f"{case}_analysis" / f"combined_last_lines_{prefix}.csv"
+                out_path.parent.mkdir(parents=True, exist_ok=True) # will make the directory needed if analysis doesn't exist yet
+                combined.to_csv(out_path, index=False)
+                print(f"[OK] Wrote {len(combined)} rows → {out_path} \n")
         else:
             print(f"[WARN] No rows collected for {prefix} \n")
-        
-
-        ### ADD (per-case report once all prefixes processed):
-        if case_records[case]:
-            # Flatten rows into one DataFrame and sort
-            case_df = pd.concat(case_records[case], ignore_index=True)
-            case_df = case_df.sort_values(["case", "source_file"], ascending=[True, True])
-
-            
-
-            if "script_runtime" not in case_df.columns:
-                case_df["script_runtime"] = pd.NA
-
-            # Build a per-(case, source_file) report:
-            # - reached_end_any: whether ANY run for that file reached an allowed end time
-            # - last_time: max last_time seen for that file
-            # - matched_end_time: most common non-null matched end time for that file
-            # - prefixes: which prefixes contributed rows for that file
-            file_group = case_df.groupby(["case", "source_file"], as_index=False)
-
-            def _mode_non_null(s):
-                s = s.dropna()
-                return s.mode().iloc[0] if not s.empty else pd.NA
-
-            file_report = (
-                            file_group.agg(
-                            reached_end_any=("reached_end", "any"),
-                            last_time=("last_time", "max"),
-                            matched_end_time=("matched_end_time", _mode_non_null),
-                            prefixes=("prefix", lambda s: ",".join(sorted(set(s)))),
-                            script_runtime=("script_runtime", "mean"),  # safe now
-                        ))
-            keygen = natsort_keygen()
-
-            file_report["source_file"] = file_report["source_file"].astype(str)
-            file_report["source_file"] = file_report["source_file"].astype(str)
-            file_report = file_report.sort_values(
-                                                    ["case", "source_file"],
-                                                    key=lambda col: col.map(keygen) if col.name == "source_file" else col
-                                                ).reset_index(drop=True)
-            
-            ### TH_Output_cols for analysis case_report.csv ### 
-            # Identify useful TH output columns
-            cols = [c for c in case_df.columns if isinstance(c, str)]
-            def detect_cols(cols, contains=(), startswith=(), exact=(),
-                            exclude_contains=(), exclude_startswith=(), exclude_exact=()):
-                """Return list of columns whose names match include-rules 
-                but do NOT match exclude-rules."""
-                
-                out = []
-                for c in cols:
-                    if not isinstance(c, str):
-                        continue
-                    
-                    name = c.lower()
-
-                    # ---------- Exclusion rules ----------
-                    if any(bad in name for bad in exclude_contains):
-                        continue
-                    if any(name.startswith(bad) for bad in exclude_startswith):
-                        continue
-                    if any(name == bad for bad in exclude_exact):
-                        continue
-
-                    # ---------- Inclusion rules ----------
-                    if (
-                        any(sub in name for sub in contains) or
-                        any(name.startswith(pref) for pref in startswith) or
-                        any(name == ex for ex in exact)
-                    ):
-                        out.append(c)
-                return out
-            TH_Output_cols = detect_cols(
-                cols,
-                contains=("temp","vel"),
-                startswith=("t_", "tp"),
-                exact=("massflowrate", "temp"),
-                exclude_contains=("template", "attempt", ":"),  # blocks template_id, attempt_count
-                exclude_startswith=("t_probe",),           # blocks t_probe_*
-                exclude_exact=("temp_flag",),             # blocks exactly "temp_flag"
-            )
-                        
-            
-            # Attach mean of temperature columns per file (if present)
-            if TH_Output_cols:
-                temp_means = (case_df.groupby(["case", "source_file"])[TH_Output_cols]
-                              .mean(numeric_only=True)
-                              .reset_index())
-                file_report = file_report.merge(temp_means, on=["case", "source_file"], how="left")
-       
-
-            # Simple counts for the summary
-            num_reached = int(file_report["reached_end_any"].sum())
-            num_total   = len(file_report)
-            print(f"[REPORT] {case}: {num_reached}/{num_total} files reached an allowed end_time.\n")
-
-            # Write per-case report      
-            report_dir = f"{case}_analysis"
-            os.makedirs(report_dir, exist_ok=True)
-            report_path = os.path.join(report_dir, "case_report.csv")
-            meta_path   = os.path.join(report_dir, "summary.txt")
-
-            file_report.to_csv(report_path, index=False)
-
-            with open(meta_path, "w") as fh:
-                fh.write(f"Case: {case}\n")
-                fh.write(f"Files reaching allowed end_time: {num_reached}/{num_total}\n")
-                fh.write("Successful files by matched_end_time:\n")
-
-                avg_runtime = file_report["script_runtime"].mean(skipna=True)
-                fh.write(f"\nAverage script runtime (s): {avg_runtime:.2f}\n")
-
-                successes = file_report[file_report["reached_end_any"]].copy()
-                successes = (
-                            successes.sort_values("matched_end_time")
-                            .groupby("matched_end_time", group_keys=False)
-                            .apply(
-                                lambda g: g.iloc[index_natsorted(g["source_file"].astype(str))]  # natural sort within group
-                                        .assign(matched_end_time=g.name),                     # <-- put it back
-                                include_groups=False
-                            )
-                            .reset_index(drop=True)
-                )
-                for _, row in successes.iterrows(): # Printing output foe summary.txt
-                    runtime = row.get("script_runtime", None)
-                    if pd.isna(runtime):
-                        runtime_str = "runtime: N/A"
-                    else:
-                        runtime_str = f"runtime: {runtime:.2f} s"
-
-                    fh.write(
-                        f"  - {row['source_file']} @ {row['matched_end_time']} "
-                        f"(prefixes: {row['prefixes']})  \t\t{runtime_str}\n"
+    return combined_by_prefix
+
+
+def detect_cols(cols, contains=(), startswith=(), exact=(),
+                exclude_contains=(), exclude_startswith=(), exclude_exact=()):
+    """Return list of columns whose names match include-rules
+    but do NOT match exclude-rules."""
+
+    out = []
+    for c in cols:
+        if not isinstance(c, str):
+            continue
+
+        name = c.lower()
+
+        # ---------- Exclusion rules ----------
+        if any(bad in name for bad in exclude_contains):
+            continue
+        if any(name.startswith(bad) for bad in exclude_startswith):
+            continue
+        if any(name == bad for bad in exclude_exact):
+            continue
+
+        # ---------- Inclusion rules ----------
+        if (
+            any(sub in name for sub in contains) or
+            any(name.startswith(pref) for pref in startswith) or
+            any(name == ex for ex in exact)
+        ):
+            out.append(c)
+    return out
+
+
+def _mode_non_null(s):
+    s = s.dropna()
+    return s.mode().iloc[0] if not s.empty else pd.NA
+
+
+def build_case_report(case_df):
+    """
+    Per-(case, source_file) report from the tagged last rows of one case
+    (the frames returned by collect_last_rows, concatenated).
+
+    Return: the case_report DataFrame (what case_report.csv holds).
+    """
+    # Flatten rows into one DataFrame and sort
+    case_df = case_df.sort_values(["case", "source_file"], ascending=[True, True])
+
+
+
+    if "script_runtime" not in case_df.columns:
+        case_df["script_runtime"] = pd.NA
+
+    # Build a per-(case, source_file) report:
+    # - reached_end_any: whether ANY run for that file reached an allowed end time
+    # - last_time: max last_time seen for that file
+    # - matched_end_time: most common non-null matched end time for that file
+    # - prefixes: which prefixes contributed rows for that file
+    file_group = case_df.groupby(["case", "source_file"], as_index=False)
+
+    file_report = (
+                    file_group.agg(
+                    reached_end_any=("reached_end", "any"),
+                    stopped_steady=("stopped_steady", "any"),
+                    last_time=("last_time", "max"),
+                    matched_end_time=("matched_end_time", _mode_non_null),
+                    prefixes=("prefix", lambda s: ",".join(sorted(set(s)))),
+                    script_runtime=("script_runtime", "mean"),  # safe now
+                ))
+    keygen = natsort_keygen()
+
+    file_report["source_file"] = file_report["source_file"].astype(str)
+    file_report = file_report.sort_values(
+                                            ["case", "source_file"],
+                                            key=lambda col: col.map(keygen) if col.name == "source_file" else col
+                                        ).reset_index(drop=True)
+
+    ### TH_Output_cols for analysis case_report.csv ###
+    # Identify useful TH output columns
+    cols = [c for c in case_df.columns if isinstance(c, str)]
+    TH_Output_cols = detect_cols(
+        cols,
+        contains=("temp","vel"),
+        startswith=("t_", "tp"),
+        exact=("massflowrate", "temp"),
+        exclude_contains=("template", "attempt", ":"),  # blocks template_id, attempt_count
+        exclude_startswith=("t_probe",),           # blocks t_probe_*
+        exclude_exact=("temp_flag",),             # blocks exactly "temp_flag"
+    )
+
+
+    # Attach mean of temperature columns per file (if present)
+    if TH_Output_cols:
+        temp_means = (case_df.groupby(["case", "source_file"])[TH_Output_cols]
+                      .mean(numeric_only=True)
+                      .reset_index())
+        file_report = file_report.merge(temp_means, on=["case", "source_file"], how="left")
+    return file_report
+
+
+def write_case_report(case, file_report, report_dir):
+    # Writes case_report.csv + the human-readable summary.txt into report_dir; returns the report path.
+    # Simple counts for the summary
+    num_reached = int(file_report["reached_end_any"].sum())
+    num_total   = len(file_report)
+    print(f"[REPORT] {case}: {num_reached}/{num_total} files reached an allowed end_time.\n")
+
+    # Write per-case report
+    report_dir = Path(report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    report_path = report_dir / "case_report.csv"
+    meta_path   = report_dir / "summary.txt"
+
+    file_report.to_csv(report_path, index=False)
+
+    with open(meta_path, "w") as fh:
+        fh.write(f"Case: {case}\n")
+        fh.write(f"Files reaching allowed end_time: {num_reached}/{num_total}\n")
+        fh.write("Successful files by matched_end_time:\n")
+
+        avg_runtime = file_report["script_runtime"].mean(skipna=True)
+        fh.write(f"\nAverage script runtime (s): {avg_runtime:.2f}\n")
+
+        successes = file_report[file_report["reached_end_any"]].copy()
+        successes = (
+                    successes.sort_values("matched_end_time")
+                    .groupby("matched_end_time", group_keys=False)
+                    .apply(
+                        lambda g: g.iloc[index_natsorted(g["source_file"].astype(str))]  # natural sort within group
+                                .assign(matched_end_time=g.name),                     # <-- put it back
+                        include_groups=False
                     )
+                    .reset_index(drop=True)
+        )
+        for _, row in successes.iterrows(): # Printing output foe summary.txt
+            runtime = row.get("script_runtime", None)
+            if pd.isna(runtime):
+                runtime_str = "runtime: N/A"
+            else:
+                runtime_str = f"runtime: {runtime:.2f} s"
+
+            fh.write(
+                f"  - {row['source_file']} @ {row['matched_end_time']} "
+                f"(prefixes: {row['prefixes']})  \t\t{runtime_str}\n"
+            )
 
 
-            print(f"[OK] Wrote per-case report → {report_path}\n[OK] Wrote summary → {meta_path}\n")
-        else:
-            print(f"[WARN] No records captured for case {case}\n")
+    print(f"[OK] Wrote per-case report → {report_path}\n[OK] Wrote summary → {meta_path}\n")
+    return report_path
+
+
+def _resolve_workers(workers):
+    # SCAN_WORKERS convention: None/1 -> serial, 0 -> one per CPU
+    if workers is None:
+        return 1
+    workers = int(workers)
+    return (os.cpu_count() or 1) if workers == 0 else max(1, workers)
+
+
+def make_case_reports(case_identifiers=case_identifiers, prefixes=prefixes, end_times=end_times,
+                      base_dir=THIS_DIR, write=True, workers=SCAN_WORKERS):
+    """
+    Library entry point (sam_tuner calls this in-process): the whole script for the given cases.
+    workers > 1 reads the CSVs on a pool of that many processes (0 -> one per CPU); the
+    reports are identical to the serial scan.
+
+    Return: dict {report path: case_report DataFrame}, the path being
+    {base_dir}/{case}_analysis/case_report.csv, where the report is written if write=True
+    (csv_analysis reads the first/second order label off that folder name).
+    """
+    # Build runtime maps once per call
+    runtime_by_source = load_runtime_map(case_identifiers)
+    steady_by_source = load_steady_map()
+    # Sanity check
+    if not runtime_by_source:
+        print("[WARN] runtime_by_source is empty – check that your sam_runtime.csv or sam_runtimes.txt is in the working directory.")
+
+    workers = _resolve_workers(workers)
+    with ExitStack() as stack:
+        executor = None
+        if workers > 1:
+            print(f"[INFO] Reading CSVs on {workers} processes")
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+
+        reports = {}
+        for case in case_identifiers:
+            combined_by_prefix = collect_last_rows(case, prefixes, end_times,
+                                                   runtime_by_source, steady_by_source,
+                                                   base_dir=base_dir, write=write,
+                                                   executor=executor, workers=workers)
+            if not combined_by_prefix:
+                print(f"[WARN] No records captured for case {case}\n")
+                continue
+            file_report = build_case_report(pd.concat(combined_by_prefix.values(), ignore_index=True))
+            report_path = Path(base_dir) / f"{case}_analysis" / "case_report.csv"
+            if write:
+                write_case_report(case, file_report, report_path.parent)
+            reports[report_path] = file_report
+    return reports
+
+
+# Main code
+    # Loops over all cases and prefixes (outputs go next to this script, under {case}_analysis/)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Case reports from the last rows of SAM output CSVs.")
+    parser.add_argument("--workers", type=int, default=SCAN_WORKERS,
+                        help="Processes reading the CSVs (1 = serial, 0 = one per CPU).")
+    make_case_reports(workers=parser.parse_args().workers)
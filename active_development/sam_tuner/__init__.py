@@ -5,7 +5,8 @@ Optimizer utilities for SAM molten-salt loop project.
 
 Main modules:
 - config: central control panel (hyperparams, runtime limits, paths)
-- runtime_logger: centralized runtime logging (runtimes_master.csv)
+- runtime_logger: centralized runtime logging (run_store / runtimes_master.csv)
+- run_store: SQLite store behind the runtime log
 - run_launcher: utilities to run a single SAM case with hyperparams
 - monitor: command-line live monitor for progress
 
@@ -0,0 +1,43 @@
+"""
+__main__.py
+
+`python -m sam_tuner <command> [args]` runs one of the package's
+command-line tools, e.g.
+
+    python -m sam_tuner worker script --max-workers 32
+    python -m sam_tuner sweep status
+    python -m sam_tuner monitor --once
+
+Same as `python -m sam_tuner.<module> [args]`.
+"""
+
+import runpy
+import sys
+
+
+COMMANDS = {
+    "worker": "multi-node sweep worker (worker.py)",
+    "sweep": "sweep queue: status / run / requeue / enqueue (sweep.py)",
+    "monitor": "live monitor of the runtime log and runs in flight (monitor.py)",
+    "dashboard": "local HTTP dashboard (dashboard.py)",
+    "run_store": "run store import / export / info (run_store.py)",
+    "log_parser": "solver telemetry from SAM logs (log_parser.py)",
+    "pipeline": "sweeps + analysis + optimizer (pipeline.py)",
+    "optimizer_loop": "surrogate optimizer (optimizer_loop.py)",
+    "async_loop": "asynchronous closed loop (async_loop.py)",
+    "asha": "asynchronous successive halving (asha.py)",
+}
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print("usage: python -m sam_tuner <command> [args]\n\ncommands:")
+        for name, what in COMMANDS.items():
+            print(f"  {name:15s} {what}")
+        sys.exit(0 if len(sys.argv) >= 2 and sys.argv[1] in ("-h", "--help") else 2)
+    cmd = sys.argv.pop(1)
+    runpy.run_module(f"sam_tuner.{cmd}", run_name="__main__", alter_sys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+acquisition.py
+
+Uncertainty-aware acquisition and batch selection for the optimizer.
+
+The RandomForest surrogates give, per candidate, a mean and a spread over
+their trees (models.predict_with_uncertainty). The objective being
+minimized is the same score as in optimizer v0,
+
+    score = w_err * err_norm + w_rt * rt_norm
+
+treated as Gaussian with sigma^2 = (w_err * sd_err_norm)^2 + (w_rt * sd_rt_norm)^2.
+
+This module provides:
+  - expected_improvement(mu, sigma, best): EI below the best observed score
+  - prob_feasible(rt_mean, rt_std, cap): P(runtime <= cap)
+  - select_batch_local_penalization(...): q diverse points from a pool by
+    greedily maximizing EI, shrinking it around points already picked
+    (Gonzalez et al. 2016, "Batch Bayesian Optimization via Local
+    Penalization")
+  - select_batch_thompson(...): q points, each the argmin of one posterior
+    draw (one random tree from each forest)
+
+All functions work on plain arrays; optimizer_loop.suggest_batch wires them
+to the candidate stream.
+"""
+
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+from scipy.stats import norm
+
+
+def expected_improvement(
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    best: float,
+    xi: float = 0.0,
+) -> np.ndarray:
+    """
+    Expected improvement for minimization: E[max(best - xi - f, 0)].
+
+    Where sigma == 0 this is just max(best - xi - mu, 0).
+    """
+    mu = np.asarray(mu, dtype=float)
+    sigma = np.asarray(sigma, dtype=float)
+    imp = best - xi - mu
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(sigma > 0, imp / sigma, 0.0)
+    ei = imp * norm.cdf(z) + sigma * norm.pdf(z)
+    return np.where(sigma > 0, ei, np.maximum(imp, 0.0))
+
+
+def prob_feasible(rt_mean: np.ndarray, rt_std: np.ndarray, cap: float) -> np.ndarray:
+    """Probability that the runtime stays below the cap (Gaussian approx.)."""
+    rt_mean = np.asarray(rt_mean, dtype=float)
+    rt_std = np.asarray(rt_std, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = norm.cdf((cap - rt_mean) / rt_std)
+    return np.where(rt_std > 0, p, (rt_mean <= cap).astype(float))
+
+
+def _estimate_lipschitz(
+    mu: np.ndarray,
+    coords: np.ndarray,
+    n_pairs: int = 20000,
+    seed: Optional[int] = 0,
+) -> float:
+    """Largest slope |mu_i - mu_j| / |x_i - x_j| over random pairs of the pool."""
+    n = len(mu)
+    if n < 2 or coords.shape[1] == 0:
+        return 1.0
+    rng = np.random.default_rng(seed)
+    i = rng.integers(n, size=n_pairs)
+    j = rng.integers(n, size=n_pairs)
+    d = np.linalg.norm(coords[i] - coords[j], axis=1)
+    ok = d > 1e-9
+    if not ok.any():
+        return 1.0
+    L = float(np.max(np.abs(mu[i[ok]] - mu[j[ok]]) / d[ok]))
+    return L if L > 0 else 1.0
+
+
+def select_batch_local_penalization(
+    acq: np.ndarray,
+    mu: np.ndarray,
+    sigma: np.ndarray,
+    coords: np.ndarray,
+    best: float,
+    q: int,
+    lipschitz: Optional[float] = None,
+    pending_coords: Optional[np.ndarray] = None,
+    pending_mu: Optional[np.ndarray] = None,
+    pending_sigma: Optional[np.ndarray] = None,
+    exclude: Optional[np.ndarray] = None,
+) -> List[int]:
+    """
+    Pick q pool positions by greedy maximization of a penalized acquisition.
+
+    After picking x_j, every candidate's acquisition is multiplied by
+
+        phi_j(x) = Phi((L * |x - x_j| + best - mu_j) / sigma_j)
+
+    the probability that x lies outside the ball around x_j that cannot
+    contain the minimum (L is a Lipschitz estimate of the mean score over
+    the unit-scaled coordinates). Points near an earlier pick whose value
+    is uncertain or poor get suppressed, so the batch spreads out.
+
+    Parameters
+    ----------
+    acq : np.ndarray
+        Acquisition value per pool row (e.g. EI * P(feasible)); >= 0.
+    mu, sigma : np.ndarray
+        Mean and standard deviation of the score per pool row.
+    coords : np.ndarray
+        Pool rows in unit coordinates (CandidateSpace.unit_coords).
+    best : float
+        Best (lowest) observed score.
+    q : int
+        Batch size.
+    lipschitz : float, optional
+        Override the Lipschitz estimate.
+    pending_coords, pending_mu, pending_sigma : np.ndarray, optional
+        Points already being evaluated (e.g. runs still in flight) with
+        their predicted score mean/std; they penalize the pool from the
+        start, exactly like earlier picks.
+    exclude : np.ndarray of bool, optional
+        Pool rows that must not be picked (e.g. already launched).
+
+    Returns
+    -------
+    list of int
+        Selected positions, in pick order.
+    """
+    n = len(acq)
+    q = min(int(q), n)
+    L = float(lipschitz) if lipschitz else _estimate_lipschitz(mu, coords)
+
+    def _penalty(x, mu_x, sigma_x):
+        d = np.linalg.norm(coords - x, axis=1)
+        return norm.cdf((L * d + best - mu_x) / max(float(sigma_x), 1e-12))
+
+    pen = np.ones(n)
+    if pending_coords is not None:
+        for x, m, sd in zip(pending_coords, pending_mu, pending_sigma):
+            pen *= _penalty(x, m, sd)
+    blocked = np.zeros(n, dtype=bool) if exclude is None else np.asarray(exclude, dtype=bool).copy()
+    q = min(q, int((~blocked).sum()))
+
+    chosen: List[int] = []
+    for _ in range(q):
+        vals = acq * pen
+        vals[blocked] = -np.inf
+        if not np.any(vals > 0):
+            # no expected improvement left anywhere: fall back to the
+            # penalized mean so the rest of the batch still spreads out
+            vals = pen / (1.0 + mu - mu.min())
+            vals[blocked] = -np.inf
+        j = int(np.argmax(vals))
+        chosen.append(j)
+        blocked[j] = True
+        pen *= _penalty(coords[j], mu[j], sigma[j])
+    return chosen
+
+
+def select_batch_thompson(
+    err_trees: np.ndarray,
+    rt_trees: np.ndarray,
+    err_range: tuple,
+    rt_range: tuple,
+    w_err: float,
+    w_rt: float,
+    runtime_cap: float,
+    q: int,
+    seed: Optional[int] = None,
+) -> List[int]:
+    """
+    Pick q pool positions by Thompson sampling over the forests' trees.
+
+    Each draw takes one random tree from the error forest and one from the
+    runtime forest, scores the pool with them and picks the best not yet
+    chosen row (rows the drawn runtime tree puts under the cap first).
+
+    Parameters
+    ----------
+    err_trees, rt_trees : np.ndarray
+        Per-tree predictions for the pool, shape (n_trees, n_pool)
+        (models.predict_per_tree).
+    err_range, rt_range : (float, float)
+        Training (min, max) of the targets used for normalization.
+    w_err, w_rt : float
+        Objective weights.
+    runtime_cap : float
+        Runtime cap [s].
+    q : int
+        Batch size.
+    seed : int, optional
+        Random seed.
+
+    Returns
+    -------
+    list of int
+        Selected positions, in pick order.
+    """
+    def _norm(vals, lo_hi):
+        lo, hi = lo_hi
+        return np.zeros_like(vals) if hi <= lo else (vals - lo) / (hi - lo)
+
+    n = err_trees.shape[1]
+    q = min(int(q), n)
+    rng = np.random.default_rng(seed)
+    taken = np.zeros(n, dtype=bool)
+    chosen: List[int] = []
+    for _ in range(q):
+        e = err_trees[rng.integers(err_trees.shape[0])]
+        r = rt_trees[rng.integers(rt_trees.shape[0])]
+        score = w_err * _norm(e, err_range) + w_rt * _norm(r, rt_range)
+        infeasible = r > runtime_cap
+        order = np.lexsort((score, infeasible))
+        j = int(order[~taken[order]][0])
+        taken[j] = True
+        chosen.append(j)
+    return chosen
@@ -0,0 +1,371 @@
+"""
+asha.py
+
+Asynchronous successive halving (ASHA) with simulated time as the budget.
+
+Every run goes to end_time = 850 s, although the ranking between
+candidates is often clear much earlier. This scheduler treats the
+simulated horizon as the fidelity (rungs CONFIG["asha"]["horizons"],
+e.g. 100 -> 300 -> 850 s):
+
+  1. Pick n_candidates diverse, promising candidates up front (EI with
+     local penalization over the acquisition pool, as in multifidelity_mode).
+  2. Start candidates on the shortest horizon (run_launcher end_time
+     override) as SAM slots free up.
+  3. Whenever a slot frees, promote a candidate that sits in the top 1/eta
+     of the candidates finished on its rung (highest rung first) to the next
+     horizon, continuing each case from the checkpoint of its previous run
+     (restart_from=...) instead of starting over. If nobody is promotable,
+     start a new candidate on the first rung.
+
+Candidates that never make the top 1/eta of their rung are simply not
+continued (the "killed" bottom fraction). Unlike synchronous successive
+halving, no slot waits for a whole rung to finish (Li et al. 2020, "A
+System for Massively Parallel Hyperparameter Tuning").
+
+A candidate's score on a rung is the usual combined score (_compute_scores)
+of its error at that horizon (RMSE of the last output row against the
+experiment) and its runtime so far extrapolated to the full horizon,
+averaged over cases; a candidate with a failed run on any case gets +inf.
+
+Usage (from active_development):
+
+    # 27 candidates, horizons 100 / 300 / 850 s, keep the best third per rung:
+    python -m sam_tuner.asha --n-candidates 27 --eta 3 --horizons 100 300 850 --cases jsalt1
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import CONFIG
+from .data_handler import FEATURE_COLUMNS, ERROR_COLUMN, RUNTIME_COLUMN_DEFAULT, observation_from_run
+from .models import normalize_targets
+from .acquisition import select_batch_local_penalization
+from .run_launcher import _run_batch_item, _resolve_max_workers
+from .optimizer_loop import (
+    _fit_from_dataset,
+    _acquisition_pool,
+    _candidate_hyperparams,
+    _compute_scores,
+    _run_key,
+    _rerun_analysis_scripts,
+)
+
+
+@dataclass
+class Trial:
+    """One candidate: its features and its runs per rung (case -> summary)."""
+    idx: int
+    row: pd.Series
+    runs: Dict[int, Dict[str, Dict[str, Any]]] = field(default_factory=dict)
+    scores: Dict[int, float] = field(default_factory=dict)
+    # rung currently running (None when idle)
+    running: Optional[int] = None
+
+
+class ASHAScheduler:
+    """
+    Bookkeeping for one ASHA session.
+
+    A job is one trial on one rung; it occupies one SAM slot per case.
+    """
+
+    def __init__(
+        self,
+        candidates: pd.DataFrame,
+        horizons: List[float],
+        eta: int,
+        cases: List[str],
+        score_models,
+        force_rerun: bool = False,
+    ):
+        self.trials = [Trial(i, candidates.iloc[i]) for i in range(len(candidates))]
+        self.horizons = [float(h) for h in horizons]
+        self.eta = int(eta)
+        self.cases = list(cases)
+        self.score_models = score_models
+        self.force_rerun = force_rerun
+        self.runtime_col = CONFIG.get("surrogates", {}).get("runtime_target", RUNTIME_COLUMN_DEFAULT)
+        self.runtime_cap = float(CONFIG["runtime_limits"]["absolute_sec"])
+
+        self.n_started = 0
+        # trial idx -> rungs it has been promoted from
+        self.promoted: Dict[int, set] = {t.idx: set() for t in self.trials}
+        self.cpu_sec = 0.0
+
+    # --- scheduling ---------------------------------------------------
+
+    def _finished_on(self, rung: int) -> List[Trial]:
+        return [t for t in self.trials if rung in t.scores]
+
+    def next_job(self) -> Optional[tuple]:
+        """(trial, rung) to run next, or None if nothing can start right now."""
+        for rung in range(len(self.horizons) - 2, -1, -1):
+            done = self._finished_on(rung)
+            n_top = len(done) // self.eta
+            if n_top == 0:
+                continue
+            top = sorted(done, key=lambda t: t.scores[rung])[:n_top]
+            for t in top:
+                if np.isfinite(t.scores[rung]) and rung not in self.promoted[t.idx] and t.running is None:
+                    self.promoted[t.idx].add(rung)
+                    return t, rung + 1
+        if self.n_started < len(self.trials):
+            t = self.trials[self.n_started]
+            self.n_started += 1
+            return t, 0
+        return None
+
+    def job_items(self, trial: Trial, rung: int) -> List[Dict[str, Any]]:
+        """run_sam_cases-style items for one job (one per case)."""
+        items = []
+        for case in self.cases:
+            item = {
+                "case_name": case,
+                "template_name": f"{case}.i",
+                "hyperparams": _candidate_hyperparams(trial.row, case),
+                "timeout_sec": self.runtime_cap,
+                "force_rerun": self.force_rerun,
+                "end_time": self.horizons[rung],
+                "tag": (trial.idx, rung, case),
+            }
+            if rung > 0:
+                item["restart_from"] = trial.runs[rung - 1][case]
+            items.append(item)
+        return items
+
+    # --- results ------------------------------------------------------
+
+    def record(self, summary: Dict[str, Any]) -> Optional[Trial]:
+        """Store one finished run; returns the trial if its rung is now complete."""
+        idx, rung, case = summary["batch_tag"]
+        trial = self.trials[idx]
+        trial.runs.setdefault(rung, {})[case] = summary
+        if not summary.get("cache_hit"):
+            cost = summary.get("cpu_sec")
+            if cost is None or pd.isna(cost):
+                cost = summary.get("runtime_sec")
+            self.cpu_sec += float(cost or 0.0)
+        if len(trial.runs[rung]) < len(self.cases):
+            return None
+        trial.scores[rung] = self._rung_score(trial, rung)
+        trial.running = None
+        return trial
+
+    def _rung_score(self, trial: Trial, rung: int) -> float:
+        """Mean over cases of the combined score at this rung's horizon."""
+        horizon = self.horizons[rung]
+        full = self.horizons[-1]
+        scores = []
+        for case in self.cases:
+            obs = observation_from_run(trial.runs[rung][case], runtime_col=self.runtime_col)
+            if obs is None or pd.isna(obs[ERROR_COLUMN]) or pd.isna(obs[self.runtime_col]):
+                return np.inf
+            # runtime of the whole chain 0 -> horizon, extrapolated to the full horizon
+            rt = 0.0
+            for r in range(rung + 1):
+                prev = observation_from_run(trial.runs[r][case], runtime_col=self.runtime_col)
+                rt += float(prev[self.runtime_col]) if prev is not None else 0.0
+            rt *= full / horizon
+            err_norm, rt_norm = normalize_targets(
+                self.score_models, np.array([obs[ERROR_COLUMN]]), np.array([rt])
+            )
+            scores.append(float(_compute_scores(err_norm, rt_norm)[0]))
+        return float(np.mean(scores))
+
+    def history(self) -> pd.DataFrame:
+        """One row per started trial: features, score per horizon, last rung reached."""
+        rows = []
+        for t in self.trials[: self.n_started]:
+            rec = {c: t.row[c] for c in FEATURE_COLUMNS}
+            for rung, h in enumerate(self.horizons):
+                rec[f"score_t{h:g}"] = t.scores.get(rung, np.nan)
+            rec["last_horizon"] = self.horizons[max(t.scores)] if t.scores else np.nan
+            rows.append(rec)
+        df = pd.DataFrame(rows)
+        if df.empty:
+            return df
+        final_col = f"score_t{self.horizons[-1]:g}"
+        return df.sort_values(
+            by=["last_horizon", final_col], ascending=[False, True], na_position="last"
+        ).reset_index(drop=True)
+
+
+def _pick_candidates(n_candidates: int, cases: List[str], method, n_samples):
+    """Fit the surrogates and pick n_candidates diverse candidates (LP on EI)."""
+    X, y_err, y_rt, models = _fit_from_dataset()
+    df_pool, cs, best = _acquisition_pool(
+        models, X, y_err, y_rt, method=method, n_samples=n_samples,
+        pool_size=max(n_candidates, int(CONFIG.get("batch", {}).get("pool_size", 512))),
+    )
+    # one pool row per distinct SAM run (the pool is sorted best first)
+    run_keys = pd.Series([_run_key(row, cases[0]) for _, row in df_pool.iterrows()])
+    df_pool = df_pool[~run_keys.duplicated().to_numpy()].reset_index(drop=True)
+    df_pool = df_pool[df_pool["nodes_mult"].notna()].reset_index(drop=True)
+    picks = select_batch_local_penalization(
+        acq=df_pool["acq"].to_numpy(),
+        mu=df_pool["score"].to_numpy(),
+        sigma=df_pool["score_std"].to_numpy(),
+        coords=cs.unit_coords(df_pool),
+        best=best,
+        q=n_candidates,
+    )
+    return df_pool.iloc[picks].reset_index(drop=True), models
+
+
+def run_asha(
+    n_candidates: Optional[int] = None,
+    eta: Optional[int] = None,
+    horizons: Optional[List[float]] = None,
+    max_in_flight: Optional[int] = None,
+    cases: Optional[List[str]] = None,
+    force_rerun: bool = False,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+    rerun_analysis: Optional[bool] = None,
+) -> pd.DataFrame:
+    """
+    Run ASHA over simulated-time horizons until no job is left.
+
+    Parameters
+    ----------
+    n_candidates : int, optional
+        Candidates started on the first horizon. Default: CONFIG["asha"]["n_candidates"].
+    eta : int, optional
+        Promote the top 1/eta of each rung. Default: CONFIG["asha"]["eta"].
+    horizons : list of float, optional
+        end_time per rung, short to long; the last one should be the
+        template's own end_time. Default: CONFIG["asha"]["horizons"].
+    max_in_flight : int, optional
+        SAM runs kept running at once. Default: CONFIG["asha"]["max_in_flight"],
+        else CONFIG["parallel"]["max_workers"].
+    cases : list of str, optional
+        Cases every candidate is run on. Default: ["jsalt1"].
+    force_rerun : bool
+        Launch SAM even when a cached result exists.
+    method, n_samples : optional
+        Candidate sampling (candidates.py).
+    rerun_analysis : bool, optional
+        Re-run csv_maker.py / csv_analysis.py at the end.
+        Default: CONFIG["asha"]["rerun_analysis_at_end"].
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per started candidate: its features, the score on every
+        horizon it reached (score_t<horizon>) and the last horizon reached,
+        best candidates first.
+    """
+    cfg = CONFIG.get("asha", {})
+    n_candidates = int(n_candidates or cfg.get("n_candidates", 27))
+    eta = max(2, int(eta or cfg.get("eta", 3)))
+    horizons = sorted(float(h) for h in (horizons or cfg.get("horizons", [100, 300, 850])))
+    if max_in_flight is None:
+        max_in_flight = cfg.get("max_in_flight")
+    max_in_flight = _resolve_max_workers(max_in_flight)
+    if not cases:
+        cases = ["jsalt1"]
+    if rerun_analysis is None:
+        rerun_analysis = bool(cfg.get("rerun_analysis_at_end", True))
+    # a job needs one slot per case
+    max_jobs = max(1, max_in_flight // len(cases))
+
+    print("=== SAM Optimizer: ASHA over simulated time ===")
+    print(f"[asha] Horizons (end_time): {horizons}; n_candidates={n_candidates}; eta={eta}; "
+          f"cases={cases}; {max_jobs * len(cases)} run(s) in flight.")
+
+    candidates, models = _pick_candidates(n_candidates, cases, method, n_samples)
+    full_cost = float(candidates["pred_runtime"].sum()) * len(cases)
+    sched = ASHAScheduler(candidates, horizons, eta, cases, models, force_rerun=force_rerun)
+
+    in_flight: Dict[Future, tuple] = {}
+    n_jobs = 0
+    with ThreadPoolExecutor(max_workers=max_jobs * len(cases)) as executor:
+        while True:
+            while n_jobs < max_jobs:
+                job = sched.next_job()
+                if job is None:
+                    break
+                trial, rung = job
+                trial.running = rung
+                n_jobs += 1
+                for item in sched.job_items(trial, rung):
+                    in_flight[executor.submit(_run_batch_item, item)] = (trial.idx, rung)
+                how = f"continued from t={horizons[rung - 1]:g}" if rung else "from t=0"
+                print(f"[asha] Candidate {trial.idx} -> t={horizons[rung]:g} ({how}) "
+                      f"{_candidate_hyperparams(trial.row, cases[0])}")
+            if not in_flight:
+                break
+
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            for fut in done:
+                in_flight.pop(fut)
+                trial = sched.record(fut.result())
+                if trial is not None:
+                    n_jobs -= 1
+                    rung = max(trial.scores)
+                    print(f"[asha] Candidate {trial.idx} finished t={horizons[rung]:g}: "
+                          f"score {trial.scores[rung]:.4f} "
+                          f"({len(sched._finished_on(rung))} done on this rung)")
+
+    history = sched.history()
+    print("\n=== ASHA results (best first) ===")
+    print(history.head(10))
+    if sched.cpu_sec > 0:
+        print(
+            f"[asha] CPU time spent: {sched.cpu_sec:.1f} s "
+            f"(vs ~{full_cost:.1f} s predicted for all {len(candidates)} candidates to "
+            f"t={horizons[-1]:g}; {full_cost / sched.cpu_sec:.1f}x less)"
+        )
+
+    if rerun_analysis:
+        _rerun_analysis_scripts()
+    return history
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="ASHA over simulated time: short horizons first, continue the best from checkpoints."
+    )
+    parser.add_argument("--n-candidates", type=int, default=None,
+                        help="Candidates to start. Default: CONFIG['asha']['n_candidates'].")
+    parser.add_argument("--eta", type=int, default=None,
+                        help="Promote the top 1/eta per rung. Default: CONFIG['asha']['eta'].")
+    parser.add_argument("--horizons", type=float, nargs="+", default=None,
+                        help="end_time per rung, e.g. 100 300 850. Default: CONFIG['asha']['horizons'].")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="SAM runs kept running at once. Default: CONFIG['asha'] / CONFIG['parallel'].")
+    parser.add_argument("--cases", nargs="*", default=None,
+                        help="Case names to run (e.g. jsalt1 jsalt2). If omitted, defaults to ['jsalt1'].")
+    parser.add_argument("--force-rerun", action="store_true",
+                        help="Launch SAM even for runs that already have a cached result.")
+    parser.add_argument("--sampler", type=str, choices=["grid", "sobol", "lhs"], default=None,
+                        help="Candidate sampling method. Default: CONFIG['candidates']['method'].")
+    parser.add_argument("--n-samples", type=int, default=None,
+                        help="Number of candidates for --sampler sobol/lhs.")
+    parser.add_argument("--no-analysis", action="store_true",
+                        help="Don't re-run csv_maker.py / csv_analysis.py at the end.")
+    args = parser.parse_args()
+
+    run_asha(
+        n_candidates=args.n_candidates,
+        eta=args.eta,
+        horizons=args.horizons,
+        max_in_flight=args.max_in_flight,
+        cases=args.cases,
+        force_rerun=args.force_rerun,
+        method=args.sampler,
+        n_samples=args.n_samples,
+        rerun_analysis=False if args.no_analysis else None,
+    )
+
+
+if __name__ == "__main__":
+    main()
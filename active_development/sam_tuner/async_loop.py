@@ -0,0 +1,414 @@
+"""
+async_loop.py
+
+Asynchronous closed-loop optimizer.
+
+suggest_and_run_mode works in rounds: suggest, run N candidates, re-run
+csv_maker.py / csv_analysis.py, and only then start the next round, so
+the SAM slots sit idle while the slowest run of a round finishes. This
+loop instead keeps K runs in flight at all times:
+
+  1. Fit the surrogates on the current dataset (data_handler).
+  2. Fill K slots with the best candidates by EI * P(runtime <= cap),
+     penalized around the runs already in flight (local penalization,
+     acquisition.py), so the slots explore different regions.
+  3. Whenever a run finishes, score it directly from its output CSV
+     (data_handler.observation_from_run), add it to the training data,
+     immediately dispatch the next candidate and start a refit in the
+     background; the new surrogates are swapped in when it is done.
+
+Each candidate is run once per case; every (candidate, case) run takes
+one slot. SAM runs execute in a thread pool (run_launcher) driven by an
+asyncio event loop. Refits and proposals run as background tasks, so
+finished runs keep being collected and free slots keep being filled
+(from the current surrogates) while the forests train. A refit adds
+CONFIG["surrogate_store"]["warm_start_trees"] trees per forest
+(models.update_surrogates) and only refits from scratch past
+refit_fraction new rows or max_trees trees.
+
+Usage (from active_development):
+
+    # 24 candidates on jsalt1, 4 runs in flight:
+    python -m sam_tuner.async_loop --budget 24 --max-in-flight 4 --cases jsalt1
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import copy
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import CONFIG
+from .data_handler import FEATURE_COLUMNS, ERROR_COLUMN, RUNTIME_COLUMN_DEFAULT, observation_from_run
+from .models import _has_categorical, fit_surrogates, update_surrogates
+from .acquisition import select_batch_local_penalization
+from .run_launcher import _run_batch_item, _resolve_max_workers
+from .optimizer_loop import (
+    _fit_from_dataset,
+    _acquisition_pool,
+    _score_with_uncertainty,
+    _candidate_hyperparams,
+    _run_key,
+    _rerun_analysis_scripts,
+)
+
+
+def _grow_or_refit(models, X: pd.DataFrame, y_err: pd.Series, y_rt: pd.Series, n_full_fit: int):
+    """
+    New surrogates for the grown training data: a copy of `models` with
+    warm_start trees added (update_surrogates), or a full fit_surrogates()
+    once the data grew by more than refit_fraction since the last full fit
+    (n_full_fit rows) or the forests would exceed max_trees. The P(success)
+    classifier is carried over either way.
+
+    Returns
+    -------
+    (models, grown) : (SurrogateModels, bool)
+    """
+    cfg = CONFIG.get("surrogate_store", {})
+    n_add = int(cfg.get("warm_start_trees", 50))
+    n_trees = len(models.error_model.named_steps["rf"].estimators_)
+    can_grow = (
+        len(X) - n_full_fit <= max(1, float(cfg.get("refit_fraction", 0.25)) * n_full_fit)
+        and n_trees + n_add <= int(cfg.get("max_trees", 600))
+        and not _has_categorical(models.error_model)
+    )
+    if can_grow:
+        # the current models keep serving proposals while these trees grow
+        new = update_surrogates(copy.deepcopy(models), X, y_err, y_rt, n_new_trees=n_add)
+    else:
+        new = fit_surrogates(X, y_err, y_rt)
+        new.success_model = models.success_model
+        new.success_rate = models.success_rate
+        new.success_fingerprint = models.success_fingerprint
+    new.n_train = len(X)
+    return new, can_grow
+
+
+class AsyncOptimizer:
+    """
+    State of one asynchronous optimization session.
+
+    Holds the training data (grown by every finished run), the current
+    surrogates, the acquisition pool computed from them (recomputed after
+    each refit), the candidates already launched and the runs in flight.
+    """
+
+    def __init__(
+        self,
+        cases: List[str],
+        budget: int,
+        max_in_flight: int,
+        force_rerun: bool = False,
+        method: Optional[str] = None,
+        n_samples: Optional[int] = None,
+        refit_every: int = 1,
+    ):
+        self.cases = list(cases)
+        self.budget = int(budget)
+        self.max_in_flight = int(max_in_flight)
+        self.force_rerun = force_rerun
+        self.method = method
+        self.n_samples = n_samples
+        self.refit_every = max(1, int(refit_every))
+        self.runtime_col = CONFIG.get("surrogates", {}).get("runtime_target", RUNTIME_COLUMN_DEFAULT)
+        self.runtime_cap = float(CONFIG["runtime_limits"]["absolute_sec"])
+
+        self.X: Optional[pd.DataFrame] = None
+        self.y_err: Optional[pd.Series] = None
+        self.y_rt: Optional[pd.Series] = None
+        self.models = None
+        self._pool = None  # (df_pool, cs, best) for the current models
+        self._n_full_fit = 0  # training rows at the last full fit
+        self._refit_task: Optional[asyncio.Task] = None
+        self._fill_task: Optional[asyncio.Task] = None
+
+        self.n_proposed = 0
+        self.n_new_obs = 0
+        self.launched: Set[Tuple] = set()
+        self.ready: Deque[Tuple[pd.Series, str]] = deque()
+        self.in_flight: Dict[asyncio.Future, Tuple[pd.Series, str]] = {}
+        self.results: List[Dict[str, Any]] = []
+
+    def _candidate_key(self, row: pd.Series) -> Tuple:
+        return _run_key(row, self.cases[0])
+
+    # --- surrogates ---------------------------------------------------
+
+    def _start_refit(self) -> None:
+        """Refit on the current training data in the background (one at a time)."""
+        if self._refit_task is not None or self.n_new_obs < self.refit_every:
+            return
+        loop = asyncio.get_running_loop()
+        self.n_new_obs = 0
+        self._refit_task = asyncio.ensure_future(loop.run_in_executor(
+            None, _grow_or_refit, self.models, self.X, self.y_err, self.y_rt, self._n_full_fit,
+        ))
+
+    def _finish_refit(self) -> None:
+        """Swap in the models of a finished refit task."""
+        models, grown = self._refit_task.result()
+        self._refit_task = None
+        if not grown:
+            self._n_full_fit = models.n_train
+        self.models = models
+        self._pool = None
+
+    def _ingest(self, summary: Dict[str, Any]) -> bool:
+        """Add a finished run to the training data; True if it was usable."""
+        obs = observation_from_run(summary, runtime_col=self.runtime_col)
+        if obs is None or pd.isna(obs.get(ERROR_COLUMN)) or pd.isna(obs.get(self.runtime_col)):
+            return False
+        row = pd.DataFrame([{c: obs[c] for c in self.X.columns}])
+        self.X = pd.concat([self.X, row], ignore_index=True)
+        self.y_err = pd.concat([self.y_err, pd.Series([obs[ERROR_COLUMN]], name=self.y_err.name)],
+                               ignore_index=True)
+        self.y_rt = pd.concat([self.y_rt, pd.Series([obs[self.runtime_col]], name=self.y_rt.name)],
+                              ignore_index=True)
+        self.n_new_obs += 1
+        return True
+
+    # --- proposals ----------------------------------------------------
+
+    async def _propose(self) -> Optional[pd.Series]:
+        """Best not-yet-launched candidate, penalized around pending runs."""
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        if pool is None:
+            models, X, y_err, y_rt = self.models, self.X, self.y_err, self.y_rt
+            pool = await loop.run_in_executor(
+                None,
+                lambda: _acquisition_pool(models, X, y_err, y_rt,
+                                          method=self.method, n_samples=self.n_samples),
+            )
+            if self.models is models:  # not replaced by a refit meanwhile
+                self._pool = pool
+        df_pool, cs, best = pool
+        if df_pool.empty:
+            return None
+
+        pending = [row for row, _case in list(self.in_flight.values()) + list(self.ready)]
+        pending_kw = {}
+        if pending:
+            df_pending = pd.DataFrame(pending)[FEATURE_COLUMNS].reset_index(drop=True)
+            _, _, _, _, mu_p, sigma_p = _score_with_uncertainty(self.models, df_pending)
+            pending_kw = dict(
+                pending_coords=cs.unit_coords(df_pending), pending_mu=mu_p, pending_sigma=sigma_p,
+            )
+
+        exclude = np.array([self._candidate_key(r) in self.launched for _, r in df_pool.iterrows()])
+        picks = select_batch_local_penalization(
+            acq=df_pool["acq"].to_numpy(),
+            mu=df_pool["score"].to_numpy(),
+            sigma=df_pool["score_std"].to_numpy(),
+            coords=cs.unit_coords(df_pool),
+            best=best,
+            q=1,
+            exclude=exclude,
+            **pending_kw,
+        )
+        if not picks:
+            return None
+        row = df_pool.iloc[picks[0]]
+        self.launched.add(self._candidate_key(row))
+        return row
+
+    # --- dispatch -----------------------------------------------------
+
+    def _submit(self, executor: ThreadPoolExecutor, row: pd.Series, case: str) -> None:
+        item = {
+            "case_name": case,
+            "template_name": f"{case}.i",
+            "hyperparams": _candidate_hyperparams(row, case),
+            "timeout_sec": self.runtime_cap,
+            "force_rerun": self.force_rerun,
+        }
+        fut = asyncio.get_running_loop().run_in_executor(executor, _run_batch_item, item)
+        self.in_flight[fut] = (row, case)
+        print(
+            f"[async] Dispatched {case} {item['hyperparams']} "
+            f"(pred score {row['score']:.4f} +/- {row['score_std']:.4f}; "
+            f"{len(self.in_flight)}/{self.max_in_flight} in flight)"
+        )
+
+    async def _fill_slots(self, executor: ThreadPoolExecutor) -> None:
+        while len(self.in_flight) < self.max_in_flight:
+            if not self.ready:
+                if self.n_proposed >= self.budget:
+                    return
+                row = await self._propose()
+                if row is None:
+                    print("[async] No candidates left to propose.")
+                    self.budget = self.n_proposed
+                    return
+                self.n_proposed += 1
+                if pd.isna(row.get("nodes_mult")):
+                    print("[async] WARNING: nodes_mult is NaN for this candidate; skipping.")
+                    continue
+                self.ready.extend((row, case) for case in self.cases)
+            row, case = self.ready.popleft()
+            self._submit(executor, row, case)
+
+    def _start_fill(self, executor: ThreadPoolExecutor) -> None:
+        """Fill free slots in the background (one proposal task at a time)."""
+        if self._fill_task is not None or len(self.in_flight) >= self.max_in_flight:
+            return
+        if not self.ready and self.n_proposed >= self.budget:
+            return
+        self._fill_task = asyncio.ensure_future(self._fill_slots(executor))
+
+    async def run(self) -> List[Dict[str, Any]]:
+        self.X, self.y_err, self.y_rt, self.models = _fit_from_dataset()
+        self.X = self.X.reset_index(drop=True)
+        self.y_err = self.y_err.reset_index(drop=True)
+        self.y_rt = self.y_rt.reset_index(drop=True)
+        self._n_full_fit = len(self.X)
+        self.models.n_train = self.models.n_train or len(self.X)
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            self._start_fill(executor)
+            while self.in_flight or self._fill_task is not None:
+                waits = set(self.in_flight) | {t for t in (self._refit_task, self._fill_task) if t is not None}
+                done, _ = await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+                if self._fill_task in done:
+                    self._fill_task, task = None, self._fill_task
+                    task.result()  # re-raise proposal errors
+                if self._refit_task in done:
+                    self._finish_refit()
+                for fut in done:
+                    if fut not in self.in_flight:
+                        continue
+                    _row, case = self.in_flight.pop(fut)
+                    summary = fut.result()
+                    self.results.append(summary)
+                    used = self._ingest(summary)
+                    print(
+                        f"[async] Finished {case}: status={summary.get('status')} "
+                        f"runtime={summary.get('runtime_sec')} "
+                        f"({'added to' if used else 'not usable for'} training; "
+                        f"{len(self.results)} done, {len(self.in_flight)} in flight)"
+                    )
+                self._start_refit()
+                self._start_fill(executor)
+            if self._refit_task is not None:
+                await self._refit_task
+                self._finish_refit()
+
+        print(f"[async] Done: {len(self.results)} run(s), training set now {len(self.X)} rows.")
+        return self.results
+
+
+def run_async_optimizer(
+    budget: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    cases: Optional[List[str]] = None,
+    force_rerun: bool = False,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+    refit_every: Optional[int] = None,
+    rerun_analysis: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run the asynchronous loop until `budget` candidates have been evaluated.
+
+    Parameters
+    ----------
+    budget : int, optional
+        Number of candidates to evaluate (each on every case).
+        Default: CONFIG["async_loop"]["budget"].
+    max_in_flight : int, optional
+        SAM runs kept running at once. Default: CONFIG["async_loop"]
+        ["max_in_flight"], else CONFIG["parallel"]["max_workers"].
+    cases : list of str, optional
+        Cases to run each candidate on. Default: ["jsalt1"].
+    force_rerun : bool
+        Launch SAM even when a cached result exists.
+    method, n_samples : optional
+        Candidate sampling (candidates.py).
+    refit_every : int, optional
+        Refit the surrogates after this many new usable runs.
+        Default: CONFIG["async_loop"]["refit_every"].
+    rerun_analysis : bool, optional
+        Re-run csv_maker.py / csv_analysis.py once at the end so the new
+        runs land in validation_analysis_full.csv.
+        Default: CONFIG["async_loop"]["rerun_analysis_at_end"].
+
+    Returns
+    -------
+    list of dict
+        Run summaries in completion order.
+    """
+    cfg = CONFIG.get("async_loop", {})
+    if not cases:
+        cases = ["jsalt1"]
+    if budget is None:
+        budget = cfg.get("budget", 20)
+    if max_in_flight is None:
+        max_in_flight = cfg.get("max_in_flight")
+    max_in_flight = _resolve_max_workers(max_in_flight)
+    if refit_every is None:
+        refit_every = cfg.get("refit_every", 1)
+    if rerun_analysis is None:
+        rerun_analysis = bool(cfg.get("rerun_analysis_at_end", True))
+
+    print("=== SAM Optimizer: asynchronous closed loop ===")
+    print(f"[async] Cases: {cases}; budget: {budget} candidate(s); {max_in_flight} run(s) in flight.")
+
+    opt = AsyncOptimizer(
+        cases=cases,
+        budget=budget,
+        max_in_flight=max_in_flight,
+        force_rerun=force_rerun,
+        method=method,
+        n_samples=n_samples,
+        refit_every=refit_every,
+    )
+    results = asyncio.run(opt.run())
+
+    if rerun_analysis and results:
+        _rerun_analysis_scripts()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Asynchronous closed-loop SAM optimizer (refits as each run finishes)."
+    )
+    parser.add_argument("--budget", type=int, default=None,
+                        help="Number of candidates to evaluate. Default: CONFIG['async_loop']['budget'].")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="SAM runs kept running at once. Default: CONFIG['async_loop'] / CONFIG['parallel'].")
+    parser.add_argument("--cases", nargs="*", default=None,
+                        help="Case names to run (e.g. jsalt1 jsalt2). If omitted, defaults to ['jsalt1'].")
+    parser.add_argument("--force-rerun", action="store_true",
+                        help="Launch SAM even for candidates that already have a cached result.")
+    parser.add_argument("--sampler", type=str, choices=["grid", "sobol", "lhs"], default=None,
+                        help="Candidate sampling method. Default: CONFIG['candidates']['method'].")
+    parser.add_argument("--n-samples", type=int, default=None,
+                        help="Number of candidates for --sampler sobol/lhs.")
+    parser.add_argument("--refit-every", type=int, default=None,
+                        help="Refit the surrogates after this many new runs. Default: CONFIG['async_loop'].")
+    parser.add_argument("--no-analysis", action="store_true",
+                        help="Don't re-run csv_maker.py / csv_analysis.py at the end.")
+    args = parser.parse_args()
+
+    run_async_optimizer(
+        budget=args.budget,
+        max_in_flight=args.max_in_flight,
+        cases=args.cases,
+        force_rerun=args.force_rerun,
+        method=args.sampler,
+        n_samples=args.n_samples,
+        refit_every=args.refit_every,
+        rerun_analysis=False if args.no_analysis else None,
+    )
+
+
+if __name__ == "__main__":
+    main()
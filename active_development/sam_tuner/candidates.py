@@ -0,0 +1,281 @@
+"""
+candidates.py
+
+Candidate generation for the optimizer, one block at a time.
+
+Instead of materializing itertools.product over every feature, the
+candidate space is described per feature (CandidateSpace) and streamed in
+fixed-size blocks:
+
+  - "grid" : the full Cartesian grid (continuous ranges get n_grid points),
+             decoded block by block from flat indices with np.unravel_index,
+             so only one block is ever in memory.
+  - "sobol": scrambled Sobol' points (scipy.stats.qmc), n_samples in total.
+  - "lhs"  : Latin hypercube samples, n_samples in total.
+
+For "sobol"/"lhs" continuous ranges are sampled continuously and discrete
+sets (e.g. nodes_mult) by picking the value the coordinate falls into.
+Features without an entry in CONFIG["hyperparams_space"] are held at a
+default taken from the training data.
+
+TopK keeps the best rows seen so far, so scoring millions of candidates
+needs memory for one block plus k rows.
+"""
+
+from __future__ import annotations
+
+import warnings
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import CONFIG
+
+
+@dataclass
+class CandidateSpace:
+    """Per-feature description of the candidate space."""
+    columns: List[str]
+    # feature -> (min, max) for continuous ranges
+    ranges: Dict[str, tuple] = field(default_factory=dict)
+    # feature -> list of allowed values for discrete sets
+    choices: Dict[str, list] = field(default_factory=dict)
+    # feature -> fixed value for features we don't scan
+    fixed: Dict[str, Any] = field(default_factory=dict)
+
+    def grid_axes(self, n_grid: int) -> Dict[str, np.ndarray]:
+        """Values along each axis of the full grid (in column order)."""
+        axes = {}
+        for col in self.columns:
+            if col in self.ranges:
+                lo, hi = self.ranges[col]
+                axes[col] = np.linspace(lo, hi, n_grid)
+            elif col in self.choices:
+                axes[col] = np.asarray(self.choices[col], dtype=object)
+            else:
+                axes[col] = np.asarray([self.fixed.get(col)], dtype=object)
+        return axes
+
+    def grid_size(self, n_grid: int) -> int:
+        return int(np.prod([len(v) for v in self.grid_axes(n_grid).values()], dtype=np.int64))
+
+    def unit_coords(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Map candidate rows to [0, 1] per scanned feature (for distances).
+
+        Ranges and numeric choice sets are min-max scaled; non-numeric choice
+        sets are one-hot encoded. Fixed features are left out.
+        """
+        parts = []
+        for col in self.columns:
+            if col in self.ranges:
+                lo, hi = self.ranges[col]
+                parts.append(((df[col].to_numpy(dtype=float) - lo) / ((hi - lo) or 1.0))[:, None])
+            elif col in self.choices:
+                values = self.choices[col]
+                if all(isinstance(v, (int, float, np.number)) for v in values):
+                    lo, hi = float(min(values)), float(max(values))
+                    parts.append(((df[col].to_numpy(dtype=float) - lo) / ((hi - lo) or 1.0))[:, None])
+                else:
+                    parts.append(np.stack([(df[col] == v).to_numpy(dtype=float) for v in values], axis=1))
+        if not parts:
+            return np.zeros((len(df), 0))
+        return np.hstack(parts)
+
+
+def default_feature_values(X: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Compute a reasonable default value for each feature column based on the
+    training data. For now:
+
+      - numeric columns  -> median
+      - non-numeric cols -> mode (most frequent)
+
+    These defaults are used for features that we are NOT actively scanning
+    in the candidate grid (e.g. 'order' when we're only varying 'nodes_mult').
+    """
+    defaults: Dict[str, Any] = {}
+    for col in X.columns:
+        series = X[col]
+        if series.dtype.kind in "biufc":  # numeric types
+            defaults[col] = float(series.median())
+        else:
+            mode = series.mode()
+            defaults[col] = mode.iloc[0] if not mode.empty else None
+    return defaults
+
+
+def space_from_config(X_train: pd.DataFrame, feature_columns: Sequence[str]) -> CandidateSpace:
+    """
+    Build the CandidateSpace for `feature_columns` from CONFIG["hyperparams_space"].
+
+    Rules (as before):
+      - list/tuple of >2 elements (or a list) -> discrete set of values
+      - 2-tuple (min, max)                    -> continuous range
+      - not in hyperparams_space              -> fixed at a default from X_train
+    """
+    space = CONFIG["hyperparams_space"]
+    defaults = default_feature_values(X_train)
+    cs = CandidateSpace(columns=list(feature_columns))
+    for feat in feature_columns:
+        if feat in space:
+            val = space[feat]
+            if isinstance(val, tuple) and len(val) == 2:
+                cs.ranges[feat] = (float(val[0]), float(val[1]))
+            else:
+                cs.choices[feat] = list(val) if isinstance(val, (list, tuple)) else [val]
+        else:
+            cs.fixed[feat] = defaults.get(feat)
+    return cs
+
+
+def _block_frame(cs: CandidateSpace, data: Dict[str, np.ndarray], n: int) -> pd.DataFrame:
+    cols = {}
+    for col in cs.columns:
+        if col in data:
+            cols[col] = data[col]
+        else:
+            cols[col] = np.full(n, cs.fixed.get(col), dtype=object)
+        if cols[col].dtype == object:
+            cols[col] = pd.Series(cols[col]).infer_objects().to_numpy()
+    return pd.DataFrame(cols)
+
+
+def _iter_grid(cs: CandidateSpace, n_grid: int, block_size: int) -> Iterator[pd.DataFrame]:
+    axes = cs.grid_axes(n_grid)
+    shape = tuple(len(v) for v in axes.values())
+    total = int(np.prod(shape, dtype=np.int64))
+    for start in range(0, total, block_size):
+        flat = np.arange(start, min(start + block_size, total), dtype=np.int64)
+        idx = np.unravel_index(flat, shape)
+        data = {col: vals[i] for (col, vals), i in zip(axes.items(), idx)}
+        yield _block_frame(cs, data, len(flat))
+
+
+def _unit_sampler(method: str, dim: int, seed: Optional[int]):
+    try:
+        from scipy.stats import qmc
+    except ImportError as e:
+        raise ImportError(
+            f"Candidate sampling method {method!r} needs scipy (scipy.stats.qmc); "
+            "install scipy or use method='grid'."
+        ) from e
+    if method == "sobol":
+        return qmc.Sobol(d=dim, scramble=True, seed=seed)
+    if method == "lhs":
+        return qmc.LatinHypercube(d=dim, seed=seed)
+    raise ValueError(f"Unknown candidate sampling method: {method!r}")
+
+
+def _iter_sampled(
+    cs: CandidateSpace, method: str, n_samples: int, block_size: int, seed: Optional[int]
+) -> Iterator[pd.DataFrame]:
+    dims = [c for c in cs.columns if c in cs.ranges or c in cs.choices]
+    if not dims:
+        yield _block_frame(cs, {}, 1)
+        return
+
+    if method == "lhs":
+        # A Latin hypercube is only stratified as a whole: draw it once
+        # (n_samples x dims floats), then hand it out in blocks.
+        units = _unit_sampler(method, len(dims), seed).random(n_samples)
+        unit_blocks = (units[s:s + block_size] for s in range(0, n_samples, block_size))
+    else:
+        sampler = _unit_sampler(method, len(dims), seed)
+
+        def _sobol_blocks():
+            done = 0
+            while done < n_samples:
+                n = min(block_size, n_samples - done)
+                with warnings.catch_warnings():
+                    # balance warning for non-power-of-2 n; harmless here
+                    warnings.simplefilter("ignore", UserWarning)
+                    yield sampler.random(n)
+                done += n
+        unit_blocks = _sobol_blocks()
+
+    for u in unit_blocks:
+        data = {}
+        for j, col in enumerate(dims):
+            if col in cs.ranges:
+                lo, hi = cs.ranges[col]
+                data[col] = lo + u[:, j] * (hi - lo)
+            else:
+                values = np.asarray(cs.choices[col], dtype=object)
+                pick = np.minimum((u[:, j] * len(values)).astype(int), len(values) - 1)
+                data[col] = values[pick]
+        yield _block_frame(cs, data, len(u))
+
+
+def iter_candidate_blocks(
+    cs: CandidateSpace,
+    method: Optional[str] = None,
+    n_grid: Optional[int] = None,
+    n_samples: Optional[int] = None,
+    block_size: Optional[int] = None,
+    seed: Optional[int] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the candidate set as DataFrames of at most block_size rows.
+
+    Unset arguments come from CONFIG["candidates"].
+    """
+    cfg = CONFIG.get("candidates", {})
+    method = method or cfg.get("method", "grid")
+    n_grid = int(n_grid or cfg.get("n_grid", 5))
+    n_samples = int(n_samples or cfg.get("n_samples", 4096))
+    block_size = int(block_size or cfg.get("block_size", 8192))
+    seed = cfg.get("seed") if seed is None else seed
+
+    if method == "grid":
+        yield from _iter_grid(cs, n_grid, block_size)
+    else:
+        yield from _iter_sampled(cs, method, n_samples, block_size, seed)
+
+
+class TopK:
+    """
+    Running top-k over scored candidate blocks.
+
+    Rows are ranked feasible-first, then by column `by` (ascending: lower is
+    better, as for "score"; pass ascending=False for e.g. an acquisition
+    value). Each push() keeps only the k best of (current best + block),
+    using argpartition so the cost per block is O(block + k log k).
+    """
+
+    def __init__(self, k: int, by: str = "score", ascending: bool = True):
+        self.k = int(k)
+        self.by = by
+        self.ascending = ascending
+        self.best: Optional[pd.DataFrame] = None
+        self.n_seen = 0
+        self.n_feasible = 0
+
+    def _order(self, df: pd.DataFrame) -> np.ndarray:
+        """Positions of the k best rows of df, best first."""
+        key = df[self.by].to_numpy(dtype=float)
+        if not self.ascending:
+            key = -key
+        key = np.where(np.isnan(key), np.inf, key)
+        infeasible = ~df["feasible_runtime"].to_numpy(dtype=bool)
+
+        # The k best of each group (feasible / infeasible) is enough to
+        # find the overall k best; argpartition keeps this O(len(df)).
+        idx = []
+        for grp in (np.flatnonzero(~infeasible), np.flatnonzero(infeasible)):
+            if len(grp) > self.k:
+                grp = grp[np.argpartition(key[grp], self.k - 1)[: self.k]]
+            idx.append(grp)
+        idx = np.concatenate(idx)
+        return idx[np.lexsort((key[idx], infeasible[idx]))][: self.k]
+
+    def push(self, block: pd.DataFrame) -> None:
+        self.n_seen += len(block)
+        self.n_feasible += int(block["feasible_runtime"].sum())
+        merged = block if self.best is None else pd.concat([self.best, block], ignore_index=True)
+        self.best = merged.iloc[self._order(merged)].reset_index(drop=True)
+
+    def result(self) -> pd.DataFrame:
+        return self.best if self.best is not None else pd.DataFrame()
@@ -59,6 +59,121 @@ CONFIG = {
         "runtime": 0.3,
     },
 
+    # Candidate generation for the optimizer (candidates.py).
+    # Candidates are streamed in blocks of block_size rows through the
+    # surrogates; only the best keep_top are kept.
+    #   method "grid" : full grid, continuous ranges get n_grid points each
+    #   method "sobol": n_samples scrambled Sobol' points (needs scipy)
+    #   method "lhs"  : n_samples Latin hypercube points (needs scipy)
+    "candidates": {
+        "method": "grid",
+        "n_grid": 5,
+        "n_samples": 4096,
+        "block_size": 8192,
+        "seed": 0,
+        "keep_top": 256,
+    },
+
+    # Batch suggestions (optimizer_loop --mode suggest_batch[_and_run]).
+    #   q           : batch size; None -> parallel.max_workers
+    #   acquisition : "lp"       expected improvement with local penalization
+    #                 "thompson" one random tree per forest per pick
+    #   pool_size   : candidates with the highest EI * P(runtime <= cap)
+    #                 kept from the stream to pick the batch from
+    #   xi          : EI exploration margin (in score units)
+    "batch": {
+        "q": None,
+        "acquisition": "lp",
+        "pool_size": 512,
+        "xi": 0.0,
+        "seed": None,
+    },
+
+    # Asynchronous closed loop (async_loop.py): K runs in flight, surrogates
+    # refit as each run finishes, next candidate dispatched right away.
+    "async_loop": {
+        # candidates to evaluate per session (each on every case)
+        "budget": 20,
+        # runs kept in flight; None -> parallel.max_workers
+        "max_in_flight": None,
+        # refit after this many new usable runs
+        "refit_every": 1,
+        # re-run csv_maker.py / csv_analysis.py once when the loop ends
+        "rerun_analysis_at_end": True,
+    },
+
+    # Multi-fidelity successive halving (optimizer_loop --mode multifidelity).
+    # n_initial candidates run on the coarsest rung; the best 1/eta move on
+    # to the next (finer) nodes_mult, up to the finest rung.
+    "multifidelity": {
+        # nodes_mult per rung, coarse to fine; None -> hyperparams_space["nodes_mult"]
+        "rungs": [6, 12, 24],
+        "eta": 3,
+        "n_initial": 27,
+        # "observed": rank by the score measured on the current rung
+        # "predicted": refit with the new runs, rank by predicted score at the finest rung
+        "promote_by": "observed",
+    },
+
+    # ASHA over simulated time (asha.py): candidates start on the shortest
+    # end_time; the top 1/eta of each horizon are continued from their
+    # checkpoints to the next one.
+    "asha": {
+        # end_time per rung, short to long; the last is the templates' end_time
+        "horizons": [100, 300, 850],
+        "eta": 3,
+        "n_candidates": 27,
+        # runs kept in flight; None -> parallel.max_workers
+        "max_in_flight": None,
+        # re-run csv_maker.py / csv_analysis.py once when the scheduler ends
+        "rerun_analysis_at_end": True,
+    },
+
+    # Warm starts (run_launcher.find_warm_start): begin a run from the
+    # checkpoint of the nearest finished run with the same case, mesh and
+    # order instead of the initial condition.
+    "warm_start": {
+        "enabled": False,
+        # boundary values the neighbour distance is measured over
+        "params": ["T_c", "T_h", "h_amb"],
+        # max distance, each param scaled by its hyperparams_space range;
+        # None -> any neighbour
+        "max_distance": 0.25,
+    },
+
+    # Probability-of-success classifier (models.fit_success_classifier),
+    # trained on every logged run including fail / timeout / diverged.
+    "success_model": {
+        "enabled": True,
+        # "penalize": score += penalty * (1 - P(success))
+        # "filter"  : drop candidates with P(success) < min_prob
+        "mode": "penalize",
+        "penalty": 1.0,
+        "min_prob": 0.5,
+    },
+
+    # Persisted surrogates (models.load_or_fit_surrogates): reloaded while the
+    # training data is unchanged, grown with extra trees when rows were added.
+    "surrogate_store": {
+        "enabled": True,
+        # trees added per forest when new rows arrive (warm_start)
+        "warm_start_trees": 50,
+        # refit from scratch instead once the new rows exceed this fraction
+        # of the rows the stored forests were trained on
+        "refit_fraction": 0.25,
+        # ... or once a forest would grow beyond this many trees
+        "max_trees": 600,
+    },
+
+    # Surrogate targets (data_handler.build_basic_dataset / models.fit_surrogates)
+    "surrogates": {
+        # Cost the runtime surrogate learns:
+        #   "runtime_merged_sec" : wall time (what the runtime cap is about)
+        #   "cpu_merged_sec"     : CPU time of the SAM process; unaffected by
+        #                          other runs sharing the node
+        "runtime_target": "runtime_merged_sec",
+    },
+
     # Runtime limits
     "runtime_limits": {
         # Absolute hard cap in seconds (default: 7 minutes).
@@ -66,6 +181,139 @@ CONFIG = {
         # Optional relative cap (e.g. factor times median runtime).
         "relative_factor": 3.0,
         "enforce_relative": False,  # we'll wire this in later
+        # How often run_launcher checks a running SAM process [s]
+        "poll_sec": 2.0,
+        # Grace period after asking SAM to stop (SIGTERM) before SIGKILL [s]
+        "stop_grace_sec": 10.0,
+    },
+
+    # Steady-state early termination (run_watchers.SteadyStateWatcher).
+    # While SAM runs, the growing <input>_csv.csv is tailed; once the relative
+    # rate of change |dX/dt|/|X| [1/s] of every monitored column stays below
+    # rel_rate_tol for n_steps consecutive output steps (and time >= min_time),
+    # SAM is stopped and the run is logged as "success_steady".
+    "steady_state": {
+        "enabled": False,
+        "columns": ["TP1", "TP2", "TP3", "TP6", "TP_TS", "massFlowRate", "TS_vel"],
+        "rel_rate_tol": 1.0e-6,
+        "n_steps": 20,
+        "min_time": 100.0,
+        # |X| below this is treated as this (avoids dividing by ~0 velocities)
+        "abs_floor": 1.0e-3,
+    },
+
+    # Divergence early-kill (run_watchers.ConsoleWatcher).
+    # SAM's console output is parsed as it arrives; once one of these
+    # thresholds is crossed SAM is killed and the run is logged as "diverged"
+    # (instead of cutting dt all the way down to dtmin = 1e-7 or running
+    # into the timeout). Set a threshold to None to disable it.
+    "divergence": {
+        "enabled": True,
+        # consecutive failed solves (= dt cutbacks) without a converged step
+        "max_fail_streak": 15,
+        # dt below this after a failed solve (the base case's dtmin is 1e-7)
+        "min_dt": 1.0e-5,
+        # nonlinear iterations of a single converged time step
+        "max_nl_its": None,
+        # fraction of failed solves, checked after min_attempts solves
+        "max_failed_frac": 0.5,
+        "min_attempts": 40,
+    },
+
+    # Live monitor (python -m sam_tuner.monitor)
+    "monitor": {
+        "poll_sec": 5.0,
+        # a run directory whose SAM log hasn't grown for this long [s] is no
+        # longer shown as in flight
+        "stale_sec": 120.0,
+        # runs/hour is measured over this trailing window [s]
+        "rate_window_sec": 3600.0,
+    },
+
+    # Solver telemetry from the SAM logs (log_parser.py)
+    "log_parser": {
+        # join the per-run aggregates (log_steps, log_cutbacks, ...) into
+        # the feature table
+        "enabled": True,
+        # per-timestep table written next to each log: "npz" or "parquet"
+        # (parquet needs pyarrow)
+        "table_format": "npz",
+    },
+
+    # Local HTTP dashboard (python -m sam_tuner.dashboard)
+    "dashboard": {
+        "host": "127.0.0.1",  # "0.0.0.0" to reach it from other machines
+        "port": 8765,
+        # seconds between snapshot refreshes (the page polls at the same rate)
+        "poll_sec": 5.0,
+        # number of bins of the runtime histograms (shared by all nodes_mult)
+        "hist_bins": 20,
+    },
+
+    # Where runtime_logger keeps the run records (run_store.py).
+    #   backend "sqlite": SQLite database at paths.run_store (typed hp_*
+    #                     columns, indexed, safe with many concurrent writers)
+    #   backend "csv"   : the old append-only runtimes_master.csv
+    # With "sqlite", the CSV is only written on export
+    # (python -m sam_tuner.run_store export) unless mirror_csv is True.
+    "run_store": {
+        "backend": "sqlite",
+        # "WAL" is fastest; use "DELETE" if the store is on a network FS (NFS/Lustre)
+        "journal_mode": "WAL",
+        "busy_timeout_ms": 30000,
+        "mirror_csv": False,
+    },
+
+    # Parallel execution (run_launcher.run_sam_cases)
+    "parallel": {
+        # Max number of SAM processes running at once.
+        # None -> os.cpu_count(). SAM runs single-process here, so on a big
+        # node you can go close to the core count.
+        "max_workers": 4,
+    },
+
+    # Resumable sweeps (sweep.py, queue at paths.sweep_queue)
+    "sweep": {
+        # "sqlite": one SQLite file (one node, or POSIX locks that work
+        #           across nodes); "files": one JSON file per item, claimed
+        #           by atomic rename (shared Lustre / NFS file systems)
+        "backend": "sqlite",
+        # a running item whose worker hasn't renewed its lease for this long
+        # [s] is handed to the next worker (renewed every lease_sec / 3)
+        "lease_sec": 600.0,
+        # items orphaned this many times are marked failed
+        "max_attempts": 3,
+        # idle workers re-check the queue this often [s] while other
+        # workers still hold items
+        "poll_sec": 30.0,
+        # same meaning as in run_store ("DELETE" on network file systems)
+        "journal_mode": "WAL",
+        "busy_timeout_ms": 30000,
+    },
+
+    # Node-local scratch (run_launcher). With root set, SAM runs in
+    # <root>/<input stem>/ and only the rendered input, the last output CSV
+    # row and the SAM log's per-timestep table are copied back to
+    # paths.runs_root. Set by the multi-node worker (worker.py).
+    "scratch": {
+        "root": None,
+        # keep the scratch run directories (checkpoints for warm starts /
+        # continuations on the same node) instead of deleting them
+        "keep_run_dirs": False,
+    },
+
+    # Multi-node workers (python -m sam_tuner worker)
+    "worker": {
+        # node-local directory to run in; None -> $TMPDIR, then /tmp
+        "scratch_dir": None,
+    },
+
+    # Result cache (run_launcher): a run whose fully rendered input (plus the
+    # files it !includes and the SAM executable) matches an earlier
+    # successful run is not launched again; the stored summary + output CSV
+    # are returned instead. Pass force_rerun=True to run_sam_case to bypass.
+    "cache": {
+        "enabled": True,
     },
 
     # Paths
@@ -76,9 +324,32 @@ CONFIG = {
         # Root where analysis / outputs go
         "results_root": str(ACTIVE_DEV_ROOT / "analysis"),
 
+        # Per-run scratch directories. Each SAM run gets
+        #   <runs_root>/<concrete input stem>/
+        # holding its .i, .log, *_csv.csv and *_out_cp/ checkpoints, with the
+        # !include'd base case symlinked in from templates_dir.
+        "runs_root": str(ACTIVE_DEV_ROOT / "runs"),
+
+        # Content-addressed store of finished runs (summary.json + output CSV)
+        "run_cache_dir": str(ACTIVE_DEV_ROOT / "analysis" / "run_cache"),
+
         # Central runtime log (single source of truth for runtimes)
         "runtime_log": str(ACTIVE_DEV_ROOT / "analysis" / "runtimes_master.csv"),
 
+        # SQLite run store (CONFIG["run_store"]["backend"] == "sqlite")
+        "run_store": str(ACTIVE_DEV_ROOT / "analysis" / "runs.sqlite"),
+
+        # Incrementally maintained ML feature table (data_handler.load_feature_dataset)
+        "feature_table": str(ACTIVE_DEV_ROOT / "analysis" / "feature_table.sqlite"),
+
+        # Fitted surrogates saved between optimizer calls (models.load_or_fit_surrogates)
+        "surrogate_store": str(ACTIVE_DEV_ROOT / "analysis" / "surrogates.joblib"),
+
+        # Persistent work queue of sweep items (sweep.py): SQLite file for
+        # CONFIG["sweep"]["backend"] == "sqlite", directory for "files"
+        "sweep_queue": str(ACTIVE_DEV_ROOT / "analysis" / "sweep_queue.sqlite"),
+        "sweep_queue_dir": str(ACTIVE_DEV_ROOT / "analysis" / "sweep_queue"),
+
         # SAM executable (adjust if needed, e.g. "sam-opt-opt" or full path)
         "sam_executable": "sam-opt",
 
@@ -91,5 +362,8 @@ CONFIG = {
     "analysis": {
         # folder under analysis/analysis where results go
         "case_identifier": "temp_test_analysis",
+        # processes csv_maker reads the output CSVs with (data_handler.run_analysis);
+        # 1 = serial, 0 = one per CPU
+        "scan_workers": 1,
     },
 }
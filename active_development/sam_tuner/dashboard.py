@@ -0,0 +1,357 @@
+"""
+dashboard.py
+
+Local HTTP dashboard and JSON status endpoint for the run farm
+(standard library only: http.server + a refresh thread).
+
+Usage (from active_development):
+
+    python -m sam_tuner.dashboard                 # http://127.0.0.1:8765/
+    python -m sam_tuner.dashboard --host 0.0.0.0 --port 9000
+
+Endpoints:
+
+    GET /             HTML page that polls /api/status
+    GET /api/status   JSON snapshot: status counts and rates, runtime stats,
+                      throughput, in-flight runs with progress, sweep queue
+                      depth (and counts per sweep), runtime histograms by
+                      nodes_mult, optimizer best
+
+The snapshot is rebuilt every CONFIG["dashboard"]["poll_sec"] by one
+background thread, from the same incremental readers as monitor.py (new
+run-store rows by id / new bytes of runtimes_master.csv, tails of the
+in-flight runs' logs). Requests only serialize the latest snapshot, so any
+number of tools can poll it instead of re-parsing the logs themselves.
+"""
+
+import argparse
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .config import CONFIG
+from .monitor import (
+    ALL_STATUSES,
+    COMPLETED_STATUSES,
+    CsvLogFollower,
+    LogStats,
+    RunsRootWatcher,
+    StoreFollower,
+    _log_follower,
+    _log_location,
+)
+from .sweep import open_queue, queue_exists
+
+
+def _jsonable(obj: Any) -> Any:
+    """NaN/inf -> None and numpy scalars -> Python, recursively."""
+    if isinstance(obj, dict):
+        return {str(k): _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and not math.isfinite(obj):
+        return None
+    return obj
+
+
+def _runtime_histograms(stats: LogStats, n_bins: int) -> Dict[str, Any]:
+    """Runtime histogram per nodes_mult, all on the same bin edges."""
+    if not stats.runtimes:
+        return {"edges": [], "by_nodes_mult": {}}
+    hi = max(stats.runtimes)
+    edges = np.linspace(0.0, hi if hi > 0 else 1.0, n_bins + 1)
+    by_mesh = {}
+    for mesh in sorted(stats.runtimes_by_mesh, key=lambda m: (m == "?", 0.0 if m == "?" else float(m))):
+        vals = np.asarray(stats.runtimes_by_mesh[mesh])
+        counts, _ = np.histogram(vals, bins=edges)
+        by_mesh[mesh] = {
+            "n": int(vals.size),
+            "median": float(np.median(vals)),
+            "counts": counts.tolist(),
+        }
+    return {"edges": edges.tolist(), "by_nodes_mult": by_mesh}
+
+
+class OptimizerBest:
+    """
+    Best run so far by the optimizer's objective (weighted min-max normalized
+    error and runtime, CONFIG["objective_weights"]) over the feature dataset.
+
+    Only recomputed when the validation analysis CSV or the runtime log
+    changed since the last call.
+    """
+
+    def __init__(self):
+        self._key = None
+        self.best: Optional[Dict[str, Any]] = None
+
+    def update(self, log_key: Any) -> Optional[Dict[str, Any]]:
+        from .data_handler import (
+            ERROR_COLUMN,
+            FEATURE_COLUMNS,
+            RUNTIME_COLUMN_DEFAULT,
+            _file_signature,
+            _validation_analysis_path,
+            load_feature_dataset,
+        )
+        try:
+            val_sig = _file_signature(_validation_analysis_path())
+        except FileNotFoundError:
+            return self.best
+        key = (val_sig, log_key)
+        if key == self._key:
+            return self.best
+        self._key = key
+
+        df = load_feature_dataset()
+        runtime_col = CONFIG.get("surrogates", {}).get("runtime_target", RUNTIME_COLUMN_DEFAULT)
+        if runtime_col not in df.columns or ERROR_COLUMN not in df.columns:
+            self.best = None
+            return self.best
+        df = df.dropna(subset=[ERROR_COLUMN, runtime_col])
+        if df.empty:
+            self.best = None
+            return self.best
+
+        def _norm(s):
+            lo, hi = s.min(), s.max()
+            return (s - lo) / (hi - lo) if hi > lo else s * 0.0
+
+        weights = CONFIG["objective_weights"]
+        score = (float(weights["error"]) * _norm(df[ERROR_COLUMN])
+                 + float(weights["runtime"]) * _norm(df[runtime_col]))
+        row = df.loc[score.idxmin()]
+        self.best = {
+            "score": float(score.min()),
+            ERROR_COLUMN: float(row[ERROR_COLUMN]),
+            runtime_col: float(row[runtime_col]),
+            "features": {c: row[c] for c in FEATURE_COLUMNS if c in row.index},
+            "source_file": row.get("source_file"),
+            "n_runs_scored": int(len(df)),
+        }
+        return self.best
+
+
+class DashboardState:
+    """Latest status snapshot, rebuilt by refresh() from incremental reads."""
+
+    def __init__(self):
+        cfg = CONFIG.get("monitor", {})
+        self.follower = _log_follower()
+        self.stats = LogStats()
+        self.runs = RunsRootWatcher(Path(CONFIG["paths"]["runs_root"]),
+                                    stale_sec=float(cfg.get("stale_sec", 120.0)))
+        self.best = OptimizerBest()
+        self._lock = threading.Lock()
+        self._snapshot: Dict[str, Any] = {"status": "starting"}
+        self._n_reads = 0
+
+    def refresh(self) -> None:
+        if isinstance(self.follower, CsvLogFollower) and isinstance(_log_follower(), StoreFollower):
+            self.follower, self.stats = StoreFollower(), LogStats()  # the run store was created meanwhile
+        df, reset = self.follower.read()
+        if reset:
+            self.stats.reset()
+        self.stats.add(df)
+        if df is not None and len(df):
+            self._n_reads += 1
+        now = time.time()
+        active = self.runs.update(now, self.stats.last_end_by_input)
+
+        best = None
+        try:
+            best = self.best.update((self.stats.total, self._n_reads))
+        except Exception as e:  # a half-written analysis CSV etc.; keep serving the rest
+            print(f"[dashboard] WARNING: optimizer best not updated: {e}")
+            best = self.best.best
+
+        queue = open_queue().counts() if queue_exists() else None
+
+        snapshot = self._build(now, active, best, queue)
+        with self._lock:
+            self._snapshot = snapshot
+
+    def _build(self, now: float, active, best, queue) -> Dict[str, Any]:
+        cfg = CONFIG.get("dashboard", {})
+        stats = self.stats
+        n_completed = sum(stats.by_status.get(s, 0) for s in COMPLETED_STATUSES)
+        rates = {s: (stats.by_status.get(s, 0) / n_completed if n_completed else None)
+                 for s in COMPLETED_STATUSES}
+        runtimes = np.asarray(stats.runtimes) if stats.runtimes else None
+        return {
+            "generated_at": now,
+            "runtime_log": _log_location(),
+            "total_runs": stats.total,
+            "by_status": {s: stats.by_status.get(s, 0) for s in ALL_STATUSES},
+            "rates": rates,
+            "runtime_sec": None if runtimes is None else {
+                "min": float(runtimes.min()),
+                "median": float(np.median(runtimes)),
+                "max": float(runtimes.max()),
+            },
+            "runs_per_hour": stats.runs_per_hour(
+                now, float(CONFIG.get("monitor", {}).get("rate_window_sec", 3600.0))
+            ),
+            "cpu_sec_per_sim_sec": (stats.cpu_sim_cpu / stats.cpu_sim_time
+                                    if stats.cpu_sim_time > 0 else None),
+            "in_flight": sorted((run.progress(now) for run in active), key=lambda p: p["name"]),
+            # sweep items waiting to be claimed (sweep.py); None without a queue
+            "queue_depth": None if queue is None else sum(c["pending"] for c in queue.values()),
+            "queue": queue,
+            "runtime_histograms": _runtime_histograms(stats, int(cfg.get("hist_bins", 20))),
+            "optimizer_best": best,
+        }
+
+    def snapshot_json(self) -> bytes:
+        with self._lock:
+            snapshot = self._snapshot
+        return json.dumps(_jsonable(snapshot), default=str).encode()
+
+
+_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>SAM run farm</title>
+<style>
+ body { font-family: sans-serif; margin: 1.5em; }
+ table { border-collapse: collapse; margin-bottom: 1em; }
+ td, th { border: 1px solid #ccc; padding: 2px 8px; text-align: right; }
+ th { background: #eee; } td:first-child { text-align: left; }
+ .bar { display: inline-block; background: #4a7; height: 10px; }
+</style></head>
+<body>
+<h2>SAM run farm</h2>
+<div id="summary"></div>
+<h3>In flight</h3><div id="inflight"></div>
+<h3>Runtime histograms by nodes_mult</h3><div id="hist"></div>
+<h3>Optimizer best</h3><pre id="best"></pre>
+<script>
+function fmt(v, d) { return (v === null || v === undefined) ? "-" : (typeof v === "number" ? v.toFixed(d) : v); }
+// Run names, nodes_mult keys and statuses come from file names: escape
+// every cell; only {html: ...} cells built here from numbers are raw.
+function esc(v) {
+  return String(v).replace(/[&<>"']/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;"})[c]);
+}
+function cell(c) { return (c !== null && typeof c === "object" && "html" in c) ? c.html : esc(c); }
+function table(head, rows) {
+  return "<table><tr>" + head.map(h => "<th>" + esc(h) + "</th>").join("") + "</tr>" +
+    rows.map(r => "<tr>" + r.map(c => "<td>" + cell(c) + "</td>").join("") + "</tr>").join("") + "</table>";
+}
+async function refresh() {
+  const s = await (await fetch("api/status")).json();
+  if (s.status === "starting") return;
+  document.getElementById("summary").innerHTML =
+    table(["runs", "in flight", "queued", "runs/hour", "CPU s / sim s", "median runtime [s]"],
+          [[s.total_runs, s.in_flight.length, fmt(s.queue_depth, 0), fmt(s.runs_per_hour, 1),
+            fmt(s.cpu_sec_per_sim_sec, 3), s.runtime_sec ? fmt(s.runtime_sec.median, 1) : "-"]]) +
+    table(Object.keys(s.by_status), [Object.keys(s.by_status).map(k =>
+          s.by_status[k] + (s.rates[k] === undefined || s.rates[k] === null ? "" : " (" + (100 * s.rates[k]).toFixed(0) + "%)"))]);
+  document.getElementById("inflight").innerHTML =
+    table(["run", "sim time", "end", "%", "sim s / wall s", "dt", "failed", "elapsed [s]", "ETA [s]"],
+          s.in_flight.map(p => [p.name, fmt(p.sim_time, 1), fmt(p.end_time, 0),
+            p.fraction === null ? "-" : (100 * p.fraction).toFixed(1), fmt(p.sim_rate, 2),
+            fmt(p.dt, 3), p.failed, fmt(p.elapsed, 0), fmt(p.eta, 0)]));
+  const h = s.runtime_histograms, edges = h.edges;
+  document.getElementById("hist").innerHTML = Object.keys(h.by_nodes_mult).map(m => {
+    const b = h.by_nodes_mult[m], top = Math.max(1, ...b.counts);
+    return "<b>nodes_mult " + esc(m) + "</b> (n=" + esc(b.n) + ", median " + b.median.toFixed(1) + " s)" +
+      table(["runtime [s]", "runs"], b.counts.map((c, i) => [edges[i].toFixed(0) + "-" + edges[i + 1].toFixed(0),
+        {html: "<span class='bar' style='width:" + (200 * Number(c) / top) + "px'></span> " + esc(c)}]));
+  }).join("");
+  document.getElementById("best").textContent = JSON.stringify(s.optimizer_best, null, 2);
+}
+refresh(); setInterval(refresh, POLL_MS);
+</script></body></html>
+"""
+
+
+def _make_handler(state: DashboardState, poll_sec: float):
+    page = _PAGE.replace("POLL_MS", str(int(1000 * poll_sec))).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].rstrip("/") or "/"
+            if path == "/api/status":
+                self._send(200, "application/json", state.snapshot_json())
+            elif path in ("/", "/index.html"):
+                self._send(200, "text/html; charset=utf-8", page)
+            else:
+                self._send(404, "application/json", b'{"error": "not found"}')
+
+        def _send(self, code: int, content_type: str, body: bytes) -> None:
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # keep the console quiet
+            pass
+
+    return Handler
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None,
+          poll_sec: Optional[float] = None) -> None:
+    """
+    Run the dashboard until interrupted.
+
+    Parameters
+    ----------
+    host, port : str, int
+        Address to bind; default CONFIG["dashboard"]["host"] / ["port"].
+    poll_sec : float
+        Seconds between snapshot refreshes; default CONFIG["dashboard"]["poll_sec"].
+    """
+    cfg = CONFIG.get("dashboard", {})
+    host = host or cfg.get("host", "127.0.0.1")
+    port = int(port if port is not None else cfg.get("port", 8765))
+    poll_sec = float(poll_sec if poll_sec is not None else cfg.get("poll_sec", 5.0))
+
+    state = DashboardState()
+    state.refresh()
+    stop = threading.Event()
+
+    def _refresh_loop():
+        while not stop.wait(poll_sec):
+            try:
+                state.refresh()
+            except Exception as e:
+                print(f"[dashboard] WARNING: refresh failed: {e}")
+
+    refresher = threading.Thread(target=_refresh_loop, daemon=True)
+    refresher.start()
+
+    server = ThreadingHTTPServer((host, port), _make_handler(state, poll_sec))
+    print(f"[dashboard] Serving on http://{host}:{server.server_port}/ "
+          f"(JSON: /api/status, refresh every {poll_sec:g} s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n[dashboard] Stopped by user.")
+    finally:
+        stop.set()
+        server.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local HTTP dashboard for SAM runs.")
+    parser.add_argument("--host", type=str, default=None,
+                        help="Address to bind (default: CONFIG['dashboard']['host']).")
+    parser.add_argument("--port", type=int, default=None,
+                        help="Port (default: CONFIG['dashboard']['port']).")
+    parser.add_argument("--poll-sec", type=float, default=None,
+                        help="Seconds between refreshes (default: CONFIG['dashboard']['poll_sec']).")
+    args = parser.parse_args()
+    serve(host=args.host, port=args.port, poll_sec=args.poll_sec)
+
+
+if __name__ == "__main__":
+    main()
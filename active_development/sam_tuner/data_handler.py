@@ -5,11 +5,14 @@ Utilities to build an ML-ready dataset for the SAM optimizer.
 
 This module is responsible for:
   - Loading the validation analysis CSV produced by csv_analysis.py
-    (typically 'validation_analysis_full.csv').
-  - Loading the centralized runtime log 'runtimes_master.csv'.
+    (typically 'validation_analysis_full.csv'), or running csv_maker /
+    csv_analysis in-process (run_analysis) and using their table directly.
+  - Loading the centralized runtime log (run store / 'runtimes_master.csv').
   - Building a combined DataFrame with:
       * features (hyperparameters, metadata)
       * targets (error metrics, runtime)
+  - Keeping that DataFrame in a persisted feature table that is updated
+    incrementally (only runs logged since the last build are processed).
 
 For now, we keep this simple and opinionated:
 
@@ -32,12 +35,21 @@ You can adapt FEATURE_COLUMNS and TARGET_COLUMNS below once you inspect
 your actual 'validation_analysis_full.csv' content.
 """
 
+from contextlib import closing
 from pathlib import Path
-from typing import Tuple, Optional, List
-import json  
+from typing import Dict, Tuple, Optional, List
+import hashlib
+import json
+import sqlite3
+import sys
+import numpy as np
 import pandas as pd
 
 from .config import CONFIG
+from .runtime_logger import SUCCESS_STATUSES
+from . import run_store
+from .run_store import read_runtime_log
+from .log_parser import LOG_FEATURES, log_features
 
 
 # === CONFIG-LIKE CONSTANTS (tweak here as you learn the CSV schema) ========
@@ -61,15 +73,30 @@ FEATURE_COLUMNS: List[str] = [
     # "order",  # we'll add 'order' later when the analysis CSV actually has 1/2 here
 ]
 
-# Default file name for the full validation analysis CSV.
-VALIDATION_ANALYSIS_FILENAME = "validation_analysis_full.csv"
-
-# Names of the default target columns in the validation analysis CSV.
-ERROR_COLUMN = "rmse_K"                 # main accuracy metric
-RUNTIME_COLUMN_DEFAULT = "runtime_merged_sec"  # runtime from merged log
-
-# Minimal feature set:
-
+# Per-run resource usage logged by run_launcher (runtime-log column ->
+# merged column). Like runtime_sec they are medians over successful runs per
+# input file, and can be used as targets (e.g. runtime_col="cpu_merged_sec",
+# which doesn't grow when the node is oversubscribed) or as features.
+RESOURCE_COLUMNS = {
+    "cpu_sec": "cpu_merged_sec",
+    "cpu_user_sec": "cpu_user_merged_sec",
+    "cpu_sys_sec": "cpu_sys_merged_sec",
+    "max_rss_mb": "max_rss_merged_mb",
+    "io_read_blocks": "io_read_merged_blocks",
+    "io_write_blocks": "io_write_merged_blocks",
+    "ctx_switches_invol": "ctx_switches_invol_merged",
+}
+
+# Solver telemetry parsed from each run's SAM log (log_parser.LOG_FEATURES:
+# log_steps, log_cutbacks, log_nl_its_mean, log_dt_min, log_peak_mem_mb,
+# ...), joined per input file from its latest run. Like the resource
+# columns they describe a finished run, so they can be used as targets or
+# as features of models that see the run's log (CONFIG["log_parser"]).
+LOG_FEATURE_COLUMNS = LOG_FEATURES
+
+# Bump when the layout of the persisted feature table changes; an older
+# table is then rebuilt from scratch on the next call.
+FEATURE_TABLE_VERSION = 2
 
 # === PATH HELPERS ==========================================================
 
@@ -114,6 +141,67 @@ def _runtime_log_path() -> Path:
     return Path(CONFIG["paths"]["runtime_log"]).resolve()
 
 
+# === ANALYSIS SCRIPTS (in-process) =========================================
+
+def _analysis_modules():
+    """
+    Import csv_maker and csv_analysis from the results root (they are plain
+    scripts, not part of this package).
+    """
+    root = str(_results_root())
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    import csv_maker
+    import csv_analysis
+    return csv_maker, csv_analysis
+
+
+def run_analysis(write: bool = True, plots: Optional[bool] = None) -> pd.DataFrame:
+    """
+    Run csv_maker and csv_analysis in this process, the way
+    `python csv_maker.py && python csv_analysis.py` inside the results root
+    does, and return the validation analysis table.
+
+    The case reports go from csv_maker to csv_analysis in memory instead of
+    through case_report.csv.
+
+    Parameters
+    ----------
+    write : bool
+        Still write the usual CSVs (case reports, validation_analysis_*.csv),
+        for the CLI tools and later sessions that read them.
+    plots : bool or None
+        Make csv_analysis's plots. None -> its own make_plots setting.
+
+    Returns
+    -------
+    pd.DataFrame
+        Same content as validation_analysis_full.csv; can be passed to
+        build_basic_dataset(validation_df=...).
+    """
+    csv_maker, csv_analysis = _analysis_modules()
+    root = _results_root()
+
+    reports = csv_maker.make_case_reports(
+        base_dir=root,
+        write=write,
+        workers=CONFIG.get("analysis", {}).get("scan_workers", 1),
+    )
+    results = csv_analysis.run_analysis(
+        case_csvs=[root / p for p in csv_analysis.csv_cases],
+        exp_csv=CONFIG["paths"]["validation_data"],
+        out_dir=root / "analysis",
+        case_frames=reports,
+        write=write,
+        plots=csv_analysis.make_plots if plots is None else plots,
+        runtime_log_path=CONFIG["paths"]["runtime_log"],
+        run_store_path=CONFIG["paths"]["run_store"],
+    )
+    df = results["full"]
+    print(f"[data_handler] Validation analysis rebuilt in-process: {df.shape}")
+    return df
+
+
 # === LOADERS ===============================================================
 
 def load_validation_analysis() -> pd.DataFrame:
@@ -135,23 +223,47 @@ def load_validation_analysis() -> pd.DataFrame:
 
 def load_runtime_log() -> Optional[pd.DataFrame]:
     """
-    Load the centralized runtime log (runtimes_master.csv) if it exists.
+    Load the centralized runtime log (SQLite run store or runtimes_master.csv,
+    see CONFIG["run_store"]) if it exists.
+
+    Rows from the run store already carry 'input_basename' and typed hp_*
+    hyperparameter columns.
 
     Returns
     -------
     pd.DataFrame or None
-        The runtime log, or None if the file does not exist yet.
+        The runtime log, or None if there is none yet.
     """
-    path = _runtime_log_path()
-    if not path.exists():
-        print(f"[data_handler] No runtime log found at: {path}")
+    df = read_runtime_log()
+    if df is None:
+        print(f"[data_handler] No runtime log found at: {_runtime_log_path()}")
         return None
-    df = pd.read_csv(path)
-    print(f"[data_handler] Loaded runtime log from: {path}")
+    print(f"[data_handler] Loaded runtime log ({len(df)} runs)")
     print(f"[data_handler] Runtime log shape: {df.shape}")
     return df
 
 
+def hyperparams_from_runtime_log(rt: pd.DataFrame) -> pd.DataFrame:
+    """
+    Per-run hyperparameter columns (without the hp_ prefix) for a runtime log.
+
+    Uses the typed hp_* columns when the log came from the run store;
+    otherwise decodes 'hyperparams_json' row by row.
+    """
+    hp_cols = [c for c in rt.columns if c.startswith("hp_")]
+    if hp_cols:
+        return rt[hp_cols].rename(columns=lambda c: c[len("hp_"):])
+
+    def _parse_hp(s) -> dict:
+        try:
+            return json.loads(s)
+        except Exception:
+            return {}
+
+    hp_dicts = rt["hyperparams_json"].apply(_parse_hp)
+    return pd.json_normalize(hp_dicts.tolist()).set_index(rt.index)
+
+
 # === RUNTIME MERGE HELPERS =================================================
 
 def _derive_input_basename_from_source_file(source_file: str) -> str:
@@ -177,191 +289,269 @@ def _derive_input_basename_from_source_file(source_file: str) -> str:
     else:
         base = s
     return base + ".i"
-def _merge_runtime_from_log(df_val: pd.DataFrame) -> pd.DataFrame:
+
+
+def _aggregate_run_features(rt: pd.DataFrame) -> pd.DataFrame:
     """
-    Merge runtime information from runtimes_master.csv into the validation DataFrame.
+    Collapse runtime-log rows into one row of run features per input file.
 
-    We:
-      - compute 'input_basename' from 'source_file' in df_val
-      - compute 'input_basename' from sam_input_path in runtimes_master
-      - group runtimes by input_basename:
-          * median runtime_sec -> runtime_merged_sec
-          * first hp_* values (e.g. hp_h_amb, hp_T_c, etc.)
-      - left-merge onto df_val
+    Per input_basename:
+      - runtime_merged_sec and the RESOURCE_COLUMNS: medians over the
+        successful runs (over all runs if none of them succeeded)
+      - cpu_util_merged = cpu_merged_sec / runtime_merged_sec (if logged)
+      - hp_<name>: hyperparameters (first run; each .i has one set)
+      - log_*: solver telemetry from the latest run's SAM log
+        (log_parser; CONFIG["log_parser"]["enabled"])
+      - n_runs: number of logged runs
 
     Returns
     -------
     pd.DataFrame
-        The validation DataFrame with:
-          - 'runtime_merged_sec'
-          - 'h_amb' (if present in hyperparams_json)
-          - possibly other IC/BC columns (T_c, T_h, T_0, ...)
+        One row per input_basename.
     """
-    df = df_val.copy()
+    rt = rt.copy()
+    if "input_basename" not in rt.columns or rt["input_basename"].isna().any():
+        rt["input_basename"] = rt["sam_input_path"].astype(str).map(lambda p: Path(p).name)
+    key = rt["input_basename"]
 
-    if "source_file" not in df.columns:
-        print("[data_handler] WARNING: 'source_file' column missing in validation data; "
-              "cannot merge runtime. Creating runtime_merged_sec as NaN.")
-        df["runtime_merged_sec"] = pd.NA
-        return df
-
-    runtime_df = _load_runtime_log_with_hyperparams()
-    if runtime_df is None:
-        df["runtime_merged_sec"] = pd.NA
-        return df
-
-    # Derive input_basename in runtime log
-    runtime_df = runtime_df.copy()
-    runtime_df["input_basename"] = runtime_df["sam_input_path"].astype(str).map(
-        lambda p: Path(p).name
+    value_cols = ["runtime_sec"] + [c for c in RESOURCE_COLUMNS if c in rt.columns]
+    values = rt[value_cols].apply(pd.to_numeric, errors="coerce")
+    if "status" in rt.columns:
+        ok = rt["status"].isin(SUCCESS_STATUSES)
+        use = ok | ~ok.groupby(key).transform("any")
+    else:
+        use = pd.Series(True, index=rt.index)
+    features = (
+        values[use].groupby(key[use]).median()
+        .rename(columns={"runtime_sec": "runtime_merged_sec", **RESOURCE_COLUMNS})
     )
+    if "cpu_merged_sec" in features.columns:
+        features["cpu_util_merged"] = features["cpu_merged_sec"] / features["runtime_merged_sec"]
+
+    if "hyperparams_json" in rt.columns or any(c.startswith("hp_") for c in rt.columns):
+        hp = hyperparams_from_runtime_log(rt).add_prefix("hp_")
+        features = features.join(hp.groupby(key).first(), how="outer")
+    if CONFIG.get("log_parser", {}).get("enabled", True) and "sam_input_path" in rt.columns:
+        last_input = rt["sam_input_path"].groupby(key).last().dropna()
+        logs = {k: Path(str(p)).with_suffix(".log") for k, p in last_input.items()}
+        features = features.join(log_features(logs), how="left")
+    features["n_runs"] = key.value_counts()
+
+    features.index.name = "input_basename"
+    return features.reset_index()
+
+
+def _join_run_features(
+    df_val: pd.DataFrame,
+    run_features: pd.DataFrame,
+    merge_runtime: bool = True,
+    merge_hyperparams: bool = True,
+) -> pd.DataFrame:
+    """
+    Keyed left join of per-input-file run features onto the validation rows.
 
-    # Build aggregation dict
-    agg_dict = {"runtime_sec": "median"}
-    # For hyperparameter columns, take the first value (we assume each .i has consistent hyperparams)
-    for col in runtime_df.columns:
-        if col.startswith("hp_"):
-            agg_dict[col] = "first"
+    Hyperparameters are exposed without their hp_ prefix (h_amb, T_0, T_c,
+    T_h, node_multiplier, order, ...). Where the validation table already
+    has a column of the same name (e.g. runtime_merged_sec written by
+    csv_analysis.py), the value from the runtime log wins and the
+    validation value only fills gaps.
+    """
+    df = df_val.copy()
+    if "input_basename" not in df.columns:
+        if "source_file" not in df.columns:
+            print("[data_handler] WARNING: 'source_file' column missing in validation data; "
+                  "cannot merge runtime / hyperparameters.")
+            return df
+        df["input_basename"] = df["source_file"].astype(str).map(
+            _derive_input_basename_from_source_file
+        )
 
-    grouped = runtime_df.groupby("input_basename", as_index=False).agg(agg_dict)
-    grouped = grouped.rename(columns={"runtime_sec": "runtime_merged_sec"})
+    rf = run_features.set_index("input_basename")
+    hp_cols = [c for c in rf.columns if c.startswith("hp_")]
+    keep = []
+    if merge_runtime:
+        keep += [c for c in rf.columns if c not in hp_cols]
+    if merge_hyperparams:
+        keep += hp_cols
+    rf = rf[keep].rename(columns=lambda c: c[len("hp_"):] if c.startswith("hp_") else c)
+    rf = rf.loc[:, ~rf.columns.duplicated()]
+
+    overlap = [c for c in rf.columns if c in df.columns]
+    df = df.join(rf, on="input_basename", rsuffix="__run")
+    for col in overlap:
+        df[col] = df.pop(f"{col}__run").combine_first(df[col])
+    return df
 
-    # Map validation source_file -> input_basename
-    df["input_basename"] = df["source_file"].astype(str).map(
-        _derive_input_basename_from_source_file
-    )
 
-    # Merge in runtime + hp_* columns
-    df = df.merge(grouped, on="input_basename", how="left")
+# === INCREMENTAL FEATURE TABLE =============================================
+#
+# Rebuilding the dataset means re-reading the whole runtime log, decoding
+# every row's hyperparameters and re-aggregating. Instead we persist the
+# per-input-file run features (and the joined dataset) in a small SQLite
+# file, CONFIG["paths"]["feature_table"], together with high-water marks:
+#
+#   runs_hwm        : last run-store row id folded into run_features
+#                     (CSV backend: mtime/size of runtimes_master.csv)
+#   validation_sig  : mtime/size of validation_analysis_full.csv
+#                     (content hash when the table is passed in memory)
+#
+# On each call only runs newer than runs_hwm are read; just the input files
+# they touch are re-aggregated (an indexed lookup in the run store) and
+# replaced in run_features. The dataset is then re-joined on input_basename.
 
-    # Convenience: if hp_h_amb exists, expose it as 'h_amb'
-    if "hp_h_amb" in df.columns and "h_amb" not in df.columns:
-        df["h_amb"] = df["hp_h_amb"]
+def _feature_table_path() -> Path:
+    return Path(CONFIG["paths"]["feature_table"]).resolve()
 
-    # (Optional) same idea for T_c, T_h, T_0 if you want:
-    for hp_name, out_name in [
-        ("hp_T_c", "T_c"),
-        ("hp_T_h", "T_h"),
-        ("hp_T_0", "T_0"),
-        ("hp_node_multiplier", "node_multiplier_hp"),
-    ]:
-        if hp_name in df.columns and out_name not in df.columns:
-            df[out_name] = df[hp_name]
 
-    return df
+def _file_signature(path: Path) -> str:
+    st = path.stat()
+    return f"{st.st_mtime_ns}:{st.st_size}"
 
-def _merge_runtime_from_log(df_val: pd.DataFrame) -> pd.DataFrame:
-    """
-    Merge runtime information from runtimes_master.csv into the validation DataFrame.
 
-    We:
-      - compute 'input_basename' from 'source_file' in df_val
-      - compute 'input_basename' from sam_input_path in runtimes_master
-      - group runtimes by input_basename (taking median runtime_sec over successes)
-      - left-merge onto df_val as 'runtime_merged_sec'
+def _frame_signature(df: pd.DataFrame) -> str:
+    h = hashlib.sha1(",".join(map(str, df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return f"frame:{h.hexdigest()}"
 
-    Returns
-    -------
-    pd.DataFrame
-        The validation DataFrame with an extra 'runtime_merged_sec' column (may have NaNs).
-    """
-    rt = load_runtime_log()
-    if rt is None:
-        print("[data_handler] No runtime log available; skipping runtime merge.")
-        df_val["runtime_merged_sec"] = pd.NA
-        return df_val
 
-    # Derive basename from sam_input_path
-    rt = rt.copy()
-    rt["input_basename"] = rt["sam_input_path"].astype(str).map(
-        lambda p: Path(p).name
-    )
+def _read_meta(conn: sqlite3.Connection) -> dict:
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    return dict(conn.execute("SELECT key, value FROM meta").fetchall())
 
-    # Prefer successful runs; if none, fall back to all
-    if "status" in rt.columns:
-        rt_success = rt[rt["status"] == "success"]
-        if rt_success.empty:
-            rt_success = rt
-    else:
-        rt_success = rt
 
-    # Aggregate: median runtime_sec per input_basename
-    grouped = (
-        rt_success.groupby("input_basename", as_index=False)["runtime_sec"]
-        .median()
-        .rename(columns={"runtime_sec": "runtime_merged_sec"})
+def _write_meta(conn: sqlite3.Connection, **values) -> None:
+    conn.executemany(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+        [(k, str(v)) for k, v in values.items()],
     )
 
-    print("[data_handler] Runtime aggregation by input_basename:")
-    print(grouped.head())
 
-    df = df_val.copy()
-    if "source_file" not in df.columns:
-        print("[data_handler] WARNING: 'source_file' column missing in validation data; "
-              "cannot merge runtime. Creating runtime_merged_sec as NaN.")
-        df["runtime_merged_sec"] = pd.NA
-        return df
-
-    df["input_basename"] = df["source_file"].astype(str).map(
-        _derive_input_basename_from_source_file
-    )
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)
+    ).fetchone() is not None
 
-    df = df.merge(grouped, on="input_basename", how="left")
-    return df
 
-# === Hyperparameter HELPERS =================================================
-def _build_hyperparam_table_from_runtime() -> Optional[pd.DataFrame]:
+def _update_run_features(conn: sqlite3.Connection, meta: dict) -> Tuple[str, bool]:
     """
-    Build a table of hyperparameters per input_basename by parsing
-    'hyperparams_json' from runtimes_master.csv.
-
-    Returns
-    -------
-    pd.DataFrame or None
+    Bring the run_features table up to date with the runtime log.
 
-    Columns will include:
-      - 'input_basename'
-      - any keys found in hyperparams_json (e.g., T_c, T_h, T_0, h_amb, node_multiplier, order)
+    Returns (new runs_hwm, changed?).
     """
-    rt = load_runtime_log()
-    if rt is None:
-        print("[data_handler] No runtime log available; skipping hyperparam merge.")
-        return None
-
-    if "hyperparams_json" not in rt.columns:
-        print("[data_handler] 'hyperparams_json' column missing in runtime log; "
-              "cannot build hyperparam table.")
-        return None
-
-    df = rt[["sam_input_path", "hyperparams_json"]].dropna().copy()
-    if df.empty:
-        print("[data_handler] Runtime log has no rows with hyperparams_json; "
-              "skipping hyperparam merge.")
-        return None
-
-    # Derive input_basename from sam_input_path
-    df["input_basename"] = df["sam_input_path"].astype(str).apply(
-        lambda s: Path(s).name
-    )
-
-    # Parse hyperparams_json into columns
-    def _parse_hp(s: str) -> dict:
-        try:
-            return json.loads(s)
-        except Exception:
-            return {}
+    use_store = CONFIG.get("run_store", {}).get("backend", "csv") == "sqlite" and run_store.store_exists()
+    have_table = _table_exists(conn, "run_features")
+
+    if use_store:
+        hwm = meta.get("runs_hwm", "")
+        since = int(hwm) if hwm.isdigit() and have_table else 0
+        new = run_store.read_runs(since_id=since, columns=["input_basename"], with_id=True)
+        if new.empty:
+            return str(since), False
+        new_hwm = str(int(new["id"].max()))
+        if since == 0:
+            rt = run_store.read_runs()
+        else:
+            rt = run_store.read_runs(input_basenames=sorted(new["input_basename"].dropna().unique()))
+        print(f"[data_handler] Feature table: {len(new)} new run(s) touching "
+              f"{new['input_basename'].nunique()} input file(s).")
+    else:
+        csv_path = _runtime_log_path()
+        if not csv_path.exists():
+            return meta.get("runs_hwm", ""), False
+        new_hwm = "csv:" + _file_signature(csv_path)
+        if have_table and meta.get("runs_hwm") == new_hwm:
+            return new_hwm, False
+        since = 0
+        rt = pd.read_csv(csv_path)
+        print(f"[data_handler] Feature table: runtime log changed; re-aggregating {len(rt)} run(s).")
+
+    fresh = _aggregate_run_features(rt)
+    if since == 0 or not have_table:
+        fresh.to_sql("run_features", conn, if_exists="replace", index=False)
+    else:
+        old = pd.read_sql_query("SELECT * FROM run_features", conn)
+        if set(fresh.columns) <= set(old.columns):
+            keys = fresh["input_basename"].tolist()
+            conn.executemany("DELETE FROM run_features WHERE input_basename = ?", [(k,) for k in keys])
+            fresh.to_sql("run_features", conn, if_exists="append", index=False)
+        else:
+            # New columns (e.g. a new hyperparameter): rewrite the small table
+            merged = pd.concat(
+                [old[~old["input_basename"].isin(fresh["input_basename"])], fresh],
+                ignore_index=True,
+            )
+            merged.to_sql("run_features", conn, if_exists="replace", index=False)
+    return new_hwm, True
 
-    hp_dicts = df["hyperparams_json"].apply(_parse_hp)
-    hp_df = pd.json_normalize(hp_dicts)
 
-    # Combine and deduplicate by input_basename
-    df_hp = pd.concat([df[["input_basename"]], hp_df], axis=1)
-    df_hp = df_hp.groupby("input_basename", as_index=False).first()
+def load_feature_dataset(
+    merge_runtime: bool = True,
+    merge_hyperparams: bool = True,
+    rebuild: bool = False,
+    validation_df: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """
+    Validation rows joined with per-input-file run features, maintained
+    incrementally in CONFIG["paths"]["feature_table"] (see above).
 
-    print("[data_handler] Hyperparam table built from runtime log:")
-    print(df_hp.head())
+    Parameters
+    ----------
+    merge_runtime, merge_hyperparams : bool
+        Which run features to join (as in build_basic_dataset).
+    rebuild : bool
+        Drop the persisted tables and rebuild from scratch.
+    validation_df : pd.DataFrame, optional
+        Validation analysis table already in memory (run_analysis); used
+        instead of reading validation_analysis_full.csv.
 
-    return df_hp
+    Returns
+    -------
+    pd.DataFrame
+        Same columns as the full in-memory rebuild
+        (build_basic_dataset(..., incremental=False)).
+    """
+    path = _feature_table_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if validation_df is not None:
+        val_sig = _frame_signature(validation_df)
+    else:
+        val_sig = _file_signature(_validation_analysis_path())
+    dataset_key = f"{int(merge_runtime)}{int(merge_hyperparams)}"
+
+    with closing(sqlite3.connect(str(path), timeout=60.0)) as conn:
+        with conn:  # one transaction: readers never see a half-updated table
+            meta = _read_meta(conn)
+            if rebuild or meta.get("version") != str(FEATURE_TABLE_VERSION):
+                for table in ("run_features", "dataset"):
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute("DELETE FROM meta")
+                meta = {}
+
+            runs_hwm, runs_changed = _update_run_features(conn, meta)
+
+            dataset_sig = f"{val_sig}|{runs_hwm}|{dataset_key}"
+            if (not runs_changed and meta.get("dataset_sig") == dataset_sig
+                    and _table_exists(conn, "dataset")):
+                df = pd.read_sql_query("SELECT * FROM dataset", conn)
+                print(f"[data_handler] Feature table up to date ({len(df)} rows): {path}")
+                return df
+
+            df_val = validation_df if validation_df is not None else load_validation_analysis()
+            if _table_exists(conn, "run_features"):
+                run_features = pd.read_sql_query("SELECT * FROM run_features", conn)
+                df = _join_run_features(df_val, run_features, merge_runtime, merge_hyperparams)
+            else:
+                df = df_val
+            df.to_sql("dataset", conn, if_exists="replace", index=False)
+            _write_meta(
+                conn,
+                version=FEATURE_TABLE_VERSION,
+                runs_hwm=runs_hwm,
+                validation_sig=val_sig,
+                dataset_sig=dataset_sig,
+            )
+    print(f"[data_handler] Feature table updated ({len(df)} rows): {path}")
+    return df
 
 
 # === DATASET BUILDER =======================================================
@@ -373,6 +563,8 @@ def build_basic_dataset(
     drop_na_targets: bool = True,
     merge_runtime: bool = True, 
     merge_hyperparams: bool = True,
+    incremental: bool = True,
+    validation_df: Optional[pd.DataFrame] = None,
 ) -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
     """
     Build a basic (X, y_error, y_runtime) dataset from validation_analysis_full.csv
@@ -389,49 +581,36 @@ def build_basic_dataset(
     drop_na_targets : bool
         If True, drop rows where either error_col or runtime_col is NaN.
     merge_runtime : bool
-        If True, call _merge_runtime_from_log to bring in runtime_merged_sec
-        and h_amb from runtimes_master.csv.
+        If True, bring in runtime_merged_sec (and the resource-usage
+        columns) from the runtime log.
+    merge_hyperparams : bool
+        If True, bring in the hyperparameters (h_amb, T_0, ...) from the
+        runtime log.
+    incremental : bool
+        If True (default), use the persisted feature table
+        (load_feature_dataset), which only processes runs logged since the
+        last build. If False, rebuild everything in memory.
+    validation_df : pd.DataFrame, optional
+        Validation analysis table already in memory (e.g. returned by
+        run_analysis). None -> read validation_analysis_full.csv.
 
     Returns
     -------
     (X, y_error, y_runtime) : (pd.DataFrame, pd.Series, pd.Series)
     """
-    df = load_validation_analysis()
-
-    # Optionally merge hyperparameters parsed from runtimes_master.csv
-    if merge_hyperparams:
-        hp_table = _build_hyperparam_table_from_runtime()
-        if hp_table is not None:
-            # Make sure we have input_basename to join on.
-            if "input_basename" not in df.columns:
-                # Rebuild the same input_basename used in csv_analysis
-                def _derive_input_basename(source_file: str) -> str:
-                    s = str(source_file)
-                    if s.endswith("_csv.csv"):
-                        base = s[:-len("_csv.csv")]
-                    elif s.endswith(".csv"):
-                        base = s[:-len(".csv")]
-                    else:
-                        base = s
-                    return base + ".i"
-
-                if "source_file" not in df.columns:
-                    print("[data_handler] No 'input_basename' or 'source_file' in "
-                          "validation_analysis_full.csv; cannot merge hyperparams.")
-                else:
-                    df = df.copy()
-                    df["input_basename"] = df["source_file"].astype(str).map(
-                        _derive_input_basename
-                    )
-
-            if "input_basename" in df.columns:
-                df = df.merge(hp_table, on="input_basename", how="left")
-        else:
-            print("[data_handler] Hyperparam table not available; "
-                  "proceeding without hyperparam features.")
-
-    if merge_runtime:
-        df = _merge_runtime_from_log(df)
+    if incremental:
+        df = load_feature_dataset(merge_runtime=merge_runtime, merge_hyperparams=merge_hyperparams,
+                                  validation_df=validation_df)
+    else:
+        df = load_validation_analysis() if validation_df is None else validation_df.copy()
+        if merge_runtime or merge_hyperparams:
+            rt = load_runtime_log()
+            if rt is not None:
+                df = _join_run_features(df, _aggregate_run_features(rt),
+                                        merge_runtime, merge_hyperparams)
+            else:
+                print("[data_handler] No runtime log available; "
+                      "proceeding without runtime / hyperparam columns.")
 
     if feature_cols is None:
         feature_cols = FEATURE_COLUMNS
@@ -491,3 +670,157 @@ def build_basic_dataset(
     y_runtime = df[runtime_col].copy()
 
     return X, y_error, y_runtime
+
+
+# === SUCCESS / FAILURE DATASET =============================================
+
+SUCCESS_COLUMN = "success"
+
+
+def build_success_dataset(
+    feature_cols: Optional[list] = None,
+) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    Build an (X, y_success) dataset from every logged run, failed or not.
+
+    build_basic_dataset only sees runs that made it into
+    validation_analysis_full.csv with both targets, so the surrogates never
+    learn where SAM fails. This reads the runtime log directly instead: one
+    row per logged run, features from its hyperparameters (node_multiplier
+    -> nodes_mult), label 1 if the status is in SUCCESS_STATUSES and 0 for
+    fail / timeout / diverged.
+
+    Runs cut at an end_time override (partial horizons, see
+    run_launcher) are left out: finishing a short horizon says little
+    about finishing the full transient.
+
+    Parameters
+    ----------
+    feature_cols : list or None
+        Feature columns. If None, uses FEATURE_COLUMNS.
+
+    Returns
+    -------
+    (X, y_success) : (pd.DataFrame, pd.Series)
+        Empty if there is no runtime log yet.
+    """
+    if feature_cols is None:
+        feature_cols = FEATURE_COLUMNS
+
+    rt = load_runtime_log()
+    if rt is None or rt.empty:
+        return pd.DataFrame(columns=feature_cols), pd.Series(dtype=int, name=SUCCESS_COLUMN)
+
+    if "end_time" in rt.columns:
+        rt = rt[rt["end_time"].isna()]
+    hp = hyperparams_from_runtime_log(rt)
+    if "nodes_mult" not in hp.columns and "node_multiplier" in hp.columns:
+        hp = hp.rename(columns={"node_multiplier": "nodes_mult"})
+
+    missing = [c for c in feature_cols if c not in hp.columns]
+    if missing:
+        print(f"[data_handler] WARNING: runtime log has no {missing}; success dataset ignores them.")
+        feature_cols = [c for c in feature_cols if c in hp.columns]
+
+    X = hp[feature_cols].apply(pd.to_numeric, errors="coerce")
+    y = rt["status"].isin(SUCCESS_STATUSES).astype(int).rename(SUCCESS_COLUMN)
+    keep = X.notna().all(axis=1)
+    X, y = X[keep].reset_index(drop=True), y[keep].reset_index(drop=True)
+
+    print(f"[data_handler] Success dataset: {len(X)} runs, {int(y.sum())} succeeded, "
+          f"{int(len(y) - y.sum())} failed / timed out / diverged")
+    return X, y
+
+
+# === SINGLE-RUN OBSERVATIONS ===============================================
+
+_EXP_CACHE: Dict[str, pd.DataFrame] = {}
+
+
+def load_experimental_data(path: Optional[Path] = None) -> pd.DataFrame:
+    """
+    Load the experimental validation table (CONFIG["paths"]["validation_data"])
+    with csv_analysis.load_experimental_data: indexed by site (TP1, TP2, ...)
+    with one column per test ("Salt Test 1", ...). Cached per path.
+    """
+    path = Path(path or CONFIG["paths"]["validation_data"])
+    key = str(path.resolve())
+    if key not in _EXP_CACHE:
+        _csv_maker, csv_analysis = _analysis_modules()
+        _EXP_CACHE[key] = csv_analysis.load_experimental_data(path)
+    return _EXP_CACHE[key]
+
+
+def observation_from_run(
+    summary: Dict,
+    runtime_col: Optional[str] = None,
+) -> Optional[Dict[str, float]]:
+    """
+    Turn one finished run (a run_launcher summary) into a training row.
+
+    The error is csv_analysis.compute_exp_errors_for_row on the last row of
+    the run's output CSV (csv_maker.read_last_row), i.e. the same rmse_K
+    the validation analysis computes in its "exp" ERROR_MODE. The runtime
+    target is read from the summary (runtime_sec for 'runtime_merged_sec',
+    the matching resource column otherwise).
+
+    Parameters
+    ----------
+    summary : dict
+        Return value of run_sam_case() (needs status, case, output_csv_path
+        and hyperparams_json).
+    runtime_col : str, optional
+        Runtime target name. Default: CONFIG["surrogates"]["runtime_target"].
+
+    Returns
+    -------
+    dict or None
+        FEATURE_COLUMNS + ERROR_COLUMN + runtime_col, or None if the run did
+        not succeed or cannot be scored (no output, no experiment column).
+
+    Raises
+    ------
+    ValueError
+        If csv_analysis.ERROR_MODE is not "exp": its self-reference modes
+        score against the finest run of each case, which a single run
+        cannot be compared to, and rows scored differently must not be
+        mixed into the same training set.
+    """
+    csv_maker, csv_analysis = _analysis_modules()
+    if csv_analysis.ERROR_MODE != "exp":
+        raise ValueError(
+            f"observation_from_run only supports csv_analysis.ERROR_MODE = 'exp' "
+            f"(got {csv_analysis.ERROR_MODE!r}); its rmse_K would not match the "
+            f"validation analysis. Use the round-based modes, which re-run the analysis."
+        )
+    if summary.get("status") not in SUCCESS_STATUSES:
+        return None
+    runtime_col = runtime_col or CONFIG.get("surrogates", {}).get("runtime_target", RUNTIME_COLUMN_DEFAULT)
+
+    case = str(summary.get("case"))
+    csv_path = summary.get("output_csv_path")
+    if case not in csv_analysis.PREFIX_TO_EXP_COLUMN or not csv_path or not Path(csv_path).exists():
+        return None
+    out = csv_maker.read_last_row(csv_path)
+    out.columns = out.columns.str.strip()
+    needed = list(csv_analysis.COMPARISON_SITES) + ["delta_Temp_TP6-TP2"]
+    if out.empty or any(col not in out.columns for col in needed):
+        return None
+    last = out.iloc[-1].copy()
+    last["prefixes"] = case
+    errors = csv_analysis.compute_exp_errors_for_row(last, load_experimental_data())
+
+    try:
+        hp = json.loads(summary.get("hyperparams_json") or "{}")
+    except ValueError:
+        hp = {}
+    hp.setdefault("nodes_mult", hp.get("node_multiplier"))
+
+    row = {col: hp.get(col, np.nan) for col in FEATURE_COLUMNS}
+    row[ERROR_COLUMN] = errors[ERROR_COLUMN]
+    if runtime_col.startswith("runtime_merged_sec"):
+        row[runtime_col] = summary.get("runtime_sec")
+    else:
+        log_col = {v: k for k, v in RESOURCE_COLUMNS.items()}.get(runtime_col)
+        row[runtime_col] = summary.get(log_col) if log_col else np.nan
+    return row
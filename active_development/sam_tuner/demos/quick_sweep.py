@@ -3,15 +3,15 @@ quick_sweep.py
 
 Just a test file to check behavior of other solvers. System seems to be working well. 
 
-Minimal multi-run driver that uses sam_tuner.run_sam_case
-to sweep node_multiplier and order across jsalt templates.
+Minimal multi-run driver: a sam_tuner.sweep spec that sweeps
+node_multiplier and order across jsalt templates (in parallel, resumable).
 
 Run with:
     cd active_development
-    python -m sam_tuner.quick_sweep
+    python -m sam_tuner.demos.quick_sweep
 """
 
-from sam_tuner.run_launcher import run_sam_case
+from sam_tuner.sweep import run_sweep
 
 
 # You can tweak these lists freely.
@@ -20,35 +20,33 @@ TEMPLATES = ["jsalt1.i", "jsalt2.i", "jsalt3.i", "jsalt4.i"]
 NODE_MULT_LIST = [1, 2, 4, 6, 8, 12, 16, 24]  # adjust as you like
 ORDERS = [1, 2]  # 1 = FIRST, 2 = SECOND
 
+MAX_WORKERS = None  # None -> CONFIG["parallel"]["max_workers"]
+
+
+# case_name is the template stem (jsalt1, jsalt2, ...)
+SPEC = {
+    "name": "quick_sweep",
+    "templates": TEMPLATES,
+    "hyperparams": {
+        "order": ORDERS,
+        "node_multiplier": NODE_MULT_LIST,
+        # "htc": 1000.0,  # you can add this later
+    },
+    # "run_kwargs": {"timeout_sec": None},  # use default from config
+}
+
 
 def main():
     run_count = 0
-    for order in ORDERS:
-        for template_name in TEMPLATES:
-            # case_name can be equal to the template stem (jsalt1, jsalt2, ...)
-            case_name = template_name.split(".")[0]
-
-            for nm in NODE_MULT_LIST:
-                hyperparams = {
-                    "node_multiplier": nm,
-                    "order": order,
-                    # "htc": 1000.0,  # you can add this later
-                }
-
-                print(
-                    f"\n=== Running {case_name} | order={order} | node_multiplier={nm} ==="
-                )
-                result = run_sam_case(
-                    case_name=case_name,
-                    template_name=template_name,
-                    hyperparams=hyperparams,
-                    # timeout_sec=None  # use default from config
-                )
-
-                run_count += 1
-                print("Summary:")
-                for k, v in result.items():
-                    print(f"  {k}: {v}")
+
+    def _report(result):
+        nonlocal run_count
+        run_count += 1
+        print(f"\n=== Finished {result.get('case')} ({run_count}) ===")
+        for k, v in result.items():
+            print(f"  {k}: {v}")
+
+    run_sweep(SPEC, max_workers=MAX_WORKERS, on_result=_report)
 
     print(f"\nFinished sweep. Total runs: {run_count}")
 
@@ -1,6 +1,9 @@
 '''
 file_ops.py
 File operations to clean up Templates/ folder and have analysis for the optimizer
+
+- organize_outputs: old layout, where SAM wrote everything into Templates/
+- collect_run_outputs: current layout, one directory per run under runs_root
 '''
 # file_ops.py (recommended)
 from pathlib import Path
@@ -32,4 +35,38 @@ def organize_outputs(templates_dir: Path,
             shutil.move(str(f), str(dest_dir / f.name))
             print(f"[move] Moved {f.name} → {dest_dir}")
         except Exception as e:
-            print(f"[move] Failed to move {f}: {e}")
\ No newline at end of file
+            print(f"[move] Failed to move {f}: {e}")
+
+def collect_run_outputs(runs_root: Path,
+                        dest_dir: Path,
+                        patterns=("*_csv.csv", "*.i", "*.log")):
+    """
+    Copy the small per-run files (output CSV, concrete input, log) from each
+    run directory under runs_root into dest_dir, where csv_maker looks.
+
+    Unlike organize_outputs(), nothing is moved or deleted: checkpoints stay
+    in their run directory, symlinked includes are skipped, and files that
+    are already up to date in dest_dir are not copied again.
+    """
+    runs_root = Path(runs_root)
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    if not runs_root.exists():
+        print(f"[collect] No run directory root at {runs_root}")
+        return
+
+    n_copied = 0
+    for run_dir in sorted(p for p in runs_root.iterdir() if p.is_dir()):
+        for pattern in patterns:
+            for f in run_dir.glob(pattern):
+                if f.is_symlink() or not f.is_file():
+                    continue
+                dest = dest_dir / f.name
+                if dest.exists() and dest.stat().st_mtime >= f.stat().st_mtime:
+                    continue
+                try:
+                    shutil.copy2(str(f), str(dest))
+                    n_copied += 1
+                except Exception as e:
+                    print(f"[collect] Failed to copy {f}: {e}")
+    print(f"[collect] Copied {n_copied} file(s) from {runs_root} → {dest_dir}")
@@ -0,0 +1,387 @@
+"""
+log_parser.py
+
+Solver telemetry from the SAM console logs (<run dir>/<input stem>.log).
+
+A single streaming pass over a log gives
+
+  - a per-timestep table, one row per solve attempt (failed attempts, i.e.
+    dt cutbacks, included):
+
+        step, time, dt, converged, nl_its, nl_res0, nl_res_final,
+        lin_failures, solve_sec, mem_mb
+
+    plus every attempt's full nonlinear residual history (flat array +
+    offsets) and the perf_graph summary table printed at the end of the run;
+
+  - per-run aggregates (LOG_FEATURES): converged steps, cutbacks, mean / max
+    nonlinear iterations, linear failures, min / mean dt, peak memory,
+    execution time and the residual / Jacobian share of the perf graph.
+
+The table is written next to the log (<stem>.steps.npz by default, or
+.parquet with CONFIG["log_parser"]["table_format"] = "parquet", which needs
+pyarrow) together with the aggregates and the log's mtime/size, so
+parse_run_log() only re-reads logs that changed. Where only the table is
+left (runs done in node-local scratch, see run_launcher), its aggregates
+are used as they are. data_handler joins the
+aggregates into the feature table.
+
+Usage (from active_development):
+
+    python -m sam_tuner.log_parser runs/jsalt1_nodes_mult_by_6_h1a2b3c4d5/*.log
+    python -m sam_tuner.log_parser runs/          # every run under runs/
+"""
+
+import argparse
+import json
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import CONFIG
+from .run_watchers import _ANSI_RE, _NUM, _TIME_STEP_RE
+
+
+_NL_RES_RE = re.compile(r"^\s*(\d+)\s+Nonlinear \|R\| =\s*" + _NUM)
+# "Finished Solving  [  7.37 s] [  143 MB]" (perf_graph_live) and the final
+# "Finished Executing [ 10.02 s] [ 128 MB]"
+_FINISHED_RE = re.compile(r"^\s*Finished\s+(.*?)\s*\[\s*" + _NUM + r"\s*s\]\s*\[\s*" + _NUM + r"\s*MB\]")
+_PERF_ROW_RE = re.compile(r"^\|(\s*)(\S.*?)\s*\|" + r"\s*([-+0-9.eE]+)\s*\|" * 9)
+
+# Columns of the per-timestep table
+STEP_COLUMNS = [
+    "step", "time", "dt", "converged", "nl_its", "nl_res0", "nl_res_final",
+    "lin_failures", "solve_sec", "mem_mb",
+]
+PERF_COLUMNS = ["depth", "calls", "self_sec", "total_sec", "mem_mb"]
+
+# Per-run aggregates (also the columns data_handler joins into the dataset)
+LOG_FEATURES = [
+    "log_steps",
+    "log_cutbacks",
+    "log_nl_its_mean",
+    "log_nl_its_max",
+    "log_lin_failures",
+    "log_dt_min",
+    "log_dt_mean",
+    "log_peak_mem_mb",
+    "log_exec_sec",
+    "log_perf_residual_frac",
+    "log_perf_jacobian_frac",
+]
+
+# Bump when the table layout or the aggregates change; older tables are
+# then re-parsed.
+TABLE_VERSION = 1
+
+
+class _LogParser:
+    """Line-by-line state machine behind parse_log()."""
+
+    def __init__(self):
+        self.rows: List[List[float]] = []
+        self.res: List[float] = []
+        self.res_offsets: List[int] = [0]
+        self.perf: List[List[float]] = []
+        self.perf_sections: List[str] = []
+        self.exec_sec = math.nan
+        self.peak_mem_mb = math.nan
+        self._row: Optional[List[float]] = None
+        self._in_perf = False
+
+    def feed(self, line: str) -> None:
+        if "\x1b" in line:
+            line = _ANSI_RE.sub("", line)
+
+        if self._in_perf:
+            if line.startswith("|"):
+                m = _PERF_ROW_RE.match(line)
+                if m:
+                    self.perf_sections.append(m.group(2))
+                    depth = (len(m.group(1)) - 1) // 2
+                    self.perf.append([depth] + [float(v) for v in m.group(3, 4, 8, 11)])
+                return
+            if line.startswith("-") or not line.strip():
+                return
+            self._in_perf = False
+
+        c = line[:1]
+        if c in "|+:":  # postprocessor tables, the bulk of a SAM log
+            return
+
+        if "Nonlinear |R|" in line:
+            m = _NL_RES_RE.match(line)
+            if m and self._row is not None:
+                if m.group(1) == "0":
+                    self._row[5] = float(m.group(2))
+                self._row[4] = int(m.group(1))
+                self._row[6] = float(m.group(2))
+                self.res.append(float(m.group(2)))
+            return
+
+        if line.startswith("Time Step"):
+            m = _TIME_STEP_RE.match(line)
+            if m:
+                self._close()
+                dt = float(m.group(3)) if m.group(3) is not None else math.nan
+                #            step        time               dt  conv     nl  res0      resf      lin sec       mem
+                self._row = [int(m.group(1)), float(m.group(2)), dt, -1, 0, math.nan, math.nan, 0, math.nan, math.nan]
+            return
+
+        if self._row is not None:
+            if "Linear solve did not converge" in line:
+                self._row[7] += 1
+                return
+            if "Solve Converged!" in line:
+                self._row[3] = 1
+                return
+            if "Solve Did NOT Converge!" in line:
+                self._row[3] = 0
+                return
+
+        if "Finished" in line:
+            m = _FINISHED_RE.match(line)
+            if m:
+                sec, mb = float(m.group(2)), float(m.group(3))
+                self.peak_mem_mb = mb if math.isnan(self.peak_mem_mb) else max(self.peak_mem_mb, mb)
+                if m.group(1).startswith("Executing"):
+                    self.exec_sec = sec
+                elif self._row is not None:
+                    row = self._row
+                    row[8] = sec if math.isnan(row[8]) else row[8] + sec
+                    row[9] = mb if math.isnan(row[9]) else max(row[9], mb)
+            return
+
+        if line.startswith("Performance Graph"):
+            self._close()
+            self._in_perf = True
+
+    def _close(self) -> None:
+        if self._row is not None and self._row[0] > 0:  # step 0 is the initial condition
+            self.rows.append(self._row)
+            self.res_offsets.append(len(self.res))
+        elif self._row is not None:
+            del self.res[self.res_offsets[-1]:]
+        self._row = None
+
+    def result(self) -> Dict[str, Any]:
+        self._close()
+        steps = np.array(self.rows, dtype=float).reshape(-1, len(STEP_COLUMNS))
+        table = {col: steps[:, i] for i, col in enumerate(STEP_COLUMNS)}
+        for col in ("step", "nl_its", "lin_failures"):
+            table[col] = table[col].astype(np.int64)
+        table["converged"] = table["converged"].astype(np.int8)  # 1 ok, 0 failed, -1 unfinished
+        return {
+            "steps": table,
+            "nl_res": np.array(self.res, dtype=float),
+            "nl_res_offsets": np.array(self.res_offsets, dtype=np.int64),
+            "perf": np.array(self.perf, dtype=float).reshape(-1, len(PERF_COLUMNS)),
+            "perf_sections": np.array(self.perf_sections, dtype=str),
+            "exec_sec": self.exec_sec,
+            "peak_mem_mb": self.peak_mem_mb,
+        }
+
+
+def parse_log(log_path: Path) -> Dict[str, Any]:
+    """
+    Parse one SAM console log in a single streaming pass.
+
+    Returns
+    -------
+    dict
+        steps          : {column: array} per solve attempt (STEP_COLUMNS)
+        nl_res         : all nonlinear residuals, attempt after attempt;
+                         attempt i is nl_res[nl_res_offsets[i]:nl_res_offsets[i+1]]
+        nl_res_offsets : int array, len(attempts) + 1
+        perf           : perf_graph rows (PERF_COLUMNS), perf_sections their names
+        exec_sec, peak_mem_mb : from the "Finished ..." lines (NaN if absent)
+    """
+    parser = _LogParser()
+    with open(log_path, "r", errors="replace") as f:
+        for line in f:
+            parser.feed(line)
+    return parser.result()
+
+
+def summarize(parsed: Dict[str, Any]) -> Dict[str, float]:
+    """Per-run aggregates (LOG_FEATURES) of a parse_log() result."""
+    steps = parsed["steps"]
+    ok = steps["converged"] == 1
+    dt = steps["dt"][~np.isnan(steps["dt"])]
+    out = {
+        "log_steps": int(ok.sum()),
+        "log_cutbacks": int((steps["converged"] == 0).sum()),
+        "log_nl_its_mean": float(steps["nl_its"][ok].mean()) if ok.any() else math.nan,
+        "log_nl_its_max": int(steps["nl_its"].max()) if len(ok) else 0,
+        "log_lin_failures": int(steps["lin_failures"].sum()),
+        "log_dt_min": float(dt.min()) if dt.size else math.nan,
+        "log_dt_mean": float(dt.mean()) if dt.size else math.nan,
+        "log_peak_mem_mb": float(parsed["peak_mem_mb"]),
+        "log_exec_sec": float(parsed["exec_sec"]),
+        "log_perf_residual_frac": math.nan,
+        "log_perf_jacobian_frac": math.nan,
+    }
+
+    perf, sections = parsed["perf"], parsed["perf_sections"]
+    if len(perf):
+        total = perf[0, 3]  # the root section (SamApp (main)) covers everything
+        if total > 0:
+            for key, name in (("log_perf_residual_frac", "computeResidualInternal"),
+                              ("log_perf_jacobian_frac", "computeJacobianInternal")):
+                rows = np.char.endswith(sections, name)
+                out[key] = float(perf[rows, 3].sum() / total)
+    return out
+
+
+# === PERSISTED TABLES ======================================================
+
+def _table_path(log_path: Path, fmt: str) -> Path:
+    return log_path.with_name(log_path.stem + (".steps.parquet" if fmt == "parquet" else ".steps.npz"))
+
+
+def _log_signature(log_path: Path) -> str:
+    st = log_path.stat()
+    return f"{TABLE_VERSION}:{st.st_mtime_ns}:{st.st_size}"
+
+
+def write_table(parsed: Dict[str, Any], summary: Dict[str, float], path: Path, signature: str) -> None:
+    """Write the per-timestep table (+ aggregates, signature) to .npz or .parquet."""
+    meta = json.dumps({"signature": signature, "summary": summary})
+    if path.suffix == ".parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "CONFIG['log_parser']['table_format'] = 'parquet' needs pyarrow; "
+                "install pyarrow or use 'npz'."
+            ) from e
+        offsets = parsed["nl_res_offsets"]
+        df = pd.DataFrame(parsed["steps"])
+        df["nl_res_history"] = [parsed["nl_res"][a:b].tolist() for a, b in zip(offsets[:-1], offsets[1:])]
+        df.attrs["sam_log"] = meta
+        df.to_parquet(path, index=False)
+        return
+    np.savez_compressed(
+        path,
+        meta=np.array(meta),
+        **{f"step_{k}": v for k, v in parsed["steps"].items()},
+        nl_res=parsed["nl_res"],
+        nl_res_offsets=parsed["nl_res_offsets"],
+        perf=parsed["perf"],
+        perf_sections=parsed["perf_sections"],
+    )
+
+
+def _cached_summary(path: Path, signature: Optional[str]) -> Optional[Dict[str, float]]:
+    """Aggregates stored in a table; None if unreadable or (signature given) stale."""
+    try:
+        if path.suffix == ".parquet":
+            meta = pd.read_parquet(path).attrs.get("sam_log")
+        else:
+            with np.load(path) as z:
+                meta = str(z["meta"])
+        meta = json.loads(meta)
+    except Exception:
+        return None
+    if signature is not None and meta.get("signature") != signature:
+        return None
+    return {k: (math.nan if v is None else v) for k, v in meta["summary"].items()}
+
+
+def load_steps(log_path: Path) -> pd.DataFrame:
+    """Per-timestep table of a run (parsing the log if it has no table yet)."""
+    log_path = Path(log_path)
+    fmt = CONFIG.get("log_parser", {}).get("table_format", "npz")
+    path = _table_path(log_path, fmt)
+    if not path.exists() or _cached_summary(path, _log_signature(log_path)) is None:
+        parse_run_log(log_path)
+    if path.suffix == ".parquet":
+        return pd.read_parquet(path)
+    with np.load(path) as z:
+        return pd.DataFrame({c: z[f"step_{c}"] for c in STEP_COLUMNS})
+
+
+def parse_run_log(log_path: Path, write: bool = True) -> Dict[str, float]:
+    """
+    Per-run aggregates of one SAM log, re-parsing only if the log changed
+    since its table was written.
+
+    Parameters
+    ----------
+    log_path : Path
+        The run's console log.
+    write : bool
+        Write the per-timestep table next to the log.
+
+    Returns
+    -------
+    dict
+        LOG_FEATURES -> value (NaN where the log has no such information).
+    """
+    log_path = Path(log_path)
+    fmt = CONFIG.get("log_parser", {}).get("table_format", "npz")
+    path = _table_path(log_path, fmt)
+    if not log_path.exists() and path.exists():
+        # only the table was kept (runs copied back from node-local scratch)
+        cached = _cached_summary(path, None)
+        if cached is not None:
+            return cached
+    signature = _log_signature(log_path)
+    if path.exists():
+        cached = _cached_summary(path, signature)
+        if cached is not None:
+            return cached
+
+    parsed = parse_log(log_path)
+    summary = summarize(parsed)
+    if write:
+        jsonable = {k: (None if isinstance(v, float) and math.isnan(v) else v) for k, v in summary.items()}
+        try:
+            write_table(parsed, jsonable, path, signature)
+        except OSError as e:
+            print(f"[log_parser] WARNING: could not write {path}: {e}")
+    return summary
+
+
+def log_features(log_paths: Dict[str, Path]) -> pd.DataFrame:
+    """
+    Aggregates for several logs, as a DataFrame indexed like log_paths' keys
+    (e.g. input_basename). Missing logs (without a table of their own) are
+    skipped.
+    """
+    fmt = CONFIG.get("log_parser", {}).get("table_format", "npz")
+    rows = {}
+    for key, log_path in log_paths.items():
+        log_path = Path(log_path)
+        if not log_path.is_file() and not _table_path(log_path, fmt).is_file():
+            continue
+        try:
+            rows[key] = parse_run_log(log_path)
+        except Exception as e:
+            print(f"[log_parser] WARNING: could not parse {log_path}: {e}")
+    return pd.DataFrame.from_dict(rows, orient="index", columns=LOG_FEATURES)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Extract solver telemetry from SAM logs.")
+    parser.add_argument("paths", nargs="+", type=Path,
+                        help="SAM .log files, or directories searched for them (e.g. runs/).")
+    parser.add_argument("--no-write", action="store_true",
+                        help="Don't write the per-timestep tables next to the logs.")
+    args = parser.parse_args()
+
+    logs = []
+    for p in args.paths:
+        logs += sorted(p.rglob("*.log")) if p.is_dir() else [p]
+    summaries = {log.name: parse_run_log(log, write=not args.no_write) for log in logs}
+    df = pd.DataFrame.from_dict(summaries, orient="index", columns=LOG_FEATURES)
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(df.T if len(df) == 1 else df)
+
+
+if __name__ == "__main__":
+    main()
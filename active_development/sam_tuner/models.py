@@ -6,7 +6,15 @@ Surrogate models for the SAM optimizer.
 This module provides:
   - fit_surrogates(X, y_error, y_runtime): train regressors for error and runtime
   - predict_error_runtime(models, X_new): predict error and runtime for new designs
+  - predict_per_tree(models, X_new): the individual trees' predictions
+  - predict_with_uncertainty(models, X_new): mean and spread over the trees
   - normalize_targets(): simple min-max scaling to [0, 1] for score computation
+  - fit_success_classifier(models, X, y_success): third surrogate, the
+    probability that SAM finishes a run (trained on failed runs too)
+  - predict_success_proba(models, X_new): P(success) for new designs
+  - load_or_fit_surrogates(X, y_error, y_runtime): reuse the forests saved
+    by the previous call if the data is unchanged, add trees for new rows
+    (warm_start), refit otherwise
 
 We use scikit-learn's RandomForestRegressor by default. The models are wrapped
 in a small dataclass for convenience.
@@ -14,16 +22,21 @@ in a small dataclass for convenience.
 
 from __future__ import annotations
 
+import hashlib
 from dataclasses import dataclass
-from typing import Dict, Any, Tuple, List
+from pathlib import Path
+from typing import Dict, Any, Tuple, List, Optional
 
 import numpy as np
 import pandas as pd
+import sklearn
 from sklearn.compose import ColumnTransformer
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder
 
+from .config import CONFIG
+
 
 @dataclass
 class SurrogateModels:
@@ -35,6 +48,15 @@ class SurrogateModels:
     error_max: float
     runtime_min: float
     runtime_max: float
+    # P(success) classifier (fit_success_classifier); None -> success_rate everywhere
+    success_model: Optional[Pipeline] = None
+    success_rate: float = 1.0
+    # Training-data fingerprints (data_fingerprint) for reuse across calls
+    data_fingerprint: Optional[str] = None
+    n_train: int = 0
+    success_fingerprint: Optional[str] = None
+    # One hash per training row (row_hashes), to spot added rows in any order
+    row_hashes: Optional[np.ndarray] = None
 
 
 def _build_preprocessor(X: pd.DataFrame) -> ColumnTransformer:
@@ -87,7 +109,8 @@ def fit_surrogates(
     y_error : pd.Series
         Error target (e.g., rmse_K).
     y_runtime : pd.Series
-        Runtime target (e.g., runtime_merged_sec).
+        Runtime target (e.g., runtime_merged_sec, or cpu_merged_sec for a
+        cost that doesn't depend on how loaded the node was).
     n_estimators : int
         Number of trees for the RandomForest.
     random_state : int
@@ -111,6 +134,7 @@ def fit_surrogates(
         )
 
     print(f"[models] Training surrogates on {len(X_train)} samples with features: {list(X.columns)}")
+    print(f"[models] Targets: error = {y_error.name}, runtime = {y_runtime.name}")
 
     preprocessor = _build_preprocessor(X_train)
 
@@ -164,6 +188,89 @@ def fit_surrogates(
     )
 
 
+def fit_success_classifier(
+    models: SurrogateModels,
+    X: pd.DataFrame,
+    y_success: pd.Series,
+    n_estimators: int = 200,
+    random_state: int = 42,
+) -> SurrogateModels:
+    """
+    Fit a RandomForestClassifier for P(run succeeds) and attach it to `models`.
+
+    Unlike the two regressors this is trained on all runs, including the
+    ones that failed, timed out or diverged (data_handler.build_success_dataset),
+    so it learns where SAM does not make it to the end. Classes are
+    weighted to their frequency, since failures are usually rare.
+
+    If y_success holds only one class there is nothing to learn; the
+    observed success rate (0 or 1) is used as the prediction everywhere.
+
+    Parameters
+    ----------
+    models : SurrogateModels
+        Fitted error / runtime surrogates; updated in place.
+    X : pd.DataFrame
+        Features per run (must contain models.feature_columns).
+    y_success : pd.Series
+        1 for success, 0 otherwise.
+    n_estimators : int
+        Number of trees.
+    random_state : int
+        Random seed for reproducibility.
+
+    Returns
+    -------
+    SurrogateModels
+        The same object, with success_model / success_rate set.
+    """
+    X_train = X[models.feature_columns].copy()
+    y = y_success.astype(int)
+    models.success_rate = float(y.mean()) if len(y) else 1.0
+
+    if y.nunique() < 2:
+        models.success_model = None
+        print(f"[models] Success classifier: only one class in {len(y)} runs; "
+              f"using P(success) = {models.success_rate:.2f} everywhere.")
+        return models
+
+    clf = Pipeline(
+        steps=[
+            ("pre", _build_preprocessor(X_train)),
+            ("rf", RandomForestClassifier(
+                n_estimators=n_estimators,
+                random_state=random_state + 2,
+                class_weight="balanced",
+                min_samples_leaf=2,
+                n_jobs=-1,
+            )),
+        ]
+    )
+    clf.fit(X_train, y)
+    models.success_model = clf
+    print(f"[models] Success classifier trained on {len(y)} runs "
+          f"({int(y.sum())} succeeded, {int(len(y) - y.sum())} failed).")
+    return models
+
+
+def predict_success_proba(
+    models: SurrogateModels,
+    X_new: pd.DataFrame,
+) -> np.ndarray:
+    """
+    Predicted probability that SAM finishes each design.
+
+    Returns success_rate for every row if no classifier was fitted (ones
+    if fit_success_classifier was never called).
+    """
+    if models.success_model is None:
+        return np.full(len(X_new), models.success_rate)
+    X_new = X_new[models.feature_columns].copy()
+    proba = models.success_model.predict_proba(X_new)
+    classes = list(models.success_model.named_steps["rf"].classes_)
+    return np.asarray(proba[:, classes.index(1)])
+
+
 def predict_error_runtime(
     models: SurrogateModels,
     X_new: pd.DataFrame,
@@ -191,6 +298,47 @@ def predict_error_runtime(
     return np.asarray(err_pred), np.asarray(rt_pred)
 
 
+def predict_per_tree(
+    models: SurrogateModels,
+    X_new: pd.DataFrame,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predictions of every tree in the two forests.
+
+    Returns
+    -------
+    (err_trees, rt_trees) : (np.ndarray, np.ndarray)
+        Arrays of shape (n_trees, len(X_new)). Their means over axis 0 are
+        what predict_error_runtime() returns.
+    """
+    X_new = X_new[models.feature_columns].copy()
+
+    def _trees(pipe: Pipeline) -> np.ndarray:
+        Xt = pipe.named_steps["pre"].transform(X_new)
+        return np.stack([tree.predict(Xt) for tree in pipe.named_steps["rf"].estimators_])
+
+    return _trees(models.error_model), _trees(models.runtime_model)
+
+
+def predict_with_uncertainty(
+    models: SurrogateModels,
+    X_new: pd.DataFrame,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Predict error and runtime with the spread of the forest as uncertainty.
+
+    The standard deviation over the trees is small where many training runs
+    agree and large away from the data, which is what the batch acquisition
+    in acquisition.py needs.
+
+    Returns
+    -------
+    (err_mean, err_std, rt_mean, rt_std) : tuple of np.ndarray
+    """
+    err_trees, rt_trees = predict_per_tree(models, X_new)
+    return err_trees.mean(axis=0), err_trees.std(axis=0), rt_trees.mean(axis=0), rt_trees.std(axis=0)
+
+
 def normalize_targets(
     models: SurrogateModels,
     err: np.ndarray,
@@ -210,3 +358,188 @@ def normalize_targets(
     err_norm = _norm(err, models.error_min, models.error_max)
     rt_norm = _norm(rt, models.runtime_min, models.runtime_max)
     return err_norm, rt_norm
+
+
+# --- Persistence --------------------------------------------------------------
+
+# Bump when SurrogateModels changes shape; older files are then ignored.
+SURROGATE_STORE_VERSION = 2
+
+
+def data_fingerprint(*parts) -> str:
+    """
+    Stable hash of the training data (DataFrames / Series, values + column names).
+
+    Row order matters; see row_hashes() for an order-free comparison.
+    """
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(repr(list(part.columns) if isinstance(part, pd.DataFrame) else part.name).encode())
+        h.update(pd.util.hash_pandas_object(part, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def row_hashes(X: pd.DataFrame, *targets: pd.Series) -> np.ndarray:
+    """
+    One hash per row of X joined with its targets.
+
+    The feature table is re-sorted by csv_analysis, so a new run usually
+    lands among the old rows rather than after them; comparing these
+    hashes as a multiset finds the stored rows wherever they are.
+    """
+    parts = [X.reset_index(drop=True)] + [t.reset_index(drop=True) for t in targets]
+    return pd.util.hash_pandas_object(pd.concat(parts, axis=1), index=False).to_numpy()
+
+
+def _contains_rows(new: np.ndarray, old: np.ndarray) -> bool:
+    """True if every row hash in `old` occurs in `new` (with multiplicity)."""
+    new_vals, new_counts = np.unique(new, return_counts=True)
+    old_vals, old_counts = np.unique(old, return_counts=True)
+    pos = np.searchsorted(new_vals, old_vals)
+    if np.any(pos >= len(new_vals)):
+        return False
+    return bool(np.all(new_vals[pos] == old_vals) and np.all(new_counts[pos] >= old_counts))
+
+
+def _store_path(path: Optional[Path] = None) -> Path:
+    return Path(path if path is not None else CONFIG["paths"]["surrogate_store"]).resolve()
+
+
+def save_surrogates(models: SurrogateModels, path: Optional[Path] = None) -> Path:
+    """Write models to disk (joblib; written to a temp file, then renamed)."""
+    import joblib
+
+    path = _store_path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    joblib.dump(
+        {"version": SURROGATE_STORE_VERSION, "sklearn": sklearn.__version__, "models": models},
+        tmp,
+    )
+    tmp.replace(path)
+    return path
+
+
+def load_surrogates(path: Optional[Path] = None) -> Optional[SurrogateModels]:
+    """
+    Load models saved by save_surrogates(), or None if there are none or
+    they were written by another store version / scikit-learn version.
+    """
+    import joblib
+
+    path = _store_path(path)
+    if not path.exists():
+        return None
+    try:
+        payload = joblib.load(path)
+    except Exception as e:
+        print(f"[models] Could not load stored surrogates from {path}: {e}")
+        return None
+    if payload.get("version") != SURROGATE_STORE_VERSION or payload.get("sklearn") != sklearn.__version__:
+        print("[models] Stored surrogates are from another version; refitting.")
+        return None
+    return payload["models"]
+
+
+def _has_categorical(pipe: Pipeline) -> bool:
+    return any(name == "cat" for name, _, _ in pipe.named_steps["pre"].transformers)
+
+
+def update_surrogates(
+    models: SurrogateModels,
+    X: pd.DataFrame,
+    y_error: pd.Series,
+    y_runtime: pd.Series,
+    n_new_trees: int = 50,
+) -> SurrogateModels:
+    """
+    Grow both forests by n_new_trees trees fitted on the full, grown dataset
+    (RandomForest warm_start); the existing trees are kept as they are.
+
+    Cheaper than fit_surrogates() when only a few rows were added. The
+    normalization ranges are recomputed from the full data.
+    """
+    mask = y_error.notna() & y_runtime.notna()
+    X_train = X[mask][models.feature_columns]
+    y_err_train = y_error[mask]
+    y_rt_train = y_runtime[mask]
+
+    for pipe, y in ((models.error_model, y_err_train), (models.runtime_model, y_rt_train)):
+        rf = pipe.named_steps["rf"]
+        rf.set_params(warm_start=True, n_estimators=len(rf.estimators_) + int(n_new_trees))
+        rf.fit(pipe.named_steps["pre"].transform(X_train), y)
+        rf.set_params(warm_start=False)
+
+    models.error_min, models.error_max = float(y_err_train.min()), float(y_err_train.max())
+    models.runtime_min, models.runtime_max = float(y_rt_train.min()), float(y_rt_train.max())
+    n_trees = len(models.error_model.named_steps["rf"].estimators_)
+    print(f"[models] Added {n_new_trees} trees per forest for {len(X_train) - models.n_train} "
+          f"new rows ({n_trees} trees, {len(X_train)} samples).")
+    return models
+
+
+def load_or_fit_surrogates(
+    X: pd.DataFrame,
+    y_error: pd.Series,
+    y_runtime: pd.Series,
+    path: Optional[Path] = None,
+) -> SurrogateModels:
+    """
+    fit_surrogates() with the result kept on disk between calls.
+
+      - same data as the stored models (fingerprint match, or the same
+        rows in another order): load them
+      - every stored row is still in the current data (row_hashes), few
+        new rows (CONFIG["surrogate_store"]["refit_fraction"]), numeric
+        features only: add warm_start_trees trees per forest
+        (update_surrogates)
+      - anything else: fit from scratch
+
+    The result is saved back to CONFIG["paths"]["surrogate_store"]. With
+    CONFIG["surrogate_store"]["enabled"] = False this is fit_surrogates().
+
+    Returns
+    -------
+    SurrogateModels
+        With data_fingerprint / n_train set.
+    """
+    cfg = CONFIG.get("surrogate_store", {})
+    if not cfg.get("enabled", False):
+        return fit_surrogates(X, y_error, y_runtime)
+
+    fingerprint = data_fingerprint(X, y_error, y_runtime)
+    hashes = row_hashes(X, y_error, y_runtime)
+    stored = load_surrogates(path)
+    if stored is not None and stored.feature_columns == list(X.columns):
+        same_rows = (stored.row_hashes is not None and len(stored.row_hashes) == len(hashes)
+                     and _contains_rows(hashes, stored.row_hashes))
+        if stored.data_fingerprint == fingerprint or same_rows:
+            print(f"[models] Training data unchanged; reusing stored surrogates ({stored.n_train} rows).")
+            if stored.data_fingerprint != fingerprint:
+                stored.data_fingerprint = fingerprint
+                save_surrogates(stored, path)
+            return stored
+
+        n_old, n_new = stored.n_train, len(X) - stored.n_train
+        n_trees = len(stored.error_model.named_steps["rf"].estimators_)
+        can_grow = (
+            0 < n_old < len(X)
+            and n_new <= max(1, float(cfg.get("refit_fraction", 0.25)) * n_old)
+            and n_trees + int(cfg.get("warm_start_trees", 50)) <= int(cfg.get("max_trees", 600))
+            and not _has_categorical(stored.error_model)
+            and stored.row_hashes is not None
+            and _contains_rows(hashes, stored.row_hashes)
+        )
+        if can_grow:
+            models = update_surrogates(stored, X, y_error, y_runtime,
+                                       n_new_trees=int(cfg.get("warm_start_trees", 50)))
+            models.data_fingerprint, models.n_train = fingerprint, len(X)
+            models.row_hashes = hashes
+            save_surrogates(models, path)
+            return models
+
+    models = fit_surrogates(X, y_error, y_runtime)
+    models.data_fingerprint, models.n_train = fingerprint, len(X)
+    models.row_hashes = hashes
+    save_surrogates(models, path)
+    return models
@@ -1,33 +1,68 @@
 """
 monitor.py
 
-Simple live monitor for SAM optimizer runs.
+Live monitor for SAM optimizer runs.
 
 Usage (from active_development/ or anywhere in the repo):
 
     python -m sam_tuner.monitor
 
+    # 200-run sweep started at 09:00 UTC: also print its ETA
+    python -m sam_tuner.monitor --total-runs 200 --since 2026-10-17T09:00:00Z
+
 or
 
     cd active_development
     python sam_tuner/monitor.py
 
 This will:
-- Re-read the central runtime log every few seconds
+- Follow the central runtime log incrementally: only runs logged since the
+  last refresh are read (run store: rows after the last seen id; CSV: bytes
+  after the last offset), so a refresh stays cheap with tens of thousands
+  of logged runs
+- Tail the SAM console log and output CSV of every run still in flight
+  under CONFIG["paths"]["runs_root"] for its simulated-time progress
 - Print:
     - Total runs
-    - Counts by status (success/fail/timeout/skipped)
+    - Counts by status (success/success_steady/fail/timeout/diverged/skipped)
     - Basic runtime stats (min/median/max) for completed runs
+    - Throughput (runs/hour) and CPU seconds per simulated second
+    - In-flight runs with simulated time, rate and ETA
+    - Sweep ETA (with --total-runs)
 """
 
+import argparse
+import io
+import json
+import math
 import os
+import re
 import time
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 from .config import CONFIG
+from . import run_store
+from .run_watchers import ConsoleWatcher, CsvTail
+
+COMPLETED_STATUSES = ["success", "success_steady", "fail", "timeout", "diverged"]
+ALL_STATUSES = COMPLETED_STATUSES + ["skipped"]
+
+# Columns the monitor needs from the runtime log (whatever of them exists)
+LOG_COLUMNS = [
+    "status", "runtime_sec", "cpu_sec", "max_rss_mb", "steady_time",
+    "timestamp_start", "timestamp_end", "sam_input_path",
+    "sim_time_last", "restart_time",
+    "hp_node_multiplier", "hyperparams_json",
+]
+
+_END_TIME_RE = re.compile(r"^\s*end_time\s*=\s*([-+0-9.eE]+)", re.MULTILINE)
+_INCLUDE_RE = re.compile(r"^\s*!include\s+(\S+)", re.MULTILINE)
+_HORIZON_TAG_RE = re.compile(r"_t([0-9p.e-]+)(?:_from([0-9p.e-]+))?$")
 
 
 def _clear_screen():
@@ -35,68 +70,473 @@ def _clear_screen():
     os.system("cls" if os.name == "nt" else "clear")
 
 
-def _load_runtime_df() -> Optional[pd.DataFrame]:
-    """Load the runtime log into a DataFrame if it exists, else None."""
-    log_path = Path(CONFIG["paths"]["runtime_log"]).resolve()
-    if not log_path.exists():
-        return None
-    return pd.read_csv(log_path)
+def _log_location() -> str:
+    """Where the runtime log is read from (for display)."""
+    if CONFIG.get("run_store", {}).get("backend", "csv") == "sqlite":
+        return CONFIG["paths"]["run_store"]
+    return CONFIG["paths"]["runtime_log"]
+
+
+def _to_epoch(ts: Any) -> float:
+    """'2026-10-17T09:00:00Z' -> seconds since the epoch (NaN if unparsable)."""
+    if ts is None or (isinstance(ts, float) and math.isnan(ts)):
+        return math.nan
+    try:
+        dt = datetime.fromisoformat(str(ts).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return math.nan
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _fmt_duration(sec: Optional[float]) -> str:
+    if sec is None or not math.isfinite(sec):
+        return "-"
+    sec = int(round(sec))
+    h, rem = divmod(sec, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s"
+
+
+# --- Runtime log followers --------------------------------------------------
+
+class StoreFollower:
+    """
+    Reads runs from the SQLite run store incrementally: each read() returns
+    only rows with an id above the highest one seen so far.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.last_id = 0
+
+    def read(self) -> Tuple[Optional[pd.DataFrame], bool]:
+        """(new rows or None, reset); reset is always False for the store."""
+        if not run_store.store_exists(self.path):
+            return None, False
+        with run_store.connect(self.path) as conn:
+            available = run_store._table_columns(conn)
+        columns = [c for c in LOG_COLUMNS if c in available]
+        df = run_store.read_runs(self.path, columns=columns, since_id=self.last_id, with_id=True)
+        if len(df):
+            self.last_id = int(df["id"].max())
+        return df, False
+
+
+class CsvLogFollower:
+    """
+    Follows runtimes_master.csv by byte offset: each read() parses only the
+    complete lines appended since the previous call.
+
+    runtime_logger rewrites the file when a run brings new columns; the
+    changed header (or a file that got shorter) is detected and the file is
+    then read again from the start, with reset=True.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._offset = 0
+        self._header = b""
+
+    def read(self) -> Tuple[Optional[pd.DataFrame], bool]:
+        """(new rows or None, reset)."""
+        if not self.path.exists():
+            return None, False
+        reset = False
+        with self.path.open("rb") as f:
+            header = f.readline()
+            size = os.fstat(f.fileno()).st_size
+            if header != self._header or size < self._offset:
+                reset = bool(self._header)
+                self._header = header
+                self._offset = len(header)
+            if size == self._offset:
+                return self._empty(), reset
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return self._empty(), reset  # only a partially written line so far
+        chunk = chunk[:end + 1]
+        self._offset += len(chunk)
+        df = pd.read_csv(io.BytesIO(self._header + chunk))
+        return df[[c for c in LOG_COLUMNS if c in df.columns]], reset
+
+    @staticmethod
+    def _empty() -> pd.DataFrame:
+        return pd.DataFrame(columns=["status"])
+
+
+def _log_follower():
+    if CONFIG.get("run_store", {}).get("backend", "csv") == "sqlite" and run_store.store_exists():
+        return StoreFollower()
+    return CsvLogFollower(Path(CONFIG["paths"]["runtime_log"]).resolve())
+
+
+# --- Aggregates over the logged runs ----------------------------------------
+
+def _node_multiplier(df: pd.DataFrame) -> pd.Series:
+    """node_multiplier of each run: the store's hp_ column, else hyperparams_json."""
+    if "hp_node_multiplier" in df.columns:
+        return pd.to_numeric(df["hp_node_multiplier"], errors="coerce")
+    if "hyperparams_json" in df.columns:
+        def _get(s):
+            try:
+                return float(json.loads(s).get("node_multiplier"))
+            except (TypeError, ValueError, AttributeError):
+                return math.nan
+        return df["hyperparams_json"].map(_get).astype(float)
+    return pd.Series(np.nan, index=df.index)
+
+
+class LogStats:
+    """Running totals over the runtime log, updated with the new rows only."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.total = 0
+        self.by_status: Dict[str, int] = {}
+        self.runtimes: List[float] = []
+        self.steady_times: List[float] = []
+        self.cpu_util: List[float] = []
+        self.max_rss: List[float] = []
+        self.end_epochs: List[float] = []      # completion time of every completed run
+        self.start_epochs: List[float] = []    # start time of every logged run
+        self.cpu_sim_cpu = 0.0                 # CPU seconds ...
+        self.cpu_sim_time = 0.0                # ... over this much simulated time
+        self.last_end_by_input: Dict[str, float] = {}
+        self.runtimes_by_mesh: Dict[Any, List[float]] = {}  # node_multiplier -> runtimes
 
+    def add(self, df: pd.DataFrame) -> None:
+        if df is None or df.empty:
+            return
+        self.total += len(df)
+        for status, n in df["status"].value_counts().items():
+            self.by_status[status] = self.by_status.get(status, 0) + int(n)
 
-def _print_summary(df: pd.DataFrame):
-    """Print a simple textual summary of the current runs."""
-    total = len(df)
-    by_status = df["status"].value_counts().to_dict()
+        def col(name):
+            if name in df.columns:
+                return pd.to_numeric(df[name], errors="coerce")
+            return pd.Series(np.nan, index=df.index)
 
-    # Completed = everything except skipped.
-    completed_mask = df["status"].isin(["success", "fail", "timeout"])
-    completed = df[completed_mask]
-    n_completed = len(completed)
+        def epochs(name):
+            if name in df.columns:
+                return df[name].map(_to_epoch).astype(float)
+            return pd.Series(np.nan, index=df.index)
 
+        start = epochs("timestamp_start")
+        end = epochs("timestamp_end")
+        self.start_epochs.extend(start.dropna().tolist())
+        if "sam_input_path" in df.columns:
+            for path, t in zip(df["sam_input_path"].astype(str), end):
+                if math.isfinite(t):
+                    self.last_end_by_input[path] = max(t, self.last_end_by_input.get(path, t))
+
+        done = df["status"].isin(COMPLETED_STATUSES)
+        runtime = col("runtime_sec")[done]
+        cpu = col("cpu_sec")[done]
+        self.runtimes.extend(runtime.dropna().tolist())
+        self.end_epochs.extend(end[done].dropna().tolist())
+        self.steady_times.extend(col("steady_time")[done].dropna().tolist())
+        self.cpu_util.extend((cpu / runtime).dropna().tolist())
+        self.max_rss.extend(col("max_rss_mb")[done].dropna().tolist())
+        for mesh, rt in zip(_node_multiplier(df)[done], runtime):
+            if not math.isfinite(rt):
+                continue
+            if not math.isfinite(mesh):
+                key = "?"
+            else:
+                key = int(mesh) if float(mesh).is_integer() else float(mesh)
+            self.runtimes_by_mesh.setdefault(key, []).append(rt)
+
+        # Simulated time covered: from the restart time (0 for fresh runs) to
+        # the last time step the console watcher saw
+        sim = col("sim_time_last")[done] - col("restart_time")[done].fillna(0.0)
+        ok = cpu.notna() & (sim > 0)
+        self.cpu_sim_cpu += float(cpu[ok].sum())
+        self.cpu_sim_time += float(sim[ok].sum())
+
+    def runs_per_hour(self, now: float, window_sec: float) -> Optional[float]:
+        """Completed runs per hour over the last window_sec (or since the first one)."""
+        if not self.end_epochs:
+            return None
+        ends = np.asarray(self.end_epochs)
+        start = max(now - window_sec, float(ends.min()))
+        recent = int((ends >= start).sum())
+        span = now - start
+        if recent == 0 or span <= 0:
+            return None
+        return recent * 3600.0 / span
+
+    def logged_since(self, since: float) -> int:
+        return int((np.asarray(self.start_epochs) >= since).sum()) if self.start_epochs else 0
+
+
+# --- In-flight runs -----------------------------------------------------------
+
+def _parse_end_time(input_path: Path) -> Optional[float]:
+    """
+    end_time of a concrete input: the _t<end> tag run_launcher adds to runs cut
+    at a shorter horizon, else the [Executioner] block of the input or of the
+    files it !includes.
+    """
+    m = _HORIZON_TAG_RE.search(input_path.stem)
+    if m:
+        return float(m.group(1).replace("p", "."))
+    todo, seen = [input_path], set()
+    while todo:
+        path = todo.pop(0)
+        if path in seen or not path.exists():
+            continue
+        seen.add(path)
+        text = path.read_text(errors="replace")
+        m = _END_TIME_RE.search(text)
+        if m:
+            return float(m.group(1))
+        todo.extend(path.parent / inc for inc in _INCLUDE_RE.findall(text))
+    return None
+
+
+class ActiveRun:
+    """
+    One run directory whose SAM log is still growing. Its console log is fed
+    to a ConsoleWatcher and its output CSV read with a CsvTail, both from
+    where the previous refresh stopped.
+    """
+
+    def __init__(self, run_dir: Path, input_path: Path):
+        self.run_dir = run_dir
+        self.name = input_path.stem
+        self.log_path = input_path.with_suffix(".log")
+        self.csv_tail = CsvTail(input_path.with_name(self.name + "_csv.csv"))
+        self.watcher = ConsoleWatcher()  # only its counters are used here
+        self.end_time = _parse_end_time(input_path)
+        self.started = input_path.stat().st_mtime  # written right before SAM starts
+        self.first_sim_time: Optional[float] = None
+        self.sim_time: Optional[float] = None
+        self.last_change = self.started
+        self._log_offset = 0
+        self._log_partial = b""
+
+    def update(self) -> None:
+        if self.log_path.exists():
+            st = self.log_path.stat()
+            self.last_change = max(self.last_change, st.st_mtime)
+            if st.st_size < self._log_offset:  # log restarted: rerun in the same directory
+                self._log_offset, self._log_partial = 0, b""
+            if st.st_size > self._log_offset:
+                with self.log_path.open("rb") as f:
+                    f.seek(self._log_offset)
+                    chunk = f.read()
+                self._log_offset += len(chunk)
+                lines = (self._log_partial + chunk).split(b"\n")
+                self._log_partial = lines.pop()
+                for line in lines:
+                    self.watcher.feed(line.decode(errors="replace"))
+        for row in self.csv_tail.read():
+            t = row.get("time", row.get("Time"))
+            if t is not None and math.isfinite(t):
+                if self.first_sim_time is None:
+                    self.first_sim_time = t
+                self.sim_time = t
+        if self.watcher.sim_time_last is not None:
+            self.sim_time = max(self.sim_time or -math.inf, self.watcher.sim_time_last)
+            if self.first_sim_time is None:
+                self.first_sim_time = self.watcher.sim_time_last
+
+    def progress(self, now: float) -> Dict[str, Any]:
+        elapsed = now - self.started
+        t0 = self.first_sim_time or 0.0
+        frac = rate = eta = None
+        if self.sim_time is not None and elapsed > 0:
+            rate = (self.sim_time - t0) / elapsed  # simulated s per wall s
+            if self.end_time is not None and self.end_time > t0:
+                frac = min(1.0, max(0.0, (self.sim_time - t0) / (self.end_time - t0)))
+                if rate > 0:
+                    eta = (self.end_time - self.sim_time) / rate
+        return {
+            "name": self.name,
+            "sim_time": self.sim_time,
+            "end_time": self.end_time,
+            "fraction": frac,
+            "elapsed": elapsed,
+            "sim_rate": rate,
+            "eta": eta,
+            "dt": self.watcher.dt_last,
+            "failed": self.watcher.steps_failed,
+        }
+
+
+class RunsRootWatcher:
+    """
+    Finds the runs in flight under runs_root: a run directory counts while its
+    SAM log changed within stale_sec and after the run was last logged.
+    """
+
+    def __init__(self, runs_root: Path, stale_sec: float):
+        self.runs_root = Path(runs_root)
+        self.stale_sec = stale_sec
+        self.active: Dict[Path, ActiveRun] = {}
+
+    def update(self, now: float, last_end_by_input: Dict[str, float]) -> List[ActiveRun]:
+        if not self.runs_root.is_dir():
+            self.active.clear()
+            return []
+        seen = set()
+        with os.scandir(self.runs_root) as entries:
+            for entry in entries:
+                if not entry.is_dir():
+                    continue
+                run_dir = Path(entry.path)
+                log_path = run_dir / f"{entry.name}.log"
+                try:
+                    mtime = log_path.stat().st_mtime
+                except OSError:
+                    continue
+                input_path = run_dir / f"{entry.name}.i"
+                logged_end = last_end_by_input.get(str(input_path.resolve()),
+                                                   last_end_by_input.get(str(input_path), -math.inf))
+                # timestamp_end has 1 s resolution (and is taken after the log is closed)
+                if now - mtime > self.stale_sec or mtime < logged_end + 1.0:
+                    continue
+                seen.add(run_dir)
+                if run_dir not in self.active and input_path.exists():
+                    self.active[run_dir] = ActiveRun(run_dir, input_path)
+        for run_dir in list(self.active):
+            if run_dir not in seen:
+                del self.active[run_dir]
+        for run in self.active.values():
+            run.update()
+        return list(self.active.values())
+
+
+# --- Display ------------------------------------------------------------------
+
+def _print_summary(stats: LogStats, active: List[ActiveRun], now: float,
+                   total_runs: Optional[int] = None, since: Optional[float] = None):
+    """Print a textual summary of the logged and in-flight runs."""
+    cfg = CONFIG.get("monitor", {})
     print("=== SAM Optimizer Live Monitor ===")
-    print(f"Runtime log: {CONFIG['paths']['runtime_log']}")
+    print(f"Runtime log: {_log_location()}")
     print()
-    print(f"Total runs logged: {total}")
+    print(f"Total runs logged: {stats.total}")
     print("By status:")
-    for status in ["success", "fail", "timeout", "skipped"]:
-        print(f"  {status:8s}: {by_status.get(status, 0)}")
+    for status in ALL_STATUSES:
+        print(f"  {status:14s}: {stats.by_status.get(status, 0)}")
     print()
 
-    if n_completed > 0:
-        runtimes = completed["runtime_sec"]
+    if stats.runtimes:
+        runtimes = np.asarray(stats.runtimes)
         print("Completed run runtimes [s]:")
         print(f"  min   : {runtimes.min():.2f}")
-        print(f"  median: {runtimes.median():.2f}")
+        print(f"  median: {np.median(runtimes):.2f}")
         print(f"  max   : {runtimes.max():.2f}")
+        if stats.steady_times:
+            print(f"Steady-state stops: {len(stats.steady_times)} "
+                  f"(median steady time {np.median(stats.steady_times):.1f} s)")
+        if stats.cpu_util:
+            # well below 1.0 -> runs are waiting (oversubscribed node / I/O)
+            print(f"CPU time / wall time: median {np.median(stats.cpu_util):.2f}, min {min(stats.cpu_util):.2f}")
+        if stats.max_rss:
+            print(f"Peak RSS [MB]: median {np.median(stats.max_rss):.0f}, max {max(stats.max_rss):.0f}")
     else:
         print("No completed runs yet.")
 
+    rate = stats.runs_per_hour(now, float(cfg.get("rate_window_sec", 3600.0)))
+    print()
+    print(f"Throughput: {rate:.1f} runs/hour" if rate else "Throughput: -")
+    if stats.cpu_sim_time > 0:
+        print(f"CPU seconds per simulated second: {stats.cpu_sim_cpu / stats.cpu_sim_time:.3f}")
+
+    print()
+    print(f"In flight: {len(active)}")
+    for p in sorted((run.progress(now) for run in active), key=lambda p: p["name"]):
+        sim = "-" if p["sim_time"] is None else f"{p['sim_time']:.1f}"
+        end = "?" if p["end_time"] is None else f"{p['end_time']:g}"
+        pct = "" if p["fraction"] is None else f" {100 * p['fraction']:5.1f}%"
+        rate_str = "-" if p["sim_rate"] is None else f"{p['sim_rate']:.2f}"
+        dt = "-" if p["dt"] is None else f"{p['dt']:.2g}"
+        print(f"  {p['name'][:48]:48s} t={sim}/{end}{pct}  "
+              f"sim s/wall s={rate_str}  dt={dt}  failed={p['failed']}  "
+              f"elapsed={_fmt_duration(p['elapsed'])}  eta={_fmt_duration(p['eta'])}")
+
+    if total_runs:
+        done = stats.logged_since(since) if since is not None else stats.total
+        in_flight = sum((run.progress(now)["fraction"] or 0.0) for run in active)
+        remaining = max(0.0, total_runs - done - in_flight)
+        eta = remaining * 3600.0 / rate if rate else None
+        print()
+        print(f"Sweep: {done}/{total_runs} logged, {len(active)} in flight, "
+              f"ETA {_fmt_duration(eta) if remaining else 'done'}")
+
     print()
     print("Press Ctrl+C to exit.")
 
 
-def main(poll_interval: float = 5.0):
+def main(poll_interval: Optional[float] = None,
+         total_runs: Optional[int] = None,
+         since: Optional[str] = None,
+         once: bool = False):
     """
-    Periodically load the runtime log and print a summary.
+    Follow the runtime log and the runs in flight, and print a summary.
 
     Parameters
     ----------
-    poll_interval : float
-        Number of seconds between refreshes.
+    poll_interval : float or None
+        Number of seconds between refreshes; None -> CONFIG["monitor"]["poll_sec"].
+    total_runs : int or None
+        Number of runs in the sweep; enables the sweep ETA.
+    since : str or None
+        ISO timestamp (UTC) the sweep started at; runs logged before it don't
+        count towards total_runs. None -> every logged run counts.
+    once : bool
+        Print a single summary and return.
     """
+    cfg = CONFIG.get("monitor", {})
+    if poll_interval is None:
+        poll_interval = float(cfg.get("poll_sec", 5.0))
+    since_epoch = _to_epoch(since) if since else None
+
+    follower = _log_follower()
+    stats = LogStats()
+    runs = RunsRootWatcher(Path(CONFIG["paths"]["runs_root"]),
+                           stale_sec=float(cfg.get("stale_sec", 120.0)))
     try:
         while True:
-            _clear_screen()
-            df = _load_runtime_df()
-            if df is None:
+            if isinstance(follower, CsvLogFollower) and isinstance(_log_follower(), StoreFollower):
+                follower, stats = StoreFollower(), LogStats()  # the run store was created meanwhile
+            df, reset = follower.read()
+            if reset:
+                stats.reset()
+            stats.add(df)
+            now = time.time()
+            active = runs.update(now, stats.last_end_by_input)
+
+            if not once:
+                _clear_screen()
+            if df is None and stats.total == 0 and not active:
                 print("No runtime log found yet.")
-                print(f"Expected at: {CONFIG['paths']['runtime_log']}")
+                print(f"Expected at: {_log_location()}")
             else:
-                _print_summary(df)
+                _print_summary(stats, active, now, total_runs=total_runs, since=since_epoch)
+            if once:
+                return
             time.sleep(poll_interval)
     except KeyboardInterrupt:
         print("\nMonitor terminated by user.")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Live monitor for SAM optimizer runs.")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Seconds between refreshes (default: CONFIG['monitor']['poll_sec']).")
+    parser.add_argument("--total-runs", type=int, default=None,
+                        help="Number of runs in the sweep, for the sweep ETA.")
+    parser.add_argument("--since", type=str, default=None,
+                        help="ISO time (UTC) the sweep started; earlier runs don't count towards --total-runs.")
+    parser.add_argument("--once", action="store_true", help="Print one summary and exit.")
+    args = parser.parse_args()
+    main(poll_interval=args.interval, total_runs=args.total_runs, since=args.since, once=args.once)
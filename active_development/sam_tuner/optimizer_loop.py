@@ -8,8 +8,9 @@ This script can:
   1. "suggest" mode (default):
        - Load dataset (features + error + runtime) via data_handler.
        - Train surrogates (RandomForest) for error and runtime.
-       - Sample candidate hyperparameters from CONFIG["hyperparams_space"].
-       - Predict error + runtime for candidates.
+       - Stream candidate hyperparameters from CONFIG["hyperparams_space"]
+         (full grid, Sobol or Latin hypercube; see candidates.py) in blocks.
+       - Predict error + runtime for each block, keeping only the best ones.
        - Filter by runtime cap.
        - Print a ranked table of top candidates.
 
@@ -21,21 +22,41 @@ This script can:
            * Call run_sam_case(...) for one or more jsalt cases.
        - This gives a closed loop: learn from past runs, propose, then launch.
 
+  3. "suggest_batch" / "suggest_batch_and_run" modes:
+       - Use the spread over the forests' trees as uncertainty and pick a
+         diverse batch of q candidates (expected improvement with local
+         penalization, or Thompson sampling; see acquisition.py).
+       - In "suggest_batch_and_run", run the whole batch in parallel
+         (run_sam_cases) so one optimizer step fills every SAM slot.
+
+  4. "multifidelity" mode:
+       - Screen T_0 / h_amb / T_c / T_h candidates on the coarsest nodes_mult
+         and promote only the best 1/eta to each finer mesh (successive
+         halving), so few candidates ever run on the expensive meshes.
+
 Usage (from active_development):
 
     # Just print suggestions:
     python -m sam_tuner.optimizer_loop --mode suggest --top-k 10
 
+    # Propose 8 diverse candidates (one per parallel SAM slot) and run them:
+    python -m sam_tuner.optimizer_loop --mode suggest_batch_and_run --q 8 --cases jsalt1
+
+    # Screen 27 candidates at nodes_mult 6, promote the best third to 12, then 24:
+    python -m sam_tuner.optimizer_loop --mode multifidelity --n-initial 27 --eta 3 --rungs 6 12 24
+
+    # Score 65536 Sobol points instead of the full grid:
+    python -m sam_tuner.optimizer_loop --mode suggest --sampler sobol --n-samples 65536
+
     # Suggest and then actually run the top 3 candidates for jsalt1 and jsalt2:
     python -m sam_tuner.optimizer_loop --mode suggest_and_run --top-k 10 --n-run 3 --cases jsalt1 jsalt2
 """
 from __future__ import annotations
-from itertools import product
 from typing import List, Dict, Any, Tuple, Optional
-from .file_ops import organize_outputs
+from .file_ops import organize_outputs, collect_run_outputs
 from pathlib import Path
 
-import argparse, subprocess, shutil
+import argparse, shutil
 import numpy as np
 import pandas as pd
 
@@ -43,6 +64,9 @@ import pandas as pd
 from .config import CONFIG
 from .data_handler import (
     build_basic_dataset,
+    build_success_dataset,
+    run_analysis,
+    observation_from_run,
     FEATURE_COLUMNS,
     ERROR_COLUMN,
     RUNTIME_COLUMN_DEFAULT,
@@ -50,80 +74,38 @@ from .data_handler import (
 from .models import (
     fit_surrogates,
     predict_error_runtime,
+    predict_per_tree,
+    predict_with_uncertainty,
+    predict_success_proba,
+    fit_success_classifier,
+    load_or_fit_surrogates,
+    save_surrogates,
+    data_fingerprint,
     normalize_targets,
 )
-from .run_launcher import run_sam_case
+from .run_launcher import run_sam_case, run_sam_cases
+from .candidates import space_from_config, iter_candidate_blocks, TopK
+from .acquisition import (
+    expected_improvement,
+    prob_feasible,
+    select_batch_local_penalization,
+    select_batch_thompson,
+)
 
 
 # ---------------------------------------------------------------------------
 # Helper functions
 # ---------------------------------------------------------------------------
 
-def _default_feature_values(X: pd.DataFrame) -> Dict[str, Any]:
-    """
-    Compute a reasonable default value for each feature column based on the
-    training data. For now:
-
-      - numeric columns  -> median
-      - non-numeric cols -> mode (most frequent)
-
-    These defaults are used for features that we are NOT actively scanning
-    in the candidate grid (e.g. 'order' when we're only varying 'nodes_mult').
-    """
-    defaults: Dict[str, Any] = {}
-    for col in X.columns:
-        series = X[col]
-        if series.dtype.kind in "biufc":  # numeric types
-            defaults[col] = float(series.median())
-        else:
-            mode = series.mode()
-            defaults[col] = mode.iloc[0] if not mode.empty else None
-    return defaults
-
 def _generate_candidates_from_config(X_train: pd.DataFrame) -> pd.DataFrame:
     """
-    Generate a candidate grid of hyperparameters, focusing on the features in
-    FEATURE_COLUMNS and the ranges defined in CONFIG["hyperparams_space"].
-
-    Rules:
-      - If CONFIG["hyperparams_space"][feat] is a list/tuple of >2 elements:
-            use those values directly.
-      - If it's a 2-tuple (min, max):
-            create a small grid of values in [min, max].
-      - If feat is not in hyperparams_space:
-            hold it fixed at a default from X_train.
-    """
-    space = CONFIG["hyperparams_space"]
-    defaults = _default_feature_values(X_train)
-
-    feature_values: Dict[str, List[Any]] = {}
-
-    # how many grid points to use for continuous ranges
-    n_grid_default = 5
-
-    for feat in FEATURE_COLUMNS:
-        if feat in space:
-            val = space[feat]
-            # Range case: (min, max)
-            if isinstance(val, tuple) and len(val) == 2:
-                vmin, vmax = float(val[0]), float(val[1])
-                feature_values[feat] = np.linspace(vmin, vmax, n_grid_default).tolist()
-            else:
-                # Discrete set
-                feature_values[feat] = list(val) if isinstance(val, (list, tuple)) else [val]
-        else:
-            # Not tunable yet: keep at default
-            feature_values[feat] = [defaults.get(feat)]
-
-    keys = list(feature_values.keys())
-    grids = list(product(*[feature_values[k] for k in keys]))
-
-    rows = []
-    for combo in grids:
-        row = {k: v for k, v in zip(keys, combo)}
-        rows.append(row)
+    Materialize the full candidate grid as one DataFrame.
 
-    return pd.DataFrame(rows)
+    Kept for small spaces and interactive use; the optimizer itself streams
+    blocks from candidates.iter_candidate_blocks instead.
+    """
+    cs = space_from_config(X_train, FEATURE_COLUMNS)
+    return pd.concat(list(iter_candidate_blocks(cs, method="grid")), ignore_index=True)
 
 
 def _compute_scores(
@@ -139,6 +121,131 @@ def _compute_scores(
     w_rt = float(CONFIG["objective_weights"]["runtime"])
     return w_err * err_norm + w_rt * rt_norm
 
+def _fit_from_dataset(validation_df: Optional[pd.DataFrame] = None):
+    """
+    Load the dataset (X, y_error, y_runtime) and fit the surrogates on it.
+
+    validation_df: validation analysis table already in memory (e.g. from
+    _rerun_analysis_scripts); None -> read validation_analysis_full.csv.
+
+    Returns
+    -------
+    (X, y_err, y_rt, models)
+    """
+    X, y_err, y_rt = build_basic_dataset(
+        error_col=ERROR_COLUMN,
+        runtime_col=CONFIG.get("surrogates", {}).get("runtime_target", RUNTIME_COLUMN_DEFAULT),
+        drop_na_targets=True,
+        # merge_runtime=True,
+        merge_hyperparams=True, 
+        validation_df=validation_df,
+    )
+
+    print(f"[optimizer] Loaded dataset with {len(X)} rows.")
+
+    if len(X) == 0:
+        raise RuntimeError(
+            "No data available with both error and runtime. "
+            "Run some SAM sweeps, rerun csv_analysis.py, and try again."
+        )
+
+    # Reuses the forests stored by the previous call while the data is unchanged
+    models = load_or_fit_surrogates(X, y_err, y_rt)
+
+    # Third surrogate: P(success), trained on failed runs too
+    if CONFIG.get("success_model", {}).get("enabled", False):
+        X_all, y_success = build_success_dataset(feature_cols=list(X.columns))
+        if len(X_all) and list(X_all.columns) == list(X.columns):
+            fingerprint = data_fingerprint(X_all, y_success)
+            if models.success_fingerprint != fingerprint:
+                fit_success_classifier(models, X_all, y_success)
+                models.success_fingerprint = fingerprint
+                if CONFIG.get("surrogate_store", {}).get("enabled", False):
+                    save_surrogates(models)
+        else:
+            print("[optimizer] No usable run log for the success classifier; assuming P(success) = 1.")
+    return X, y_err, y_rt, models
+
+
+def _apply_success_model(models, block: pd.DataFrame, penalize: bool = True) -> pd.DataFrame:
+    """
+    Add 'p_success' to a scored candidate block and act on it
+    (CONFIG["success_model"]["mode"]):
+
+      "penalize": score += penalty * (1 - p_success) (only if penalize=True;
+                  the acquisition pool multiplies its acquisition by
+                  p_success instead and keeps 'score' the plain prediction)
+      "filter"  : drop rows with p_success < min_prob
+
+    Returns the (possibly smaller) block.
+    """
+    cfg = CONFIG.get("success_model", {})
+    p = predict_success_proba(models, block)
+    block["p_success"] = p
+    if not cfg.get("enabled", False):
+        return block
+    if cfg.get("mode", "penalize") == "filter":
+        return block[p >= float(cfg.get("min_prob", 0.5))].reset_index(drop=True)
+    if penalize:
+        block["score"] = block["score"] + float(cfg.get("penalty", 1.0)) * (1.0 - p)
+    return block
+
+
+def _candidate_hyperparams(row: pd.Series, case: str) -> Dict[str, Any]:
+    """
+    Map one candidate row (ML features) to run_sam_case hyperparameters for
+    `case`: ML feature 'nodes_mult' -> 'node_multiplier', T_0 / h_amb /
+    T_c / T_h from the candidate when it has them (so SAM runs the point
+    the surrogates scored), else from the case baseline.
+    """
+    nodes_mult = row.get("nodes_mult")
+    h_amb_val  = row.get("h_amb") if "h_amb" in row.index else None
+    T0_val     = row.get("T_0")   if "T_0" in row.index else None
+    Tc_val     = row.get("T_c")   if "T_c" in row.index else None
+    Th_val     = row.get("T_h")   if "T_h" in row.index else None
+
+    # Get case-specific baseline temps
+    temps_base = CONFIG["temps"]["base_by_case"].get(
+        case, CONFIG["temps"]["defaults"]
+    )
+    T_c_base = temps_base["T_c"]
+    T_h_base = temps_base["T_h"]
+    T0_base  = temps_base["T_0"]
+
+    # If the surrogate candidate has a T_0 column, use it; otherwise fall back to baseline
+    T0_used = float(T0_val) if T0_val is not None and not pd.isna(T0_val) else T0_base
+    T_c_used = float(Tc_val) if Tc_val is not None and not pd.isna(Tc_val) else T_c_base
+    T_h_used = float(Th_val) if Th_val is not None and not pd.isna(Th_val) else T_h_base
+
+    # If candidate has h_amb, use it; otherwise fall back to some default
+    if h_amb_val is None or pd.isna(h_amb_val):
+        h_amb_used = CONFIG["hyperparams_space"]["h_amb"][0]  # first value if list; adjust if using range
+    else:
+        h_amb_used = float(h_amb_val)
+
+    return {
+        "T_c": T_c_used,
+        "T_h": T_h_used,
+        "T_0": T0_used,
+        "h_amb": h_amb_used,
+        "node_multiplier": int(nodes_mult),
+        # later: "order": int(row["order"])
+    }
+
+
+def _run_key(row: pd.Series, case: str) -> Tuple:
+    """
+    Identity of a candidate as SAM sees it: the hyperparameters it renders
+    to for `case`. Candidates that differ only in features that
+    _candidate_hyperparams does not pass to SAM give the same run.
+    """
+    try:
+        hp = _candidate_hyperparams(row, case)
+    except (TypeError, ValueError):  # e.g. NaN nodes_mult
+        return tuple(row.get(c) for c in FEATURE_COLUMNS)
+    return tuple(sorted((k, round(float(v), 6)) for k, v in hp.items()))
+
+
 def _project_root() -> Path:
     """
     Return the active_development root directory (one level above sam_tuner).
@@ -161,10 +268,14 @@ def _analysis_dir() -> Path:
     return results_root
 
 
-def _rerun_analysis_scripts() -> None:
+def _rerun_analysis_scripts() -> pd.DataFrame:
     """
-    Re-run csv_maker.py and csv_analysis.py so that any new SAM runs launched
-    by suggest_and_run_mode are incorporated into validation_analysis_full.csv.
+    Re-run csv_maker and csv_analysis (in-process, data_handler.run_analysis)
+    so that any new SAM runs launched by suggest_and_run_mode are incorporated
+    into validation_analysis_full.csv.
+
+    Returns the refreshed validation analysis table, which can be handed to
+    _fit_from_dataset(validation_df=...) without reading the CSV back.
     """
     analysis_root = Path(CONFIG["paths"]["results_root"]) #/ "analysis"
     templates_dir = Path(CONFIG["paths"]["templates_dir"])
@@ -187,6 +298,13 @@ def _rerun_analysis_scripts() -> None:
     case_dir = Path(analysis_root) / "analysis" / analysis_subdir  # you must know the case name
     case_dir.mkdir(parents=True, exist_ok=True)
 
+    # 0. Pick up outputs from the per-run directories (current layout)
+    collect_run_outputs(
+        runs_root=Path(CONFIG["paths"]["runs_root"]),
+        dest_dir=case_dir,
+    )
+
+    # Leftovers from the old layout (runs written straight into Templates/)
     # 1. Remove *_cp* files
     for f in templates_dir.glob("*_cp*"):
         print(f"[optimizer] Removing leftover file: {f.name}")
@@ -203,8 +321,7 @@ def _rerun_analysis_scripts() -> None:
             shutil.move(str(f), str(dest))
         except Exception as e:
             print(f"[optimizer] WARNING: Could not move {f.name}: {e}")
-    subprocess.run(["python", "csv_maker.py"], cwd=str(analysis_root))
-    subprocess.run(["python", "csv_analysis.py"], cwd=str(analysis_root))
+    return run_analysis()
 
 
 # ---------------------------------------------------------------------------
@@ -214,24 +331,37 @@ def _rerun_analysis_scripts() -> None:
 def run_optimizer_v0(
     top_k: int = 10,
     return_df: bool = False,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+    validation_df: Optional[pd.DataFrame] = None,
 ) -> Tuple[Optional[pd.DataFrame], Optional[object]]:
     """
     Run the v0 optimizer:
 
       - Load dataset
       - Train surrogates
-      - Generate candidates from CONFIG
-      - Predict error + runtime for candidates
+      - Stream candidate blocks from CONFIG (candidates.py)
+      - Predict error + runtime per block
       - Filter by runtime cap
-      - Rank by score and print top_k
+      - Keep a running top list by score and print top_k
 
     Parameters
     ----------
     top_k : int
         Number of best candidates to print.
     return_df : bool
-        If True, return the full results DataFrame and the fitted models
+        If True, return the results DataFrame and the fitted models
         (for use in suggest_and_run). If False, just print and return (None, None).
+    method : str, optional
+        Candidate sampling: "grid", "sobol" or "lhs". Default: CONFIG["candidates"]["method"].
+    n_samples : int, optional
+        Number of candidates for "sobol"/"lhs". Default: CONFIG["candidates"]["n_samples"].
+    validation_df : pd.DataFrame, optional
+        Validation analysis table already in memory (pipeline stage 2);
+        None -> read validation_analysis_full.csv.
+
+    The results DataFrame holds only the best max(top_k, CONFIG["candidates"]["keep_top"])
+    candidates, sorted best first.
 
     Returns
     -------
@@ -239,78 +369,70 @@ def run_optimizer_v0(
     """
     print("=== SAM Optimizer v0: Surrogate-based recommender ===")
 
-    # 1) Load dataset (X, y_error, y_runtime)
-    X, y_err, y_rt = build_basic_dataset(
-        error_col=ERROR_COLUMN,
-        runtime_col=RUNTIME_COLUMN_DEFAULT,
-        drop_na_targets=True,
-        # merge_runtime=True,
-        merge_hyperparams=True, 
-    )
-
-    print(f"[optimizer] Loaded dataset with {len(X)} rows.")
-
-    if len(X) == 0:
-        raise RuntimeError(
-            "No data available with both error and runtime. "
-            "Run some SAM sweeps, rerun csv_analysis.py, and try again."
-        )
+    # 1-2) Load dataset and fit surrogates
+    X, y_err, y_rt, models = _fit_from_dataset(validation_df)
 
-    # 2) Fit surrogates
-    models = fit_surrogates(X, y_err, y_rt)
-
-    # 3) Generate candidate hyperparams
-    df_candidates = _generate_candidates_from_config(X)
-    print(f"[optimizer] Generated {len(df_candidates)} candidate hyperparameter combos.")
-    print(df_candidates.head())
-
-    # 4) Predict error + runtime for candidates
-    err_pred, rt_pred = predict_error_runtime(models, df_candidates)
-    err_norm, rt_norm = normalize_targets(models, err_pred, rt_pred)
+    # 3) Describe the candidate space (nothing is materialized yet)
+    cand_cfg = CONFIG.get("candidates", {})
+    method = method or cand_cfg.get("method", "grid")
+    cs = space_from_config(X, FEATURE_COLUMNS)
+    if method == "grid":
+        n_total = cs.grid_size(int(cand_cfg.get("n_grid", 5)))
+    else:
+        n_total = int(n_samples or cand_cfg.get("n_samples", 4096))
+    print(f"[optimizer] Candidate space: method={method}, {n_total} candidate hyperparameter combos.")
 
-    # 5) Apply runtime cap
+    # 4-6) Stream candidate blocks: predict, score, keep the best `keep` rows
     runtime_cap = float(CONFIG["runtime_limits"]["absolute_sec"])
-    feasible_mask = rt_pred <= runtime_cap
-    num_feasible = int(feasible_mask.sum())
-
+    keep = max(int(top_k), int(cand_cfg.get("keep_top", 256)))
+    best = TopK(keep)
+    n_scored = 0
+
+    for block in iter_candidate_blocks(cs, method=method, n_samples=n_samples):
+        err_pred, rt_pred = predict_error_runtime(models, block)
+        err_norm, rt_norm = normalize_targets(models, err_pred, rt_pred)
+
+        block["pred_error"] = err_pred
+        block["pred_runtime"] = rt_pred
+        block["err_norm"] = err_norm
+        block["rt_norm"] = rt_norm
+        block["score"] = _compute_scores(err_norm, rt_norm)
+        block["feasible_runtime"] = rt_pred <= runtime_cap
+        n_scored += len(block)
+        block = _apply_success_model(models, block)
+        best.push(block)
+
+    num_feasible = best.n_feasible
     print(f"[optimizer] Runtime cap: {runtime_cap:.2f} s")
-    print(f"[optimizer] Feasible candidates (pred runtime <= cap): {num_feasible}/{len(df_candidates)}")
+    if best.n_seen < n_scored:
+        print(f"[optimizer] Pruned {n_scored - best.n_seen}/{n_scored} candidates "
+              f"with P(success) < {CONFIG['success_model'].get('min_prob', 0.5)}")
+    print(f"[optimizer] Feasible candidates (pred runtime <= cap): {num_feasible}/{best.n_seen}")
+
+    # Best first: feasible, then by score ascending
+    df_results = best.result()
 
     if num_feasible == 0:
         print("[optimizer] WARNING: No candidates satisfy the runtime cap based on surrogate predictions.")
-        # Still compute scores; treat all as 'feasible' for ranking purposes.
-        feasible_mask = np.ones_like(rt_pred, dtype=bool)
-
-    # 6) Compute scores and rank
-    scores = _compute_scores(err_norm, rt_norm)
-
-    df_results = df_candidates.copy()
-    df_results["pred_error"] = err_pred
-    df_results["pred_runtime"] = rt_pred
-    df_results["err_norm"] = err_norm
-    df_results["rt_norm"] = rt_norm
-    df_results["score"] = scores
-    df_results["feasible_runtime"] = feasible_mask
-
-    # Sort: feasible first, then by score ascending
-    df_results = df_results.sort_values(
-        by=["feasible_runtime", "score"],
-        ascending=[False, True],
-    ).reset_index(drop=True)
+        # Rows are still ranked by score; treat all as 'feasible' for ranking purposes.
+        df_results["feasible_runtime"] = True
 
     print("\n=== Top candidate hyperparameters (surrogate-based) ===")
     n_show = min(top_k, len(df_results))
     print(
         df_results.head(n_show)[
             FEATURE_COLUMNS
-            + ["pred_error", "pred_runtime", "score", "feasible_runtime"]
+            + ["pred_error", "pred_runtime", "p_success", "score", "feasible_runtime"]
         ]
     )
 
     print("\nInterpretation:")
     print("  - 'pred_error'   : surrogate-predicted error (e.g., RMSE in K).")
     print("  - 'pred_runtime' : surrogate-predicted runtime in seconds.")
+    print("  - 'p_success'    : predicted probability that SAM finishes the run (fail/timeout/diverged otherwise).")
     print("  - 'score'        : weighted combination of normalized error and runtime; lower is better.")
+    if CONFIG.get("success_model", {}).get("mode", "penalize") == "penalize":
+        print("                     (plus a penalty for likely failures).")
     print("  - 'feasible_runtime' : True if pred_runtime <= runtime cap.")
 
     if return_df:
@@ -326,10 +448,18 @@ def suggest_and_run_mode(
     top_k_suggest: int = 10,
     n_run: int = 3,
     cases: Optional[List[str]] = None,
+    force_rerun: bool = False,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+    validation_df: Optional[pd.DataFrame] = None,
 ) -> None:
     """
     Run optimizer v0 to get suggestions, then actually launch SAM runs for
     the top N feasible candidates.
+
+    Candidates that were already simulated come straight from the result
+    cache unless force_rerun is True. validation_df is passed on to
+    run_optimizer_v0.
     """
     if cases is None or len(cases) == 0:
         cases = ["jsalt1"]
@@ -338,7 +468,10 @@ def suggest_and_run_mode(
     print(f"[suggest_and_run] Cases to run: {cases}")
     print(f"[suggest_and_run] Will consider top {top_k_suggest} candidates and run up to {n_run} of them.")
 
-    df_results, _models = run_optimizer_v0(top_k=top_k_suggest, return_df=True)
+    df_results, _models = run_optimizer_v0(
+        top_k=top_k_suggest, return_df=True, method=method, n_samples=n_samples,
+        validation_df=validation_df,
+    )
 
     if df_results is None or df_results.empty:
         print("[suggest_and_run] No optimizer results available.")
@@ -362,8 +495,6 @@ def suggest_and_run_mode(
     for idx in range(n_actual):
         row = feasible.iloc[idx]
         nodes_mult = row.get("nodes_mult")
-        h_amb_val  = row.get("h_amb") if "h_amb" in row.index else None
-        T0_val     = row.get("T_0")   if "T_0" in row.index else None
 
         print("\n--------------------------------------------------")
         print(f"[suggest_and_run] Candidate #{idx+1}:")
@@ -374,31 +505,7 @@ def suggest_and_run_mode(
             continue
 
         for case in cases:
-            # Get case-specific baseline temps
-            temps_base = CONFIG["temps"]["base_by_case"].get(
-                case, CONFIG["temps"]["defaults"]
-            )
-            T_c_base = temps_base["T_c"]
-            T_h_base = temps_base["T_h"]
-            T0_base  = temps_base["T_0"]
-
-            # If the surrogate candidate has a T_0 column, use it; otherwise fall back to baseline
-            T0_used = float(T0_val) if T0_val is not None and not pd.isna(T0_val) else T0_base
-
-            # If candidate has h_amb, use it; otherwise fall back to some default
-            if h_amb_val is None or pd.isna(h_amb_val):
-                h_amb_used = CONFIG["hyperparams_space"]["h_amb"][0]  # first value if list; adjust if using range
-            else:
-                h_amb_used = float(h_amb_val)
-
-            hyperparams = {
-                "T_c": T_c_base,
-                "T_h": T_h_base,
-                "T_0": T0_used,
-                "h_amb": h_amb_used,
-                "node_multiplier": int(nodes_mult),
-                # later: "order": int(row["order"])
-            }
+            hyperparams = _candidate_hyperparams(row, case)
 
             template_name = f"{case}.i"
             print(
@@ -412,6 +519,7 @@ def suggest_and_run_mode(
                     template_name=template_name,
                     hyperparams=hyperparams,
                     timeout_sec=runtime_cap,
+                    force_rerun=force_rerun,
                 )
                 print(f"[suggest_and_run] Run summary for {case}:")
                 for k, v in summary.items():
@@ -425,6 +533,470 @@ def suggest_and_run_mode(
 
 
 
+# ---------------------------------------------------------------------------
+# Batch mode (uncertainty-aware)
+# ---------------------------------------------------------------------------
+
+def _score_with_uncertainty(models, df: pd.DataFrame):
+    """
+    Score mean and standard deviation for candidate rows.
+
+    The score is _compute_scores() of the normalized tree means; its sigma
+    combines the normalized tree spreads of both forests (treated as
+    independent).
+
+    Returns
+    -------
+    (err_mu, err_sd, rt_mu, rt_sd, mu, sigma) : tuple of np.ndarray
+    """
+    w_err = float(CONFIG["objective_weights"]["error"])
+    w_rt = float(CONFIG["objective_weights"]["runtime"])
+    err_scale = (models.error_max - models.error_min) or 1.0
+    rt_scale = (models.runtime_max - models.runtime_min) or 1.0
+
+    err_mu, err_sd, rt_mu, rt_sd = predict_with_uncertainty(models, df)
+    err_norm, rt_norm = normalize_targets(models, err_mu, rt_mu)
+    mu = _compute_scores(err_norm, rt_norm)
+    sigma = np.sqrt((w_err * err_sd / err_scale) ** 2 + (w_rt * rt_sd / rt_scale) ** 2)
+    return err_mu, err_sd, rt_mu, rt_sd, mu, sigma
+
+
+def _acquisition_pool(
+    models,
+    X: pd.DataFrame,
+    y_err: pd.Series,
+    y_rt: pd.Series,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+    pool_size: Optional[int] = None,
+    fixed: Optional[Dict[str, Any]] = None,
+):
+    """
+    Stream all candidates and keep the pool_size best by
+    EI * P(runtime <= cap) * P(success).
+
+    EI is measured against the best score among the training runs that met
+    the runtime cap; the score's sigma combines the tree spread of both
+    forests. Features in `fixed` are held at the given value instead of
+    being scanned (e.g. {"nodes_mult": 24}).
+
+    Returns
+    -------
+    (df_pool, cs, best) : (pd.DataFrame, CandidateSpace, float)
+        Pool sorted by acquisition (best first), the candidate space (for
+        unit coordinates) and the incumbent score.
+    """
+    batch_cfg = CONFIG.get("batch", {})
+    cand_cfg = CONFIG.get("candidates", {})
+    pool_size = int(pool_size or batch_cfg.get("pool_size", 512))
+    xi = float(batch_cfg.get("xi", 0.0))
+    runtime_cap = float(CONFIG["runtime_limits"]["absolute_sec"])
+
+    # Incumbent: best score among training runs that met the runtime cap
+    err_n, rt_n = normalize_targets(models, y_err.to_numpy(dtype=float), y_rt.to_numpy(dtype=float))
+    train_scores = _compute_scores(err_n, rt_n)
+    ok = y_rt.to_numpy(dtype=float) <= runtime_cap
+    best = float(np.min(train_scores[ok] if ok.any() else train_scores))
+    print(f"[optimizer] Best observed score: {best:.4f}")
+
+    # Stream candidates, keep the pool with the highest acquisition
+    method = method or cand_cfg.get("method", "grid")
+    cs = space_from_config(X, FEATURE_COLUMNS)
+    for feat, val in (fixed or {}).items():
+        cs.ranges.pop(feat, None)
+        cs.choices.pop(feat, None)
+        cs.fixed[feat] = val
+    pool = TopK(pool_size, by="acq", ascending=False)
+    for block in iter_candidate_blocks(cs, method=method, n_samples=n_samples):
+        err_mu, err_sd, rt_mu, rt_sd, mu, sigma = _score_with_uncertainty(models, block)
+        ei = expected_improvement(mu, sigma, best, xi=xi)
+        p_feas = prob_feasible(rt_mu, rt_sd, runtime_cap)
+
+        block["pred_error"] = err_mu
+        block["pred_runtime"] = rt_mu
+        block["err_std"] = err_sd
+        block["rt_std"] = rt_sd
+        block["score"] = mu
+        block["score_std"] = sigma
+        block["ei"] = ei
+        block["p_feasible"] = p_feas
+        block["acq"] = ei * p_feas
+        # ranking is on acq, which already accounts for the cap
+        block["feasible_runtime"] = True
+        block = _apply_success_model(models, block, penalize=False)
+        block["acq"] = block["acq"] * block["p_success"]
+        pool.push(block)
+
+    df_pool = pool.result()
+    df_pool["feasible_runtime"] = df_pool["pred_runtime"] <= runtime_cap
+    print(f"[optimizer] Scored {pool.n_seen} candidates ({method}); pool of {len(df_pool)} kept.")
+
+    return df_pool, cs, best
+
+
+def suggest_batch(
+    q: Optional[int] = None,
+    acquisition: Optional[str] = None,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Propose a diverse batch of q candidates for one round of parallel runs.
+
+    Unlike run_optimizer_v0 (which ranks by the surrogates' point
+    prediction and so keeps proposing neighbours of what is already known),
+    this uses the spread over the forests' trees as uncertainty:
+
+      - Stream all candidates (candidates.py) and keep the pool_size best by
+        EI(score) * P(runtime <= cap), EI measured against the best score
+        among the training runs that met the runtime cap.
+      - Pick q rows from that pool with
+          "lp"       : local penalization (diverse greedy EI batch), or
+          "thompson" : one random tree per forest per pick.
+
+    Parameters
+    ----------
+    q : int, optional
+        Batch size. Default: CONFIG["batch"]["q"], or the number of parallel
+        SAM slots (CONFIG["parallel"]["max_workers"]) if that is None.
+    acquisition : str, optional
+        "lp" or "thompson". Default: CONFIG["batch"]["acquisition"].
+    method, n_samples : optional
+        Candidate sampling, as in run_optimizer_v0.
+
+    Returns
+    -------
+    pd.DataFrame
+        The batch in pick order, with the candidate features plus pred_error,
+        pred_runtime (means), err_std, rt_std, score, score_std, ei,
+        p_feasible, acq and feasible_runtime.
+    """
+    batch_cfg = CONFIG.get("batch", {})
+    if q is None:
+        q = batch_cfg.get("q") or CONFIG.get("parallel", {}).get("max_workers") or 4
+    acquisition = acquisition or batch_cfg.get("acquisition", "lp")
+    if acquisition not in ("lp", "thompson"):
+        raise ValueError(f"Unknown batch acquisition: {acquisition!r}")
+    pool_size = max(int(q), int(batch_cfg.get("pool_size", 512)))
+    w_err = float(CONFIG["objective_weights"]["error"])
+    w_rt = float(CONFIG["objective_weights"]["runtime"])
+    runtime_cap = float(CONFIG["runtime_limits"]["absolute_sec"])
+
+    print(f"=== SAM Optimizer: batch suggestion (q={q}, acquisition={acquisition}) ===")
+
+    X, y_err, y_rt, models = _fit_from_dataset()
+    df_pool, cs, best = _acquisition_pool(
+        models, X, y_err, y_rt, method=method, n_samples=n_samples, pool_size=pool_size,
+    )
+
+    if acquisition == "lp":
+        picks = select_batch_local_penalization(
+            acq=df_pool["acq"].to_numpy(),
+            mu=df_pool["score"].to_numpy(),
+            sigma=df_pool["score_std"].to_numpy(),
+            coords=cs.unit_coords(df_pool),
+            best=best,
+            q=q,
+        )
+    else:
+        err_trees, rt_trees = predict_per_tree(models, df_pool)
+        picks = select_batch_thompson(
+            err_trees, rt_trees,
+            err_range=(models.error_min, models.error_max),
+            rt_range=(models.runtime_min, models.runtime_max),
+            w_err=w_err, w_rt=w_rt,
+            runtime_cap=runtime_cap,
+            q=q,
+            seed=batch_cfg.get("seed"),
+        )
+
+    df_batch = df_pool.iloc[picks].reset_index(drop=True)
+
+    print(f"\n=== Batch of {len(df_batch)} candidates ===")
+    print(
+        df_batch[
+            FEATURE_COLUMNS
+            + ["pred_error", "pred_runtime", "score", "score_std", "ei", "p_feasible"]
+        ]
+    )
+    return df_batch
+
+
+def suggest_batch_and_run_mode(
+    q: Optional[int] = None,
+    acquisition: Optional[str] = None,
+    cases: Optional[List[str]] = None,
+    force_rerun: bool = False,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Propose a batch with suggest_batch() and run all of it (every candidate
+    for every case) at once via run_sam_cases, so one optimizer step fills
+    the parallel SAM slots.
+
+    Returns
+    -------
+    list of dict
+        Run summaries in completion order.
+    """
+    if cases is None or len(cases) == 0:
+        cases = ["jsalt1"]
+
+    df_batch = suggest_batch(q=q, acquisition=acquisition, method=method, n_samples=n_samples)
+    runtime_cap = float(CONFIG["runtime_limits"]["absolute_sec"])
+
+    batch = []
+    for _, row in df_batch.iterrows():
+        if pd.isna(row.get("nodes_mult")):
+            print("[suggest_batch] WARNING: nodes_mult is NaN for this candidate; skipping.")
+            continue
+        for case in cases:
+            batch.append({
+                "case_name": case,
+                "template_name": f"{case}.i",
+                "hyperparams": _candidate_hyperparams(row, case),
+                "timeout_sec": runtime_cap,
+                "force_rerun": force_rerun,
+            })
+
+    def _report(summary: Dict[str, Any]) -> None:
+        print(
+            f"[suggest_batch] {summary.get('case')}: status={summary.get('status')} "
+            f"runtime={summary.get('runtime_sec')} "
+            f"input={Path(str(summary.get('sam_input_path', ''))).name or summary.get('error')}"
+        )
+
+    results = run_sam_cases(batch, on_result=_report)
+
+    if batch:
+        _rerun_analysis_scripts()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Multi-fidelity mode (successive halving over nodes_mult)
+# ---------------------------------------------------------------------------
+
+def _rung_scores(
+    models,
+    summaries: List[Dict[str, Any]],
+    n_candidates: int,
+) -> Tuple[np.ndarray, List[List[Dict[str, float]]], float]:
+    """
+    Observed score per candidate for one rung.
+
+    Each summary carries batch_tag = (candidate index, case). A candidate's
+    score is the mean over its cases of _compute_scores() of the observed,
+    normalized error and runtime; a candidate with any unusable run (failed,
+    diverged, no output) gets +inf.
+
+    Returns
+    -------
+    (scores, observations, cpu_sec)
+        scores per candidate, the usable observations per candidate, and
+        the CPU seconds spent (wall time where CPU time wasn't logged).
+    """
+    runtime_col = CONFIG.get("surrogates", {}).get("runtime_target", RUNTIME_COLUMN_DEFAULT)
+    per_cand: List[List[float]] = [[] for _ in range(n_candidates)]
+    observations: List[List[Dict[str, float]]] = [[] for _ in range(n_candidates)]
+    failed = np.zeros(n_candidates, dtype=bool)
+    cpu_sec = 0.0
+
+    for summary in summaries:
+        idx, _case = summary["batch_tag"]
+        if not summary.get("cache_hit"):
+            cost = summary.get("cpu_sec")
+            if cost is None or pd.isna(cost):
+                cost = summary.get("runtime_sec")
+            cpu_sec += float(cost or 0.0)
+
+        obs = observation_from_run(summary, runtime_col=runtime_col)
+        if obs is None or pd.isna(obs[ERROR_COLUMN]) or pd.isna(obs[runtime_col]):
+            failed[idx] = True
+            continue
+        err_norm, rt_norm = normalize_targets(
+            models, np.array([obs[ERROR_COLUMN]]), np.array([float(obs[runtime_col])])
+        )
+        per_cand[idx].append(float(_compute_scores(err_norm, rt_norm)[0]))
+        observations[idx].append(obs)
+
+    scores = np.array([np.mean(v) if v and not failed[i] else np.inf for i, v in enumerate(per_cand)])
+    return scores, observations, cpu_sec
+
+
+def multifidelity_mode(
+    n_initial: Optional[int] = None,
+    eta: Optional[int] = None,
+    rungs: Optional[List[int]] = None,
+    promote_by: Optional[str] = None,
+    cases: Optional[List[str]] = None,
+    force_rerun: bool = False,
+    method: Optional[str] = None,
+    n_samples: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Successive halving with nodes_mult as the fidelity axis.
+
+    The surrogates already model error and runtime as functions of
+    (hyperparams, nodes_mult). This mode:
+
+      1. Picks n_initial diverse, promising T_0 / h_amb / T_c / T_h
+         candidates (EI with local penalization, nodes_mult held at the
+         finest rung, i.e. what we actually want to be good).
+      2. Runs all of them on the coarsest rung (cheap), in parallel.
+      3. Keeps the best 1/eta and promotes them to the next rung, until the
+         finest rung. Promotion ranks by
+           "observed"  : the score measured on the current rung, or
+           "predicted" : the surrogates' score at the finest rung after
+                         refitting with the runs just made (a simple
+                         multi-fidelity acquisition).
+
+    Only a handful of candidates ever run on the fine (expensive) mesh; the
+    CPU time spent is compared with running every initial candidate at the
+    finest rung.
+
+    Parameters
+    ----------
+    n_initial : int, optional
+        Candidates on the first rung. Default: CONFIG["multifidelity"]["n_initial"].
+    eta : int, optional
+        Keep 1/eta of the candidates per rung. Default: CONFIG["multifidelity"]["eta"].
+    rungs : list of int, optional
+        nodes_mult per rung, coarse to fine. Default: CONFIG["multifidelity"]
+        ["rungs"], else the sorted nodes_mult values of hyperparams_space.
+    promote_by : str, optional
+        "observed" or "predicted". Default: CONFIG["multifidelity"]["promote_by"].
+    cases : list of str, optional
+        Cases every candidate is run on. Default: ["jsalt1"].
+    force_rerun : bool
+        Launch SAM even when a cached result exists.
+    method, n_samples : optional
+        Candidate sampling, as in run_optimizer_v0.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per initial candidate: its features, the observed score on
+        every rung it reached (score_nm<rung>) and the last rung reached,
+        best candidates first.
+    """
+    mf_cfg = CONFIG.get("multifidelity", {})
+    n_initial = int(n_initial or mf_cfg.get("n_initial", 27))
+    eta = max(2, int(eta or mf_cfg.get("eta", 3)))
+    rungs = rungs or mf_cfg.get("rungs") or sorted(CONFIG["hyperparams_space"]["nodes_mult"])
+    rungs = [int(r) for r in rungs]
+    promote_by = promote_by or mf_cfg.get("promote_by", "observed")
+    if promote_by not in ("observed", "predicted"):
+        raise ValueError(f"Unknown promote_by: {promote_by!r}")
+    if not cases:
+        cases = ["jsalt1"]
+    runtime_cap = float(CONFIG["runtime_limits"]["absolute_sec"])
+
+    print("=== SAM Optimizer: multi-fidelity successive halving ===")
+    print(f"[multifidelity] Rungs (nodes_mult): {rungs}; n_initial={n_initial}; eta={eta}; "
+          f"promote_by={promote_by}; cases={cases}")
+
+    X, y_err, y_rt, models = _fit_from_dataset()
+
+    # 1) Initial candidates, judged at the finest fidelity
+    df_pool, cs, best = _acquisition_pool(
+        models, X, y_err, y_rt, method=method, n_samples=n_samples,
+        pool_size=max(n_initial, int(CONFIG.get("batch", {}).get("pool_size", 512))),
+        fixed={"nodes_mult": rungs[-1]},
+    )
+    # one pool row per distinct SAM run (the pool is sorted best first)
+    run_keys = pd.Series([_run_key(row, cases[0]) for _, row in df_pool.iterrows()])
+    df_pool = df_pool[~run_keys.duplicated().to_numpy()].reset_index(drop=True)
+    picks = select_batch_local_penalization(
+        acq=df_pool["acq"].to_numpy(),
+        mu=df_pool["score"].to_numpy(),
+        sigma=df_pool["score_std"].to_numpy(),
+        coords=cs.unit_coords(df_pool),
+        best=best,
+        q=n_initial,
+    )
+    candidates = df_pool.iloc[picks].reset_index(drop=True)
+    n_cand = len(candidates)
+    # what running every initial candidate on the finest mesh would cost
+    full_cost = float(candidates["pred_runtime"].sum()) * len(cases)
+
+    # nodes_mult is the fidelity axis: its values are the score_nm* columns
+    history = candidates[[c for c in FEATURE_COLUMNS if c != "nodes_mult"]].copy()
+    history["last_rung"] = np.nan
+    alive = np.arange(n_cand)
+    cpu_total = 0.0
+    # scores on every rung use the starting models' normalization, so they
+    # stay comparable when promote_by="predicted" refits
+    score_models = models
+
+    for r, nm in enumerate(rungs):
+        print(f"\n[multifidelity] Rung {r}: nodes_mult={nm}, {len(alive)} candidate(s) x {len(cases)} case(s)")
+        batch = []
+        for i in alive:
+            row = candidates.iloc[i].copy()
+            row["nodes_mult"] = nm
+            for case in cases:
+                batch.append({
+                    "case_name": case,
+                    "template_name": f"{case}.i",
+                    "hyperparams": _candidate_hyperparams(row, case),
+                    "timeout_sec": runtime_cap,
+                    "force_rerun": force_rerun,
+                    "tag": (int(i), case),
+                })
+        summaries = run_sam_cases(batch)
+
+        scores, observations, cpu_sec = _rung_scores(score_models, summaries, n_cand)
+        cpu_total += cpu_sec
+        history.loc[alive, f"score_nm{nm}"] = scores[alive]
+        history.loc[alive, "last_rung"] = nm
+        n_ok = int(np.isfinite(scores[alive]).sum())
+        print(f"[multifidelity] Rung {r} done: {n_ok}/{len(alive)} usable, {cpu_sec:.1f} CPU-s")
+
+        if r == len(rungs) - 1 or n_ok == 0:
+            break
+
+        n_keep = max(1, len(alive) // eta)
+        if promote_by == "predicted":
+            new_obs = [o for i in alive for o in observations[i]]
+            if new_obs:
+                runtime_col = y_rt.name
+                df_new = pd.DataFrame(new_obs)
+                X = pd.concat([X, df_new[X.columns]], ignore_index=True)
+                y_err = pd.concat([y_err, df_new[ERROR_COLUMN].rename(y_err.name)], ignore_index=True)
+                y_rt = pd.concat([y_rt, df_new[runtime_col].rename(y_rt.name)], ignore_index=True)
+                models = fit_surrogates(X, y_err, y_rt)
+            at_top = candidates.loc[alive, FEATURE_COLUMNS].copy()
+            at_top["nodes_mult"] = rungs[-1]
+            err_pred, rt_pred = predict_error_runtime(models, at_top)
+            rank_key = _compute_scores(*normalize_targets(models, err_pred, rt_pred))
+            rank_key = np.where(np.isfinite(scores[alive]), rank_key, np.inf)
+        else:
+            rank_key = scores[alive]
+        order = np.argsort(rank_key, kind="stable")
+        alive = np.array([alive[j] for j in order[:n_keep] if np.isfinite(rank_key[j])])
+        if len(alive) == 0:
+            break
+
+    final_col = [c for c in history.columns if c.startswith("score_nm")][-1]
+    history = history.sort_values(
+        by=["last_rung", final_col], ascending=[False, True], na_position="last"
+    ).reset_index(drop=True)
+
+    print("\n=== Multi-fidelity results (best first) ===")
+    print(history.head(10))
+    if cpu_total > 0:
+        print(
+            f"[multifidelity] CPU time spent: {cpu_total:.1f} s "
+            f"(vs ~{full_cost:.1f} s predicted for all {n_cand} candidates at nodes_mult={rungs[-1]}; "
+            f"{full_cost / cpu_total:.1f}x less)"
+        )
+
+    _rerun_analysis_scripts()
+    return history
+
+
 # ---------------------------------------------------------------------------
 # CLI entrypoint
 # ---------------------------------------------------------------------------
@@ -436,12 +1008,18 @@ def main():
     parser.add_argument(
         "--mode",
         type=str,
-        choices=["suggest", "suggest_and_run"],
+        choices=["suggest", "suggest_and_run", "suggest_batch", "suggest_batch_and_run", "multifidelity"],
         default="suggest",
         help=(
             "Run mode:\n"
             "  'suggest'         : train surrogates and print ranked candidates.\n"
             "  'suggest_and_run' : suggest, then run the top N candidates.\n"
+            "  'suggest_batch'   : propose a diverse batch of q candidates using the\n"
+            "                      surrogates' uncertainty (EI + local penalization\n"
+            "                      or Thompson sampling).\n"
+            "  'suggest_batch_and_run' : propose the batch and run it in parallel.\n"
+            "  'multifidelity'   : screen candidates on coarse meshes and promote the\n"
+            "                      best to finer nodes_mult (successive halving).\n"
             "Default: suggest."
         ),
     )
@@ -463,16 +1041,108 @@ def main():
         default=None,
         help="Case names to run (e.g. jsalt1 jsalt2). If omitted, defaults to ['jsalt1'].",
     )
+    parser.add_argument(
+        "--force-rerun",
+        action="store_true",
+        help="Launch SAM even for candidates that already have a cached result.",
+    )
+
+    parser.add_argument(
+        "--sampler",
+        type=str,
+        choices=["grid", "sobol", "lhs"],
+        default=None,
+        help="Candidate sampling method. Default: CONFIG['candidates']['method'].",
+    )
+    parser.add_argument(
+        "--n-samples",
+        type=int,
+        default=None,
+        help="Number of candidates for --sampler sobol/lhs. Default: CONFIG['candidates']['n_samples'].",
+    )
+
+    parser.add_argument(
+        "--q",
+        type=int,
+        default=None,
+        help="Batch size for the batch modes. Default: CONFIG['batch']['q'] or the parallel slots.",
+    )
+    parser.add_argument(
+        "--acquisition",
+        type=str,
+        choices=["lp", "thompson"],
+        default=None,
+        help="Batch selection: local penalization or Thompson sampling. Default: CONFIG['batch'].",
+    )
+
+    parser.add_argument(
+        "--n-initial",
+        type=int,
+        default=None,
+        help="multifidelity: candidates on the coarsest rung. Default: CONFIG['multifidelity'].",
+    )
+    parser.add_argument(
+        "--eta",
+        type=int,
+        default=None,
+        help="multifidelity: keep 1/eta of the candidates per rung. Default: CONFIG['multifidelity'].",
+    )
+    parser.add_argument(
+        "--rungs",
+        nargs="*",
+        type=int,
+        default=None,
+        help="multifidelity: nodes_mult per rung, coarse to fine (e.g. 6 12 24).",
+    )
+    parser.add_argument(
+        "--promote-by",
+        type=str,
+        choices=["observed", "predicted"],
+        default=None,
+        help="multifidelity: rank for promotion by the observed score or the refit "
+             "surrogates' prediction at the finest rung.",
+    )
 
     args = parser.parse_args()
 
-    if args.mode == "suggest":
-        run_optimizer_v0(top_k=args.top_k, return_df=False)
+    if args.mode == "multifidelity":
+        multifidelity_mode(
+            n_initial=args.n_initial,
+            eta=args.eta,
+            rungs=args.rungs,
+            promote_by=args.promote_by,
+            cases=args.cases,
+            force_rerun=args.force_rerun,
+            method=args.sampler,
+            n_samples=args.n_samples,
+        )
+    elif args.mode == "suggest_batch":
+        suggest_batch(
+            q=args.q, acquisition=args.acquisition,
+            method=args.sampler, n_samples=args.n_samples,
+        )
+    elif args.mode == "suggest_batch_and_run":
+        suggest_batch_and_run_mode(
+            q=args.q,
+            acquisition=args.acquisition,
+            cases=args.cases,
+            force_rerun=args.force_rerun,
+            method=args.sampler,
+            n_samples=args.n_samples,
+        )
+    elif args.mode == "suggest":
+        run_optimizer_v0(
+            top_k=args.top_k, return_df=False,
+            method=args.sampler, n_samples=args.n_samples,
+        )
     else:
         suggest_and_run_mode(
             top_k_suggest=args.top_k,
             n_run=args.n_run,
             cases=args.cases,
+            force_rerun=args.force_rerun,
+            method=args.sampler,
+            n_samples=args.n_samples,
         )
 
 
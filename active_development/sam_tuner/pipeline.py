@@ -5,7 +5,7 @@ High-level orchestrator for the SAM optimization workflow.
 
 Stages:
   1. "runs"      : launch SAM sweeps (via top-level script.py).
-  2. "analysis"  : run csv_maker.py and csv_analysis.py inside the analysis folder.
+  2. "analysis"  : run csv_maker and csv_analysis (in-process) on the analysis folder.
   3. "optimizer" : run the surrogate-based optimizer to suggest (and optionally run) hyperparams.
 
 Usage (from active_development):
@@ -34,7 +34,11 @@ import subprocess
 from pathlib import Path
 from typing import Literal, List, Optional
 
+import pandas as pd
+
 from .config import CONFIG
+from .data_handler import run_analysis
+from .file_ops import collect_run_outputs
 from .optimizer_loop import run_optimizer_v0, suggest_and_run_mode
 
 
@@ -98,42 +102,39 @@ def run_stage_runs() -> None:
     print("=== PIPELINE: Stage 1 complete ===\n")
 
 
-def run_stage_analysis() -> None:
+def run_stage_analysis() -> pd.DataFrame:
     """
-    Stage 2: Run csv_maker.py and csv_analysis.py inside the analysis folder.
+    Stage 2: Run csv_maker and csv_analysis on the analysis folder.
 
-    Equivalent to:
+    First copies the CSV/.i/.log files of every run directory under
+    CONFIG["paths"]["runs_root"] into analysis/analysis/<analysis_subdir>/,
+    where csv_maker looks for them. Then does what
 
         cd active_development/analysis
         python csv_maker.py
         python csv_analysis.py
+
+    does, but in this process (data_handler.run_analysis): the case reports
+    are handed to csv_analysis in memory, and the validation analysis table
+    is returned so Stage 3 doesn't have to read it back from disk.
     """
     analysis_dir = _analysis_dir()
 
-    csv_maker = analysis_dir / "csv_maker.py"
-    csv_analysis = analysis_dir / "csv_analysis.py"
-
-    if not csv_maker.exists():
-        raise FileNotFoundError(f"csv_maker.py not found in {analysis_dir}")
-    if not csv_analysis.exists():
-        raise FileNotFoundError(f"csv_analysis.py not found in {analysis_dir}")
-
-    print("=== PIPELINE: Stage 2 — Running csv_maker.py ===")
-    print(f"[pipeline] Working directory: {analysis_dir}")
-    subprocess.run(
-        ["python", csv_maker.name],
-        cwd=analysis_dir,
-        check=True,
+    collect_run_outputs(
+        runs_root=Path(CONFIG["paths"]["runs_root"]),
+        dest_dir=analysis_dir / "analysis" / CONFIG["paths"]["analysis_subdir"],
     )
 
-    print("=== PIPELINE: Stage 2 — Running csv_analysis.py ===")
-    subprocess.run(
-        ["python", csv_analysis.name],
-        cwd=analysis_dir,
-        check=True,
-    )
+    for script in ("csv_maker.py", "csv_analysis.py"):
+        if not (analysis_dir / script).exists():
+            raise FileNotFoundError(f"{script} not found in {analysis_dir}")
+
+    print("=== PIPELINE: Stage 2 — Running csv_maker + csv_analysis ===")
+    print(f"[pipeline] Analysis directory: {analysis_dir}")
+    validation_df = run_analysis()
 
     print("=== PIPELINE: Stage 2 complete ===\n")
+    return validation_df
 
 
 def run_stage_optimizer(
@@ -141,6 +142,7 @@ def run_stage_optimizer(
     top_k: int = 10,
     n_run: int = 3,
     cases: Optional[List[str]] = None,
+    validation_df: Optional[pd.DataFrame] = None,
 ) -> None:
     """
     Stage 3: Run the surrogate-based optimizer.
@@ -157,17 +159,21 @@ def run_stage_optimizer(
     cases : list of str or None
         Case names to run (e.g. ["jsalt1", "jsalt2"]). If None, defaults inside
         suggest_and_run_mode() to ["jsalt1"].
+    validation_df : pd.DataFrame or None
+        Validation analysis table from Stage 2; None -> read
+        validation_analysis_full.csv.
     """
     print("=== PIPELINE: Stage 3 — Running surrogate-based optimizer ===")
     print(f"[pipeline] Optimizer mode: {mode!r}")
 
     if mode == "suggest":
-        run_optimizer_v0(top_k=top_k, return_df=False)
+        run_optimizer_v0(top_k=top_k, return_df=False, validation_df=validation_df)
     else:
         suggest_and_run_mode(
             top_k_suggest=top_k,
             n_run=n_run,
             cases=cases,
+            validation_df=validation_df,
         )
 
     print("=== PIPELINE: Stage 3 complete ===\n")
@@ -204,7 +210,7 @@ def run_pipeline(
     if until == "runs":
         return
 
-    run_stage_analysis()
+    validation_df = run_stage_analysis()
     if until == "analysis":
         return
 
@@ -213,6 +219,7 @@ def run_pipeline(
         top_k=optimizer_top_k,
         n_run=optimizer_n_run,
         cases=optimizer_cases,
+        validation_df=validation_df,
     )
     # if until == "optimizer": we’re done
 
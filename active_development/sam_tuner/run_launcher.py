@@ -3,36 +3,77 @@ run_launcher.py
 
 Run orchestration for a single SAM run.
 
-Main entry point:
+Main entry points:
 
     run_sam_case(case_name, template_name, hyperparams)
+    run_sam_cases(batch, max_workers=...)       # several runs in parallel
 
 This will:
   1. Build a unique input .i file from the given template, applying
      hyperparameters (node_multiplier, order, etc.) via text replacement.
-  2. Start a run context via runtime_logger.
-  3. Invoke the SAM executable with a timeout (from CONFIG["runtime_limits"]).
-  4. Record success/fail/timeout in runtimes_master.csv.
-  5. Return a small summary dict for convenience.
+  2. Write it into its own scratch directory
+     <CONFIG["paths"]["runs_root"]>/<input stem>/ (with !include'd files
+     symlinked in), so concurrent runs never share outputs.
+     With CONFIG["scratch"]["root"] set (multi-node workers, worker.py)
+     the run directory is created there instead, on node-local disk, and
+     only the rendered input, the last row of the output CSV and the
+     log_parser table of the SAM log are copied back to runs_root.
+  3. Start a run context via runtime_logger.
+  4. Invoke the SAM executable inside that directory with a timeout
+     (from CONFIG["runtime_limits"]).
+     Optionally a steady-state watcher tails the output CSV and stops SAM
+     once the transient has settled (status "success_steady"), and the
+     console output is parsed live so a diverging run (repeated failed
+     solves, dt collapsing towards dtmin) is killed early (status
+     "diverged").
+     end_time can be overridden to stop at a shorter simulated horizon,
+     and such a run can later be continued from its checkpoint
+     (restart_from=...) instead of starting over. With warm_start=True
+     a run starts from the converged state of the nearest finished run on
+     the same mesh/order/case (checkpoint_index(), find_warm_start()).
+  5. Record success/success_steady/fail/timeout/diverged plus the console
+     telemetry and the SAM process's own resource usage (CPU user/sys time,
+     peak RSS, block I/O, context switches; via os.wait4) in
+     runtimes_master.csv.
+  6. Return a small summary dict for convenience.
+
+run_sam_cases() runs a batch of such cases on a bounded thread pool (each
+thread just babysits one sam-opt subprocess) and hands results back as each
+run finishes.
+
+Successful runs are also stored in a content-addressed result cache
+(CONFIG["paths"]["run_cache_dir"]), keyed by the fully rendered input text,
+the files it !includes and the SAM executable. Asking for the same input
+again returns the stored summary and output CSV without launching SAM.
 
 This module does NOT compute error metrics or do any ML.
 """
 
+import hashlib
+import json
+import os
 import re
+import shutil
 import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable, Iterator, List, Callable
 
 from .config import CONFIG
-from . import runtime_logger
+from . import log_parser, runtime_logger
+from .run_watchers import ConsoleWatcher, SteadyStateWatcher
 
 
-def _repo_root() -> Path:
-    """
-    Guess the active_development root by going one level up from this file.
-    (sam_opt is inside active_development.)
-    """
-    return Path(__file__).resolve().parent.parent
+# Run directories currently in use by this process (guarded by the lock), so
+# two identical hyperparameter sets launched at once don't share a directory.
+_ACTIVE_RUN_DIRS = set()
+_ACTIVE_RUN_DIRS_LOCK = threading.Lock()
+
+_INCLUDE_RE = re.compile(r"^\s*!include\s+(\S+)", re.MULTILINE)
 
 
 def _load_template(template_name: str) -> str:
@@ -143,9 +184,13 @@ def _build_input_filename(template_name: str, hyperparams: Dict[str, Any]) -> st
     To remain compatible with your existing csv_maker/csv_analysis pipeline,
     we PRESERVE the 'nodes_mult_by_<N>' pattern in the filename.
 
+    The name ends with a short hash of the full hyperparameter set, so runs
+    that differ only in e.g. T_0 or h_amb get different files (and different
+    run directories) instead of overwriting each other.
+
     Example:
       template_name = "jsalt1.i", hyperparams["node_multiplier"] = 24
-      -> "jsalt1_nodes_mult_by_24_ord2_htc1000.i"
+      -> "jsalt1_nodes_mult_by_24_ord2_htc1000_h3f9a0c12d4.i"
 
     If node_multiplier is not given, we fall back to a generic suffix.
     """
@@ -167,14 +212,692 @@ def _build_input_filename(template_name: str, hyperparams: Dict[str, Any]) -> st
     if htc is not None:
         parts.append(f"htc{int(htc)}")
 
+    parts.append(f"h{_hyperparam_hash(template_name, hyperparams)}")
+
     return "_".join(parts) + ".i"
 
 
+def _hyperparam_hash(template_name: str, hyperparams: Dict[str, Any]) -> str:
+    """
+    Short, stable hash of (template, hyperparams).
+
+    Values are normalized the same way _apply_hyperparams_to_text() writes
+    them, so {"T_0": 443} and {"T_0": 443.0} map to the same run.
+    """
+    normalized = {}
+    for key, val in hyperparams.items():
+        if key in ("node_multiplier", "order"):
+            normalized[key] = int(val)
+        elif isinstance(val, (int, float)) and not isinstance(val, bool):
+            normalized[key] = float(val)
+        else:
+            normalized[key] = val
+    payload = json.dumps(
+        {"template": Path(template_name).name, "hyperparams": normalized},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()[:10]
+
+
+# ---------------------------------------------------------------------------
+# Per-run working directories
+# ---------------------------------------------------------------------------
+
+def _runs_root() -> Path:
+    """Root directory that holds one scratch directory per run."""
+    return Path(CONFIG["paths"]["runs_root"]).resolve()
+
+
+def _scratch_root() -> Optional[Path]:
+    """Node-local root SAM runs in (CONFIG["scratch"]["root"]), or None."""
+    root = CONFIG.get("scratch", {}).get("root")
+    return Path(root).resolve() if root else None
+
+
+def _work_root() -> Path:
+    """Where run directories are created: the scratch root if set, else runs_root."""
+    return _scratch_root() or _runs_root()
+
+
+def _claim_run_dir(stem: str, run_tag: str) -> Path:
+    """
+    Reserve <work root>/<stem>/ for this run (see _work_root()).
+
+    If another thread of this process is already running the exact same
+    input, fall back to <work root>/<stem>__<run_tag>/ so the two runs
+    still don't collide. Release with _release_run_dir().
+    """
+    root = _work_root()
+    with _ACTIVE_RUN_DIRS_LOCK:
+        run_dir = root / stem
+        if run_dir in _ACTIVE_RUN_DIRS:
+            run_dir = root / f"{stem}__{run_tag}"
+        _ACTIVE_RUN_DIRS.add(run_dir)
+    return run_dir
+
+
+def _release_run_dir(run_dir: Path) -> None:
+    """Mark a run directory as free again."""
+    with _ACTIVE_RUN_DIRS_LOCK:
+        _ACTIVE_RUN_DIRS.discard(run_dir)
+
+
+def _link_includes(text: str, src_dir: Path, run_dir: Path) -> None:
+    """
+    Make every '!include <file>' in `text` resolvable from run_dir.
+
+    Included files are symlinked from src_dir (copied if the filesystem does
+    not support symlinks), and their own includes are followed as well.
+    """
+    for rel in _INCLUDE_RE.findall(text):
+        src = (src_dir / rel).resolve()
+        dst = run_dir / rel
+        if not src.exists():
+            raise FileNotFoundError(f"Included file not found: {src}")
+        if dst.is_symlink() or dst.exists():
+            dst.unlink()
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            dst.symlink_to(src)
+        except OSError:
+            shutil.copy2(src, dst)
+        _link_includes(src.read_text(), src.parent, dst.parent)
+
+
+def _prepare_run_dir(run_dir: Path, concrete_name: str, text: str, template_path: Path) -> Path:
+    """
+    Create a clean run directory holding the concrete input file.
+
+    Outputs left over from a previous run of the same input (CSV, log,
+    checkpoints) are removed first, so readers never mix old and new rows.
+
+    Returns
+    -------
+    Path
+        Path of the concrete .i file inside run_dir.
+    """
+    if run_dir.exists():
+        shutil.rmtree(run_dir)
+    run_dir.mkdir(parents=True)
+
+    concrete_path = run_dir / concrete_name
+    concrete_path.write_text(text)
+    _link_includes(text, template_path.parent, run_dir)
+    return concrete_path
+
+
+def _output_csv_path(concrete_path: Path) -> Path:
+    """Path of the CSV time history SAM writes for this input ([Outputs/csv])."""
+    return concrete_path.with_name(concrete_path.stem + "_csv.csv")
+
+
+def _write_last_row_csv(src: Path, dst: Path) -> bool:
+    """
+    Copy only the header and the last complete row of a SAM output CSV
+    (all that the analysis reads). Returns False if src has no data row.
+    """
+    try:
+        with open(src, "rb") as f:
+            header = f.readline()
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(len(header), size - 65536))
+            tail = f.read()
+    except OSError:
+        return False
+    rows = [r for r in tail.split(b"\n")[:-1] if r.strip()]  # [:-1]: drop a partial last line
+    if not header.strip() or not rows:
+        return False
+    dst.write_bytes(header.rstrip(b"\r\n") + b"\n" + rows[-1].rstrip(b"\r") + b"\n")
+    return True
+
+
+def _copy_back(concrete_path: Path, results_dir: Path) -> Path:
+    """
+    Copy the compact results of a run done in scratch to results_dir
+    (under runs_root): the rendered input, the last row of the output CSV
+    and the per-timestep table of the SAM log (log_parser). Returns the
+    path of the copied output CSV.
+    """
+    results_dir.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(concrete_path, results_dir / concrete_path.name)
+
+    output_csv = _output_csv_path(concrete_path)
+    shared_csv = results_dir / output_csv.name
+    if not _write_last_row_csv(output_csv, shared_csv) and shared_csv.exists():
+        shared_csv.unlink()  # don't leave an older run's result behind
+
+    log_path = concrete_path.with_suffix(".log")
+    if log_path.exists():
+        try:
+            log_parser.parse_run_log(log_path)
+            fmt = CONFIG.get("log_parser", {}).get("table_format", "npz")
+            table = log_parser._table_path(log_path, fmt)
+            if table.exists():
+                shutil.copy2(table, results_dir / table.name)
+        except Exception as e:
+            print(f"[run_launcher] WARNING: no log table for {log_path.name}: {e}")
+    return shared_csv
+
+
+def _free_scratch(run_dir: Path) -> bool:
+    """
+    Remove a node-local run directory after _copy_back(), unless
+    CONFIG["scratch"]["keep_run_dirs"] (needed to continue or warm-start
+    from its checkpoints on the same node). Returns True if removed.
+    """
+    if CONFIG.get("scratch", {}).get("keep_run_dirs", False):
+        return False
+    shutil.rmtree(run_dir, ignore_errors=True)
+    return True
+
+
+def _checkpoint_dir(concrete_path: Path) -> Path:
+    """Directory SAM writes checkpoints to ([Outputs] checkpoint = true)."""
+    return concrete_path.with_name(concrete_path.stem + "_out_cp")
+
+
+def _time_tag(t: float) -> str:
+    """Filename-safe rendering of a simulated time (100 -> '100', 12.5 -> '12p5')."""
+    return f"{float(t):g}".replace(".", "p").replace("+", "")
+
+
+def _with_horizon(concrete_name: str, end_time: float, restart_time: Optional[float] = None) -> str:
+    """
+    Tag a concrete input name with its simulated-time horizon, so a run cut
+    at end_time (or continued from restart_time) never shares its name,
+    run directory or runtime-log key with a full-length run.
+
+      jsalt1_..._h3f9a0c12d4.i -> jsalt1_..._h3f9a0c12d4_t100.i
+                               -> jsalt1_..._h3f9a0c12d4_t300_from100.i
+    """
+    stem = Path(concrete_name).stem + f"_t{_time_tag(end_time)}"
+    if restart_time is not None:
+        stem += f"_from{_time_tag(restart_time)}"
+    return stem + ".i"
+
+
+# ---------------------------------------------------------------------------
+# Checkpoint index (warm starts)
+# ---------------------------------------------------------------------------
+
+# Sidecar written next to the checkpoints of every finished full-length run
+CHECKPOINT_META = "checkpoint.json"
+
+
+def _mesh_key(case_name: str, hyperparams: Dict[str, Any]) -> tuple:
+    """(case, node_multiplier, order): runs whose checkpoints are interchangeable."""
+    nm = hyperparams.get("node_multiplier")
+    order = hyperparams.get("order")
+    return (
+        case_name,
+        int(nm) if nm is not None else None,
+        int(order) if order is not None else None,
+    )
+
+
+def _last_csv_time(output_csv: Path) -> Optional[float]:
+    """
+    Simulated time of the last complete row of a SAM output CSV (None if
+    unreadable). As in run_watchers.CsvTail, text after the last newline
+    is a row SAM is still writing and is ignored.
+    """
+    try:
+        with open(output_csv, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            start = max(0, f.tell() - 4096)
+            f.seek(start)
+            lines = f.read().split(b"\n")
+        lines.pop()  # after the final newline: empty, or a partial row
+        if start > 0 and lines:
+            lines.pop(0)  # may start mid-row
+        rows = [ln for ln in lines if ln.strip()]
+        return float(rows[-1].split(b",")[0].decode(errors="replace"))
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _record_checkpoint(
+    concrete_path: Path,
+    case_name: str,
+    hyperparams: Dict[str, Any],
+    status: str,
+) -> None:
+    """Register this run's checkpoints in the index (writes CHECKPOINT_META)."""
+    cp_dir = _checkpoint_dir(concrete_path)
+    if not cp_dir.is_dir() or not any(cp_dir.iterdir()):
+        return
+    meta = {
+        "key": list(_mesh_key(case_name, hyperparams)),
+        "case": case_name,
+        "hyperparams": hyperparams,
+        "input_basename": concrete_path.name,
+        "checkpoint_path": str(cp_dir),
+        "sim_time": _last_csv_time(_output_csv_path(concrete_path)),
+        "status": status,
+    }
+    (concrete_path.parent / CHECKPOINT_META).write_text(json.dumps(meta, indent=2, default=str))
+
+
+def checkpoint_index(case_name: Optional[str] = None) -> Dict[tuple, List[Dict[str, Any]]]:
+    """
+    Checkpoints of finished runs under runs_root (the scratch root when
+    CONFIG["scratch"]["root"] is set), grouped by _mesh_key().
+
+    Built from the CHECKPOINT_META files in the run directories, so entries
+    disappear together with their run directory (a rerun of the same input
+    wipes it). Only runs that ended with a success status over their full
+    simulated time are registered.
+
+    Parameters
+    ----------
+    case_name : str, optional
+        Only return entries for this case.
+
+    Returns
+    -------
+    dict
+        (case, node_multiplier, order) -> list of entries with 'hyperparams',
+        'input_basename', 'checkpoint_path', 'sim_time' and 'status'.
+    """
+    index: Dict[tuple, List[Dict[str, Any]]] = {}
+    root = _work_root()
+    if not root.exists():
+        return index
+    for meta_path in root.glob(f"*/{CHECKPOINT_META}"):
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            continue
+        if case_name is not None and meta.get("case") != case_name:
+            continue
+        if not Path(meta.get("checkpoint_path", "")).is_dir():
+            continue
+        index.setdefault(tuple(meta["key"]), []).append(meta)
+    return index
+
+
+def _warm_start_distance(a: Dict[str, Any], b: Dict[str, Any], params: Iterable[str]) -> float:
+    """
+    Distance between two hyperparameter sets over the boundary values,
+    each scaled by its range in CONFIG["hyperparams_space"].
+    """
+    space = CONFIG.get("hyperparams_space", {})
+    d2 = 0.0
+    for p in params:
+        if p not in a or p not in b:
+            continue
+        rng = space.get(p)
+        scale = (rng[1] - rng[0]) if isinstance(rng, tuple) and len(rng) == 2 else abs(float(a[p])) or 1.0
+        d2 += ((float(a[p]) - float(b[p])) / (scale or 1.0)) ** 2
+    return d2 ** 0.5
+
+
+def find_warm_start(
+    case_name: str,
+    hyperparams: Dict[str, Any],
+    max_distance: Optional[float] = None,
+    exclude: Optional[Iterable[str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Nearest indexed checkpoint with the same case, mesh and order.
+
+    Distance is over CONFIG["warm_start"]["params"] (boundary values; the
+    initial condition T_0 is replaced by the checkpoint's state anyway).
+    Runs that reached steady state win ties.
+
+    Parameters
+    ----------
+    case_name : str
+    hyperparams : dict
+        Hyperparameters of the run to start.
+    max_distance : float, optional
+        Ignore neighbours farther than this. Default: CONFIG["warm_start"]["max_distance"].
+    exclude : str or iterable of str, optional
+        input_basename(s) to skip (the run itself, with and without its
+        _warm tag, whose run directory is about to be replaced).
+
+    Returns
+    -------
+    dict or None
+        The index entry plus its 'distance', or None if there is no
+        neighbour close enough.
+    """
+    cfg = CONFIG.get("warm_start", {})
+    params = cfg.get("params", ("T_c", "T_h", "h_amb"))
+    if max_distance is None:
+        max_distance = cfg.get("max_distance")
+    if isinstance(exclude, str):
+        exclude = (exclude,)
+    exclude = set(exclude or ())
+    entries = checkpoint_index(case_name).get(_mesh_key(case_name, hyperparams), [])
+    best = None
+    for entry in entries:
+        if entry.get("input_basename") in exclude:
+            continue
+        d = _warm_start_distance(hyperparams, entry["hyperparams"], params)
+        if max_distance is not None and d > max_distance:
+            continue
+        rank = (d, entry.get("status") != "success_steady")
+        if best is None or rank < best[0]:
+            best = (rank, dict(entry, distance=d))
+    return best[1] if best else None
+
+
+def _inject_restart_file(text: str, restart_base: str) -> str:
+    """
+    Point the rendered input at a restart file ([Problem] restart_file_base).
+
+    Adds the parameter to an existing [Problem] block, or appends one.
+    """
+    line = f"  restart_file_base = {restart_base}"
+    problem = re.search(r"^\[Problem\][^\n]*\n", text, re.MULTILINE)
+    if problem:
+        return text[:problem.end()] + line + "\n" + text[problem.end():]
+    return text.rstrip("\n") + f"\n\n[Problem]\n{line}\n[]\n"
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+def _cache_root() -> Path:
+    """Root directory of the content-addressed result cache."""
+    return Path(CONFIG["paths"]["run_cache_dir"]).resolve()
+
+
+def _sam_executable_identity() -> str:
+    """
+    Identify the SAM build that would run: resolved path + size + mtime.
+
+    A rebuilt or swapped executable therefore invalidates cached results.
+    """
+    sam_exec = CONFIG["paths"]["sam_executable"]
+    resolved = shutil.which(sam_exec)
+    if resolved is None:
+        return f"unresolved:{sam_exec}"
+    real = Path(resolved).resolve()
+    st = real.stat()
+    return f"{real}:{st.st_size}:{int(st.st_mtime)}"
+
+
+def _hash_includes(h, text: str, src_dir: Path) -> None:
+    """Feed the name and contents of every (nested) !include into hash h."""
+    for rel in _INCLUDE_RE.findall(text):
+        src = (src_dir / rel).resolve()
+        inc_text = src.read_text() if src.exists() else ""
+        h.update(f"\0include:{rel}\0".encode())
+        h.update(inc_text.encode())
+        _hash_includes(h, inc_text, src.parent)
+
+
+def _cache_key(rendered_text: str, template_path: Path, run_options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Content hash of everything that determines a run's result.
+
+    run_options holds launcher settings that change the output without
+    showing up in the input text (e.g. steady-state early stop).
+    """
+    h = hashlib.sha256()
+    h.update(rendered_text.encode())
+    _hash_includes(h, rendered_text, template_path.parent)
+    h.update(f"\0exe:{_sam_executable_identity()}".encode())
+    if run_options:
+        h.update(f"\0options:{json.dumps(run_options, sort_keys=True, default=str)}".encode())
+    return h.hexdigest()
+
+
+def _cache_entry_dir(key: str) -> Path:
+    return _cache_root() / key[:2] / key
+
+
+def _cache_lookup(key: str) -> Optional[Dict[str, Any]]:
+    """
+    Return the stored summary for `key` (with 'cached_csv_path'), or None.
+    """
+    entry = _cache_entry_dir(key)
+    summary_path = entry / "summary.json"
+    if not summary_path.exists():
+        return None
+    try:
+        summary = json.loads(summary_path.read_text())
+    except (OSError, ValueError):
+        return None
+    csv_files = sorted(entry.glob("*_csv.csv"))
+    if not csv_files:
+        return None
+    summary["cached_csv_path"] = str(csv_files[0])
+    return summary
+
+
+def _cache_store(
+    key: str,
+    summary: Dict[str, Any],
+    output_csv: Path,
+    checkpoint_dir: Optional[Path] = None,
+) -> None:
+    """
+    Store a finished run's summary and output CSV under `key`.
+
+    If checkpoint_dir is given (runs cut at an end_time override, which may
+    be continued later), the checkpoints are stored as well.
+
+    Written into a temporary directory and renamed into place, so readers
+    never see a half-written entry.
+    """
+    if not output_csv.exists():
+        print(f"[run_launcher] Not caching {output_csv.name}: no output CSV.")
+        return
+    entry = _cache_entry_dir(key)
+    tmp = entry.with_name(f"{key}.tmp-{uuid.uuid4().hex[:8]}")
+    tmp.mkdir(parents=True)
+    shutil.copy2(output_csv, tmp / output_csv.name)
+    if checkpoint_dir is not None and checkpoint_dir.is_dir():
+        shutil.copytree(checkpoint_dir, tmp / checkpoint_dir.name)
+    (tmp / "summary.json").write_text(json.dumps(summary, indent=2, default=str))
+    if entry.exists():
+        shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # Another worker stored the same key first; theirs is just as good.
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Process control
+# ---------------------------------------------------------------------------
+
+# Resource-usage columns logged for every SAM run (see _rusage_columns).
+_RUSAGE_KEYS = (
+    "cpu_user_sec", "cpu_sys_sec", "cpu_sec", "max_rss_mb",
+    "io_read_blocks", "io_write_blocks", "ctx_switches_vol", "ctx_switches_invol",
+)
+
+
+def _wait_child(proc: subprocess.Popen, timeout: Optional[float] = None):
+    """
+    Wait up to `timeout` seconds (None: forever) for SAM to exit.
+
+    The child is reaped with os.wait4() instead of Popen.wait() so we get
+    the resource usage of exactly this process (and everything it waited
+    for, e.g. MPI ranks), even with several runs going at once; the
+    process-wide RUSAGE_CHILDREN would mix all of them together.
+
+    Returns the child's resource.struct_rusage, or None if it is still
+    running when the timeout expires. proc.returncode is set on exit.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        if proc.returncode is not None:
+            return None  # already reaped elsewhere; no rusage to report
+        flags = 0 if deadline is None else os.WNOHANG
+        pid, wstatus, rusage = os.wait4(proc.pid, flags)
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(wstatus)
+            return rusage
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        time.sleep(min(0.05, remaining))
+
+
+def _rusage_columns(rusage) -> Dict[str, Any]:
+    """Translate a struct_rusage into runtime-log columns."""
+    if rusage is None:
+        return {key: None for key in _RUSAGE_KEYS}
+    # ru_maxrss is in kB on Linux, bytes on macOS
+    rss_bytes = rusage.ru_maxrss if sys.platform == "darwin" else rusage.ru_maxrss * 1024
+    return {
+        "cpu_user_sec": rusage.ru_utime,
+        "cpu_sys_sec": rusage.ru_stime,
+        "cpu_sec": rusage.ru_utime + rusage.ru_stime,
+        "max_rss_mb": rss_bytes / 2**20,
+        "io_read_blocks": rusage.ru_inblock,
+        "io_write_blocks": rusage.ru_oublock,
+        "ctx_switches_vol": rusage.ru_nvcsw,
+        "ctx_switches_invol": rusage.ru_nivcsw,
+    }
+
+
+def _stop_process(proc: subprocess.Popen, grace_sec: float):
+    """
+    Ask SAM to stop (SIGTERM); SIGKILL it if it hasn't exited after grace_sec.
+
+    Returns the child's rusage (see _wait_child).
+    """
+    proc.terminate()
+    rusage = _wait_child(proc, grace_sec)
+    if proc.returncode is None:
+        proc.kill()
+        rusage = _wait_child(proc)
+    return rusage
+
+
+def _pump_output(proc: subprocess.Popen, logf, console_watcher: Optional[ConsoleWatcher]) -> None:
+    """Copy SAM's stdout into the log file line by line, feeding the console watcher."""
+    for line in proc.stdout:
+        logf.write(line)
+        if console_watcher is not None:
+            console_watcher.feed(line)
+    logf.flush()
+
+
+def _run_sam_process(
+    cmd: List[str],
+    run_dir: Path,
+    log_file_path: Path,
+    timeout_sec: float,
+    steady_watcher: Optional[SteadyStateWatcher] = None,
+    console_watcher: Optional[ConsoleWatcher] = None,
+    kill_on_divergence: bool = True,
+) -> Dict[str, Any]:
+    """
+    Run SAM, polling the watchers every CONFIG["runtime_limits"]["poll_sec"].
+
+    stdout/stderr are read by a helper thread that writes them to
+    log_file_path and feeds console_watcher as the lines arrive. If
+    kill_on_divergence is False the watcher only collects telemetry.
+
+    Returns
+    -------
+    dict
+        status ('success', 'success_steady', 'fail', 'timeout' or 'diverged'),
+        return_code (None if we killed it for the timeout),
+        steady_time (simulated time at which steady state was detected) and
+        rusage (resource columns from _rusage_columns, e.g. cpu_sec, max_rss_mb).
+    """
+    limits = CONFIG["runtime_limits"]
+    poll_sec = float(limits.get("poll_sec", 2.0))
+    grace_sec = float(limits.get("stop_grace_sec", 10.0))
+
+    start = time.monotonic()
+    stop_status = None
+    rusage = None
+    with log_file_path.open("w") as logf:
+        proc = subprocess.Popen(
+            cmd,
+            cwd=str(run_dir),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+            bufsize=1,
+        )
+        reader = threading.Thread(
+            target=_pump_output, args=(proc, logf, console_watcher), daemon=True
+        )
+        reader.start()
+        try:
+            while True:
+                remaining = timeout_sec - (time.monotonic() - start)
+                if remaining <= 0:
+                    # If SAM runs longer than timeout_sec, we kill it and mark as timeout
+                    stop_status = "timeout"
+                    proc.kill()
+                    rusage = _wait_child(proc)
+                    break
+                rusage = _wait_child(proc, min(poll_sec, remaining))
+                if proc.returncode is not None:
+                    break
+
+                if (kill_on_divergence and console_watcher is not None
+                        and console_watcher.diverge_reason):
+                    print(
+                        f"[run_launcher] {log_file_path.stem}: diverging "
+                        f"({console_watcher.diverge_reason}); killing SAM."
+                    )
+                    stop_status = "diverged"
+                    proc.kill()
+                    rusage = _wait_child(proc)
+                    break
+
+                if steady_watcher is not None and steady_watcher.poll():
+                    print(
+                        f"[run_launcher] {log_file_path.stem}: steady state at "
+                        f"t = {steady_watcher.steady_time:g} s; stopping SAM."
+                    )
+                    stop_status = "success_steady"
+                    rusage = _stop_process(proc, grace_sec)
+                    break
+        except BaseException:
+            # Don't leave an orphaned SAM behind (e.g. on KeyboardInterrupt)
+            proc.kill()
+            proc.wait()
+            raise
+        finally:
+            reader.join(timeout=grace_sec)
+            proc.stdout.close()
+
+    if stop_status == "timeout":
+        status, return_code = "timeout", None
+    elif stop_status in ("success_steady", "diverged"):
+        status, return_code = stop_status, proc.returncode
+    else:
+        status = "success" if proc.returncode == 0 else "fail"
+        return_code = proc.returncode
+
+    return {
+        "status": status,
+        "return_code": return_code,
+        "steady_time": steady_watcher.steady_time if steady_watcher is not None else None,
+        "rusage": _rusage_columns(rusage),
+    }
+
+
 def run_sam_case(
     case_name: str,
     template_name: str,
     hyperparams: Dict[str, Any],
     timeout_sec: Optional[float] = None,
+    use_cache: Optional[bool] = None,
+    force_rerun: bool = False,
+    steady_state: Optional[bool] = None,
+    divergence_check: Optional[bool] = None,
+    end_time: Optional[float] = None,
+    restart_from: Optional[Dict[str, Any]] = None,
+    warm_start: Optional[bool] = None,
 ) -> Dict[str, Any]:
     """
     Run a single SAM case given a template and hyperparameters.
@@ -195,15 +918,52 @@ def run_sam_case(
     timeout_sec : float or None
         If None, uses CONFIG["runtime_limits"]["absolute_sec"].
         Otherwise overrides the global default for this run.
+    use_cache : bool or None
+        Look up / store the result in the result cache.
+        If None, uses CONFIG["cache"]["enabled"].
+    force_rerun : bool
+        Run SAM even if a cached result exists (the cache entry is then
+        refreshed with the new result).
+    steady_state : bool or None
+        Watch the output CSV and stop SAM once it reaches steady state
+        (see CONFIG["steady_state"]). The run is then logged with status
+        "success_steady" and its 'steady_time'.
+        If None, uses CONFIG["steady_state"]["enabled"].
+    divergence_check : bool or None
+        Parse SAM's console output live and kill the run (status
+        "diverged") once it crosses a CONFIG["divergence"] threshold.
+        The parsed counters (steps_ok, steps_failed, nl_its_total, dt_min,
+        ...) are logged as extra columns either way.
+        If None, uses CONFIG["divergence"]["enabled"].
+    end_time : float or None
+        Stop the transient at this simulated time instead of the input's
+        end_time (command-line override Executioner/end_time=...). The input
+        name gets a _t<end_time> tag, so the partial run is logged and cached
+        separately from full-length runs.
+    restart_from : dict or None
+        Summary of an earlier run of the same input cut at a smaller
+        end_time: continue from its checkpoint (Problem/restart_file_base,
+        Executioner/start_time) up to end_time instead of starting over.
+        If its checkpoint is gone, the run starts from t = 0.
+    warm_start : bool or None
+        Start from the converged state of the nearest already-run neighbour
+        with the same case, mesh and order (find_warm_start) instead of the
+        initial condition: its checkpoint is injected into the rendered
+        input as [Problem] restart_file_base, simulated time starts at 0
+        again and the input name gets a _warm tag. Best combined with
+        steady_state=True. Ignored when restart_from is given.
+        If None, uses CONFIG["warm_start"]["enabled"].
 
     Returns
     -------
     dict
-        Summary of the run as logged by runtime_logger.end_run().
+        Summary of the run as logged by runtime_logger.end_run(), plus
+        'sam_input_path', 'log_file_path', 'run_dir', 'output_csv_path',
+        'checkpoint_path', 'end_time', 'warm_start_from', 'cache_key' and
+        'cache_hit'. On a
+        cache hit this is the stored summary of the original run and nothing
+        new is logged.
     """
-    repo_root = _repo_root()
-    templates_dir = Path(CONFIG["paths"]["templates_dir"]).resolve()
-
     # 1) Read template
     template_text, template_path = _load_template(template_name)
 
@@ -212,58 +972,291 @@ def run_sam_case(
 
     # 3) Build concrete input filename
     concrete_name = _build_input_filename(template_name, hyperparams)
-    concrete_path = templates_dir / concrete_name
-    concrete_path.write_text(modified_text)
-
-    # 4) Prepare run context
-    output_dir = repo_root  # for now we keep outputs in the existing structure
-    run_ctx = runtime_logger.start_run(
-        case=case_name,
-        hyperparams=hyperparams,
-        sam_input_path=str(concrete_path),
-        output_dir=str(output_dir),
-    )
 
-    # 5) Figure out timeout
-    if timeout_sec is None:
-        timeout_sec = float(CONFIG["runtime_limits"]["absolute_sec"])
+    # 3b) Shorter horizon / continuation from an earlier run's checkpoint
+    restart_base = restart_time = None
+    if restart_from is not None:
+        cp = restart_from.get("checkpoint_path")
+        restart_time = restart_from.get("end_time")
+        if cp and Path(cp).is_dir() and any(Path(cp).iterdir()) and restart_time is not None:
+            restart_base = Path(cp) / "LATEST"
+        else:
+            print(f"[run_launcher] No checkpoint to continue from ({cp}); "
+                  f"running {concrete_name} from the start.")
+            restart_time = None
+    # 3c) Warm start from the nearest neighbour's converged state
+    if warm_start is None:
+        warm_start = bool(CONFIG.get("warm_start", {}).get("enabled", False))
+    warm_source = None
+    if warm_start and restart_base is None:
+        warm_source = find_warm_start(
+            case_name, hyperparams,
+            exclude=(concrete_name, Path(concrete_name).stem + "_warm.i"),
+        )
+        if warm_source is not None:
+            modified_text = _inject_restart_file(
+                modified_text, str(Path(warm_source["checkpoint_path"]) / "LATEST")
+            )
+            concrete_name = Path(concrete_name).stem + "_warm.i"
+            print(f"[run_launcher] Warm start for {concrete_name} from "
+                  f"{warm_source['input_basename']} (distance {warm_source['distance']:.3f}).")
 
-    sam_exec = CONFIG["paths"]["sam_executable"]
-    cmd = [sam_exec, "-i", str(concrete_path)]
+    if end_time is not None:
+        concrete_name = _with_horizon(concrete_name, end_time, restart_time)
+
+    if steady_state is None:
+        steady_state = bool(CONFIG["steady_state"]["enabled"])
+    run_options: Dict[str, Any] = {}
+    if steady_state:
+        run_options["steady_state"] = dict(CONFIG["steady_state"])
+    if end_time is not None:
+        run_options["end_time"] = float(end_time)
+    if restart_base is not None:
+        run_options["restart_from"] = restart_from.get("cache_key") or str(restart_base)
 
-    # Log file for stdout/stderr (optional but useful)
-    log_file_path = concrete_path.with_suffix(".log")
+    if use_cache is None:
+        use_cache = bool(CONFIG.get("cache", {}).get("enabled", False))
+    cache_key = _cache_key(modified_text, template_path, run_options) if use_cache else None
 
+    # 4) Set up this run's own working directory
+    run_dir = _claim_run_dir(Path(concrete_name).stem, uuid.uuid4().hex[:8])
+    # In scratch mode SAM runs in node-local run_dir and the compact results
+    # are copied back to results_dir, which is what gets logged.
+    results_dir = _runs_root() / run_dir.name if _scratch_root() else run_dir
     try:
-        with log_file_path.open("w") as logf:
-            proc = subprocess.run(
-                cmd,
-                cwd=str(repo_root),
-                stdout=logf,
-                stderr=subprocess.STDOUT,
-                timeout=timeout_sec,
-                check=False,
-            )
-        status = "success" if proc.returncode == 0 else "fail"
-        return_code = proc.returncode
-        timeout_used = timeout_sec if status == "timeout" else None
+        # Cache hit: hand back the stored result, with its CSV restored into
+        # the run directory so collect_run_outputs() sees it like any other.
+        # Looked up before the run directory is prepared: an existing run
+        # directory of the same input keeps its log and checkpoints.
+        cached = _cache_lookup(cache_key) if use_cache and not force_rerun else None
+        if cached is not None:
+            concrete_path = run_dir / concrete_name
+            if not (concrete_path.exists() and concrete_path.read_text() == modified_text):
+                concrete_path = _prepare_run_dir(run_dir, concrete_name, modified_text, template_path)
+            output_csv = _output_csv_path(concrete_path)
+            shutil.copy2(cached["cached_csv_path"], output_csv)
+            cp_dir = _checkpoint_dir(concrete_path)
+            cached_cp = Path(cached["cached_csv_path"]).parent / cp_dir.name
+            if cached_cp.is_dir() and not cp_dir.exists():
+                shutil.copytree(cached_cp, cp_dir)
+            print(f"[run_launcher] Cache hit for {concrete_name} ({cache_key[:12]}); not launching SAM.")
+            if results_dir != run_dir:
+                output_csv = _copy_back(concrete_path, results_dir)
+                _free_scratch(run_dir)
+            cached.update({
+                "sam_input_path": str(results_dir / concrete_name),
+                "run_dir": str(results_dir),
+                "output_csv_path": str(output_csv),
+                "checkpoint_path": str(cp_dir) if cp_dir.is_dir() else None,
+                "warm_start_from": warm_source["input_basename"] if warm_source else None,
+                "cache_key": cache_key,
+                "cache_hit": True,
+            })
+            return cached
+
+        concrete_path = _prepare_run_dir(run_dir, concrete_name, modified_text, template_path)
+
+        # 5) Prepare run context
+        run_ctx = runtime_logger.start_run(
+            case=case_name,
+            hyperparams=hyperparams,
+            sam_input_path=str(results_dir / concrete_name),
+            output_dir=str(results_dir),
+        )
+
+        # 6) Figure out timeout
+        if timeout_sec is None:
+            timeout_sec = float(CONFIG["runtime_limits"]["absolute_sec"])
+
+        sam_exec = CONFIG["paths"]["sam_executable"]
+        cmd = [sam_exec, "-i", concrete_path.name]
+        if end_time is not None:
+            cmd.append(f"Executioner/end_time={float(end_time)!r}")
+        if restart_base is not None:
+            cmd += [
+                f"Problem/restart_file_base={restart_base}",
+                f"Executioner/start_time={float(restart_time)!r}",
+            ]
+        elif warm_source is not None:
+            # a restart would otherwise resume at the neighbour's end time
+            cmd.append("Executioner/start_time=0")
 
-    except subprocess.TimeoutExpired:
-        # If SAM runs longer than timeout_sec, we kill it and mark as timeout
-        status = "timeout"
-        return_code = None
-        timeout_used = timeout_sec
+        # Log file for stdout/stderr (optional but useful)
+        log_file_path = concrete_path.with_suffix(".log")
 
-    # 6) Finalize logging
+        steady_watcher = None
+        if steady_state:
+            steady_watcher = SteadyStateWatcher(_output_csv_path(concrete_path))
+
+        # Console stats are always collected (telemetry); only the kill
+        # decision depends on divergence_check.
+        if divergence_check is None:
+            divergence_check = bool(CONFIG["divergence"]["enabled"])
+        console_watcher = ConsoleWatcher()
+
+        outcome = _run_sam_process(
+            cmd,
+            run_dir=run_dir,
+            log_file_path=log_file_path,
+            timeout_sec=timeout_sec,
+            steady_watcher=steady_watcher,
+            console_watcher=console_watcher,
+            kill_on_divergence=divergence_check,
+        )
+        status = outcome["status"]
+        timeout_used = timeout_sec if status == "timeout" else None
+    finally:
+        _release_run_dir(run_dir)
+
+    # 7) Finalize logging
     logged_row = runtime_logger.end_run(
         run_ctx,
         status=status,
-        return_code=return_code,
+        return_code=outcome["return_code"],
         timeout_sec=timeout_used,
+        extra={
+            "end_time": end_time,
+            "restart_time": restart_time,
+            "warm_start_from": warm_source["input_basename"] if warm_source else None,
+            "steady_time": outcome["steady_time"],
+            **outcome["rusage"],
+            **console_watcher.telemetry(),
+        },
     )
 
-    # 7) Augment logged_row with some extra fields for convenience
-    logged_row["sam_input_path"] = str(concrete_path)
+    # 8) Augment logged_row with some extra fields for convenience
+    output_csv = _output_csv_path(concrete_path)
+    shared_csv = _copy_back(concrete_path, results_dir) if results_dir != run_dir else output_csv
+    logged_row["sam_input_path"] = str(results_dir / concrete_name)
     logged_row["log_file_path"] = str(log_file_path)
+    logged_row["run_dir"] = str(results_dir)
+    logged_row["output_csv_path"] = str(shared_csv)
+    cp_dir = _checkpoint_dir(concrete_path)
+    logged_row["checkpoint_path"] = str(cp_dir) if cp_dir.is_dir() else None
+    logged_row["cache_key"] = cache_key
+    logged_row["cache_hit"] = False
+
+    # 9) Remember successful results (with checkpoints if the run may be continued)
+    if use_cache and status in runtime_logger.SUCCESS_STATUSES:
+        _cache_store(cache_key, dict(logged_row), output_csv,
+                     checkpoint_dir=cp_dir if end_time is not None else None)
+
+    # 10) Offer full-length runs' final state as a warm start for neighbours
+    if status in runtime_logger.SUCCESS_STATUSES and end_time is None:
+        _record_checkpoint(concrete_path, case_name, hyperparams, status)
+
+    # 11) Scratch mode: free the node-local directory (checkpoints included)
+    if results_dir != run_dir:
+        if _free_scratch(run_dir):
+            logged_row["checkpoint_path"] = None
+            logged_row["log_file_path"] = None
+        else:
+            logged_row["scratch_dir"] = str(run_dir)
 
     return logged_row
+
+
+# ---------------------------------------------------------------------------
+# Parallel batches
+# ---------------------------------------------------------------------------
+
+def _resolve_max_workers(max_workers: Optional[int]) -> int:
+    """Return the pool size: explicit value, else CONFIG, else os.cpu_count()."""
+    if max_workers is None:
+        max_workers = CONFIG.get("parallel", {}).get("max_workers")
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    return max(1, int(max_workers))
+
+
+def _run_batch_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one batch entry through run_sam_case().
+
+    Exceptions raised before SAM starts (missing template, bad hyperparams)
+    are turned into a summary with status 'error' so one broken entry does
+    not take down the rest of the batch. These are NOT written to the
+    runtime log, since no run was started.
+
+    An optional 'tag' key is not passed on; it is copied into the summary
+    as 'batch_tag' so callers can match results (which come back in
+    completion order) to what they submitted.
+    """
+    item = dict(item)
+    tag = item.pop("tag", None)
+    try:
+        summary = run_sam_case(**item)
+    except Exception as e:
+        summary = {
+            "case": item.get("case_name"),
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "hyperparams": item.get("hyperparams"),
+        }
+    if tag is not None:
+        summary["batch_tag"] = tag
+    return summary
+
+
+def iter_sam_cases(
+    batch: Iterable[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run several SAM cases concurrently and yield each summary as it finishes.
+
+    Parameters
+    ----------
+    batch : iterable of dict
+        One dict per run with keys:
+            - case_name (str)
+            - template_name (str)
+            - hyperparams (dict)
+            - (optional) timeout_sec, use_cache, force_rerun
+        i.e. exactly the keyword arguments of run_sam_case(), plus an
+        optional 'tag' returned in the summary as 'batch_tag'.
+    max_workers : int or None
+        Max number of SAM processes at once. If None, uses
+        CONFIG["parallel"]["max_workers"] (or os.cpu_count() if that is None).
+
+    Yields
+    ------
+    dict
+        Run summaries in completion order (not submission order).
+    """
+    items = list(batch)
+    if not items:
+        return
+
+    n_workers = min(_resolve_max_workers(max_workers), len(items))
+    print(f"[run_launcher] Launching {len(items)} run(s) on {n_workers} worker(s).")
+
+    with ThreadPoolExecutor(max_workers=n_workers) as ex:
+        futures = [ex.submit(_run_batch_item, item) for item in items]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def run_sam_cases(
+    batch: Iterable[Dict[str, Any]],
+    max_workers: Optional[int] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run a batch of SAM cases in parallel and return all summaries.
+
+    Same inputs as iter_sam_cases(). If on_result is given, it is called with
+    each summary as soon as that run finishes (e.g. to print progress), while
+    the other runs keep going.
+
+    Returns
+    -------
+    list of dict
+        Run summaries in completion order.
+    """
+    results: List[Dict[str, Any]] = []
+    for summary in iter_sam_cases(batch, max_workers=max_workers):
+        if on_result is not None:
+            on_result(summary)
+        results.append(summary)
+    return results
@@ -0,0 +1,402 @@
+"""
+run_store.py
+
+SQLite-backed store for SAM run records (the runtime log).
+
+One table, `runs`, with one row per finished run:
+
+  - the fixed runtime_logger columns (run_id, timestamps, case, paths,
+    status, return_code, runtime_sec, timeout_sec, hyperparams_json)
+  - input_basename (basename of sam_input_path; the key every consumer
+    joins on)
+  - one typed column per hyperparameter, hp_<name> (INTEGER/REAL/TEXT), so
+    readers don't have to JSON-decode hyperparams_json row by row
+  - any extra per-run columns the launcher logs (steady_time, cpu_sec, ...),
+    added with ALTER TABLE the first time they show up
+
+Indexed on case, status and input_basename.
+
+The database runs in WAL mode by default (readers never block the writer),
+and every write is a short BEGIN IMMEDIATE transaction with a busy timeout,
+so several threads / processes can log runs at once.
+WAL needs shared memory and does not work on network file systems; set
+CONFIG["run_store"]["journal_mode"] = "DELETE" if the store lives on one.
+
+The CSV log stays available as an export, and old CSV logs can be imported:
+
+    python -m sam_tuner.run_store import [runtimes_master.csv]
+    python -m sam_tuner.run_store export [runtimes_master.csv]
+    python -m sam_tuner.run_store info
+"""
+
+import argparse
+import json
+import math
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Iterator, List
+
+import pandas as pd
+
+from .config import CONFIG
+
+
+TABLE = "runs"
+
+# Fixed columns, in runtime_logger's CSV order (+ input_basename).
+BASE_COLUMNS = {
+    "run_id": "TEXT UNIQUE NOT NULL",
+    "timestamp_start": "TEXT",
+    "timestamp_end": "TEXT",
+    "case": "TEXT",
+    "sam_input_path": "TEXT",
+    "input_basename": "TEXT",
+    "output_dir": "TEXT",
+    "status": "TEXT",
+    "return_code": "INTEGER",
+    "runtime_sec": "REAL",
+    "timeout_sec": "REAL",
+    "hyperparams_json": "TEXT",
+}
+
+INDEXED_COLUMNS = ("case", "status", "input_basename")
+
+# Stores whose schema has been checked by this process (path -> known columns)
+_KNOWN_COLUMNS: Dict[str, set] = {}
+_SCHEMA_LOCK = threading.Lock()
+
+
+# --- Connection helpers ----------------------------------------------------
+
+def _store_path(path: Optional[Path] = None) -> Path:
+    """Path of the SQLite file (CONFIG["paths"]["run_store"] by default)."""
+    return Path(path if path is not None else CONFIG["paths"]["run_store"]).resolve()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    """Open a connection with the store's pragmas applied."""
+    cfg = CONFIG["run_store"]
+    busy_ms = int(cfg.get("busy_timeout_ms", 30000))
+    conn = sqlite3.connect(str(path), timeout=busy_ms / 1000.0, isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout = {busy_ms}")
+    conn.execute(f"PRAGMA journal_mode = {cfg.get('journal_mode', 'WAL')}")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    return conn
+
+
+@contextmanager
+def connect(path: Optional[Path] = None) -> Iterator[sqlite3.Connection]:
+    """
+    Context manager yielding a connection to the (initialized) run store.
+
+    The schema is created on first use; if the store is new and the CSV
+    runtime log exists, the CSV is imported once.
+    """
+    path = _store_path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = _connect(path)
+    try:
+        _ensure_schema(conn, path)
+        yield conn
+    finally:
+        conn.close()
+
+
+def _ensure_schema(conn: sqlite3.Connection, path: Path) -> None:
+    key = str(path)
+    with _SCHEMA_LOCK:
+        if key in _KNOWN_COLUMNS:
+            return
+        cols_sql = ",\n  ".join(f'"{c}" {t}' for c, t in BASE_COLUMNS.items())
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (TABLE,)
+            ).fetchone()
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE} (\n"
+                f"  id INTEGER PRIMARY KEY AUTOINCREMENT,\n  {cols_sql}\n)"
+            )
+            for col in INDEXED_COLUMNS:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_{col} ON {TABLE} ("{col}")')
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        _KNOWN_COLUMNS[key] = _table_columns(conn)
+
+    if not exists:
+        csv_path = Path(CONFIG["paths"]["runtime_log"]).resolve()
+        if csv_path.exists():
+            n = _import_csv(conn, path, csv_path)
+            print(f"[run_store] New store {path.name}: imported {n} run(s) from {csv_path}")
+
+
+def _table_columns(conn: sqlite3.Connection) -> set:
+    return {r[1] for r in conn.execute(f"PRAGMA table_info({TABLE})")}
+
+
+def _sql_type(value: Any) -> str:
+    """
+    Declared type for a new column, from the first value seen.
+
+    None gets no declared type (values are stored as given): a TEXT column
+    would turn later numbers into strings.
+    """
+    if isinstance(value, (bool, int)):
+        return "INTEGER"
+    if isinstance(value, float):
+        return "REAL"
+    if isinstance(value, str):
+        return "TEXT"
+    return ""
+
+
+def _sql_value(value: Any) -> Any:
+    """Convert a Python value into something sqlite3 can bind."""
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "item"):  # numpy scalar
+        return _sql_value(value.item())
+    return json.dumps(value, default=str)
+
+
+def _add_missing_columns(conn: sqlite3.Connection, path: Path, row: Dict[str, Any]) -> None:
+    """ALTER TABLE for columns of `row` the table doesn't have yet (inside a transaction)."""
+    known = _KNOWN_COLUMNS.setdefault(str(path), set())
+    missing = [k for k in row if k not in known]
+    if not missing:
+        return
+    known |= _table_columns(conn)  # another process may have added them
+    for col in missing:
+        if col in known:
+            continue
+        conn.execute(f'ALTER TABLE {TABLE} ADD COLUMN "{col}" {_sql_type(row[col])}'.rstrip())
+        known.add(col)
+
+
+def _flatten_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a runtime_logger row into a store row: add input_basename and
+    one hp_<name> column per hyperparameter found in hyperparams_json.
+    """
+    out = dict(row)
+    if out.get("sam_input_path") and not out.get("input_basename"):
+        out["input_basename"] = Path(str(out["sam_input_path"])).name
+    hp_json = out.get("hyperparams_json")
+    if isinstance(hp_json, str) and hp_json:
+        try:
+            hyperparams = json.loads(hp_json)
+        except ValueError:
+            hyperparams = {}
+        for name, val in hyperparams.items():
+            out.setdefault(f"hp_{name}", val)
+    return {k: _sql_value(v) for k, v in out.items()}
+
+
+def _insert(conn: sqlite3.Connection, path: Path, row: Dict[str, Any], ignore_existing: bool = False) -> int:
+    _add_missing_columns(conn, path, row)
+    cols = list(row)
+    verb = "INSERT OR IGNORE" if ignore_existing else "INSERT"
+    col_sql = ", ".join(f'"{c}"' for c in cols)
+    val_sql = ", ".join("?" for _ in cols)
+    cur = conn.execute(
+        f"{verb} INTO {TABLE} ({col_sql}) VALUES ({val_sql})",
+        [row[c] for c in cols],
+    )
+    return cur.rowcount
+
+
+# --- Public API ------------------------------------------------------------
+
+def insert_run(row: Dict[str, Any], path: Optional[Path] = None) -> None:
+    """
+    Insert one finished run (a runtime_logger row) into the store.
+
+    New columns are added on the fly; hyperparameters in hyperparams_json
+    are also written to typed hp_<name> columns.
+    """
+    store_row = _flatten_row(row)
+    with connect(path) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            _insert(conn, _store_path(path), store_row)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def read_runs(
+    path: Optional[Path] = None,
+    statuses: Optional[List[str]] = None,
+    case: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    since_id: Optional[int] = None,
+    input_basenames: Optional[List[str]] = None,
+    with_id: bool = False,
+) -> pd.DataFrame:
+    """
+    Read runs from the store as a DataFrame (oldest first).
+
+    Parameters
+    ----------
+    statuses : list of str or None
+        Only runs with one of these statuses.
+    case : str or None
+        Only runs of this case.
+    columns : list of str or None
+        Only these columns (default: all).
+    since_id : int or None
+        Only runs stored after the run with this row id (see with_id);
+        for readers that keep a high-water mark.
+    input_basenames : list of str or None
+        Only runs of these input files (uses the input_basename index).
+    with_id : bool
+        Keep the store's row id as column 'id'.
+    """
+    where, params = [], []
+    if statuses:
+        where.append(f"status IN ({', '.join('?' for _ in statuses)})")
+        params.extend(statuses)
+    if case is not None:
+        where.append("\"case\" = ?")
+        params.append(case)
+    if since_id is not None:
+        where.append("id > ?")
+        params.append(int(since_id))
+    if columns:
+        columns = list(columns)
+        if with_id and "id" not in columns:
+            columns.insert(0, "id")
+    select = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+    sql = f"SELECT {select} FROM {TABLE}"
+
+    if input_basenames is not None:
+        # Stay well below SQLite's limit on bound parameters
+        names = list(input_basenames)
+        chunks = [names[i:i + 500] for i in range(0, len(names), 500)] or [[]]
+    else:
+        chunks = [None]
+
+    frames = []
+    with connect(path) as conn:
+        for chunk in chunks:
+            chunk_where, chunk_params = list(where), list(params)
+            if chunk is not None:
+                chunk_where.append(f"input_basename IN ({', '.join('?' for _ in chunk)})")
+                chunk_params.extend(chunk)
+            chunk_sql = sql
+            if chunk_where:
+                chunk_sql += " WHERE " + " AND ".join(chunk_where)
+            chunk_sql += " ORDER BY id"
+            frames.append(pd.read_sql_query(chunk_sql, conn, params=chunk_params))
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    if "id" in df.columns and not with_id:
+        df = df.drop(columns="id")
+    return df
+
+
+def store_exists(path: Optional[Path] = None) -> bool:
+    """True if the store file exists (without creating it)."""
+    return _store_path(path).exists()
+
+
+def _import_csv(conn: sqlite3.Connection, path: Path, csv_path: Path) -> int:
+    """Import rows from a CSV runtime log; rows whose run_id is already stored are skipped."""
+    df = pd.read_csv(csv_path)
+    if "run_id" not in df.columns:
+        raise ValueError(f"{csv_path} has no run_id column; is it a runtime log?")
+    n = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for rec in df.to_dict(orient="records"):
+            rec = {k: v for k, v in rec.items() if not (isinstance(v, float) and math.isnan(v))}
+            n += _insert(conn, path, _flatten_row(rec), ignore_existing=True)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return n
+
+
+def import_csv(csv_path: Optional[Path] = None, path: Optional[Path] = None) -> int:
+    """
+    Import an existing CSV runtime log (default: CONFIG["paths"]["runtime_log"]).
+
+    Safe to repeat: runs already in the store (same run_id) are skipped.
+    Returns the number of rows imported.
+    """
+    csv_path = Path(csv_path if csv_path is not None else CONFIG["paths"]["runtime_log"]).resolve()
+    with connect(path) as conn:
+        return _import_csv(conn, _store_path(path), csv_path)
+
+
+def export_csv(csv_path: Optional[Path] = None, path: Optional[Path] = None) -> Path:
+    """
+    Write the whole store out as a CSV runtime log
+    (default: CONFIG["paths"]["runtime_log"]). Returns the path written.
+
+    The typed hp_* / input_basename columns are left out, so the file has
+    the same layout runtime_logger's CSV backend writes.
+    """
+    csv_path = Path(csv_path if csv_path is not None else CONFIG["paths"]["runtime_log"]).resolve()
+    df = read_runs(path)
+    df = df[[c for c in df.columns if not c.startswith("hp_") and c != "input_basename"]]
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = csv_path.with_name(csv_path.name + ".tmp")
+    df.to_csv(tmp, index=False)
+    tmp.replace(csv_path)
+    return csv_path
+
+
+def read_runtime_log() -> Optional[pd.DataFrame]:
+    """
+    Load the runtime log from wherever CONFIG["run_store"]["backend"] says
+    it lives: the SQLite store (falling back to the CSV if no store exists
+    yet) or the CSV. Returns None if there is no log at all.
+    """
+    if CONFIG.get("run_store", {}).get("backend", "csv") == "sqlite" and store_exists():
+        return read_runs()
+    csv_path = Path(CONFIG["paths"]["runtime_log"]).resolve()
+    if csv_path.exists():
+        return pd.read_csv(csv_path)
+    return None
+
+
+# --- CLI -------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the SQLite run store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_imp = sub.add_parser("import", help="Import a CSV runtime log into the store.")
+    p_imp.add_argument("csv", nargs="?", default=None,
+                       help="CSV to import (default: CONFIG['paths']['runtime_log']).")
+    p_exp = sub.add_parser("export", help="Export the store as a CSV runtime log.")
+    p_exp.add_argument("csv", nargs="?", default=None,
+                       help="Where to write (default: CONFIG['paths']['runtime_log']).")
+    sub.add_parser("info", help="Print row counts by status.")
+
+    args = parser.parse_args()
+    if args.command == "import":
+        n = import_csv(args.csv)
+        print(f"[run_store] Imported {n} run(s) into {_store_path()}")
+    elif args.command == "export":
+        out = export_csv(args.csv)
+        print(f"[run_store] Exported runs to {out}")
+    else:
+        df = read_runs(columns=["status"])
+        print(f"[run_store] {_store_path()}: {len(df)} run(s)")
+        for status, count in df["status"].value_counts().items():
+            print(f"  {status:14s}: {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+run_watchers.py
+
+Live watchers that run_launcher polls while a SAM process is running.
+
+- SteadyStateWatcher: tails the growing <input>_csv.csv and reports when the
+  transient has settled (rates of change of the monitored postprocessors
+  stay below a tolerance for N consecutive output steps), so the run can be
+  stopped early instead of integrating a converged solution up to end_time.
+- ConsoleWatcher: parses SAM's console output line by line as it arrives
+  (time step / dt, nonlinear iterations, failed solves and timestep
+  cutbacks, linear solver failures) and reports when the run is clearly
+  diverging, so it can be killed instead of cutting dt down to dtmin.
+  Its counters are also logged as per-run telemetry.
+
+Watchers only read; stopping the process is up to run_launcher.
+"""
+
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+from .config import CONFIG
+
+
+class CsvTail:
+    """
+    Incrementally read complete rows from a CSV that another process is
+    still appending to.
+
+    Keeps a byte offset, so each read() only parses what was added since the
+    last call. A partially written last line is held back until its newline
+    arrives.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header: Optional[List[str]] = None
+        self._offset = 0
+        self._partial = b""
+
+    def read(self) -> List[Dict[str, float]]:
+        """Return the new complete rows as {column: float} dicts."""
+        if not self.path.exists():
+            return []
+        with self.path.open("rb") as f:
+            f.seek(self._offset)
+            chunk = f.read()
+        if not chunk:
+            return []
+        self._offset += len(chunk)
+
+        data = self._partial + chunk
+        lines = data.split(b"\n")
+        self._partial = lines.pop()  # b"" if chunk ended with a newline
+
+        rows = []
+        for raw in lines:
+            line = raw.decode(errors="replace").strip()
+            if not line:
+                continue
+            fields = [x.strip() for x in line.split(",")]
+            if self.header is None:
+                self.header = fields
+                continue
+            if len(fields) != len(self.header):
+                continue
+            row = {}
+            for name, val in zip(self.header, fields):
+                try:
+                    row[name] = float(val)
+                except ValueError:
+                    row[name] = math.nan
+            rows.append(row)
+        return rows
+
+
+class SteadyStateWatcher:
+    """
+    Decide when a running SAM transient has reached steady state.
+
+    For every new CSV row we compute, for each monitored column x,
+
+        rate = |x_k - x_{k-1}| / (t_k - t_{k-1}) / max(|x_k|, abs_floor)
+
+    i.e. the relative rate of change per simulated second. The row counts
+    as "steady" if the largest rate over all monitored columns is below
+    rel_rate_tol. The run is declared steady once n_steps consecutive rows
+    are steady and time >= min_time; steady_time is the time of that row.
+
+    Columns listed in the config but absent from the CSV are ignored.
+    """
+
+    def __init__(
+        self,
+        csv_path: Path,
+        columns: Optional[Sequence[str]] = None,
+        rel_rate_tol: Optional[float] = None,
+        n_steps: Optional[int] = None,
+        min_time: Optional[float] = None,
+        abs_floor: Optional[float] = None,
+    ):
+        cfg = CONFIG["steady_state"]
+        self.tail = CsvTail(csv_path)
+        self.columns = list(columns if columns is not None else cfg["columns"])
+        self.rel_rate_tol = float(rel_rate_tol if rel_rate_tol is not None else cfg["rel_rate_tol"])
+        self.n_steps = int(n_steps if n_steps is not None else cfg["n_steps"])
+        self.min_time = float(min_time if min_time is not None else cfg["min_time"])
+        self.abs_floor = float(abs_floor if abs_floor is not None else cfg["abs_floor"])
+
+        self.steady_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self.max_rate: Optional[float] = None
+        self._streak = 0
+        self._prev: Optional[Dict[str, float]] = None
+        self._time_col: Optional[str] = None
+        self._cols: List[str] = []
+
+    def _setup_columns(self) -> None:
+        header = self.tail.header or []
+        for name in header:
+            if name.lower() == "time":
+                self._time_col = name
+                break
+        self._cols = [c for c in self.columns if c in header]
+
+    def poll(self) -> bool:
+        """Consume new CSV rows; return True once steady state is detected."""
+        if self.steady_time is not None:
+            return True
+
+        for row in self.tail.read():
+            if self._time_col is None:
+                self._setup_columns()
+                if self._time_col is None or not self._cols:
+                    return False
+
+            t = row[self._time_col]
+            self.last_time = t
+            prev, self._prev = self._prev, row
+            if prev is None:
+                continue
+            dt = t - prev[self._time_col]
+            if not dt > 0:
+                continue
+
+            rate = 0.0
+            for c in self._cols:
+                scale = max(abs(row[c]), self.abs_floor)
+                r = abs(row[c] - prev[c]) / dt / scale
+                if math.isnan(r):
+                    rate = math.nan
+                    break
+                rate = max(rate, r)
+            if math.isnan(rate):
+                self._streak = 0
+                continue
+            self.max_rate = rate
+
+            if rate <= self.rel_rate_tol:
+                self._streak += 1
+            else:
+                self._streak = 0
+
+            if self._streak >= self.n_steps and t >= self.min_time:
+                self.steady_time = t
+                return True
+        return False
+
+
+# SAM/MOOSE colours its console output.
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+_NUM = r"([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+_TIME_STEP_RE = re.compile(r"^Time Step\s+(\d+),\s*time\s*=\s*" + _NUM + r"(?:,\s*dt\s*=\s*" + _NUM + r")?")
+_NONLINEAR_RE = re.compile(r"^\s*(\d+)\s+Nonlinear \|R\|")
+_LINEAR_FAIL_RE = re.compile(r"Linear solve did not converge")
+_SOLVE_OK_RE = re.compile(r"Solve Converged!")
+_SOLVE_FAIL_RE = re.compile(r"Solve Did NOT Converge!")
+
+
+class ConsoleWatcher:
+    """
+    Parse SAM console output and decide whether the run is diverging.
+
+    Feed it lines with feed(); check diverge_reason afterwards. The run is
+    flagged when any enabled threshold from CONFIG["divergence"] is crossed:
+
+    - max_fail_streak : consecutive failed solves (each one a dt cutback)
+    - min_dt          : dt dropped below this after a failed solve
+    - max_nl_its      : nonlinear iterations of a single (converged) step
+    - max_failed_frac : failed / attempted solves, once at least
+                        min_attempts solves have been tried
+
+    A threshold set to None is not checked.
+    """
+
+    def __init__(
+        self,
+        max_fail_streak: Optional[int] = None,
+        min_dt: Optional[float] = None,
+        max_nl_its: Optional[int] = None,
+        max_failed_frac: Optional[float] = None,
+        min_attempts: Optional[int] = None,
+    ):
+        cfg = CONFIG["divergence"]
+        self.max_fail_streak = max_fail_streak if max_fail_streak is not None else cfg["max_fail_streak"]
+        self.min_dt = min_dt if min_dt is not None else cfg["min_dt"]
+        self.max_nl_its = max_nl_its if max_nl_its is not None else cfg["max_nl_its"]
+        self.max_failed_frac = max_failed_frac if max_failed_frac is not None else cfg["max_failed_frac"]
+        self.min_attempts = int(min_attempts if min_attempts is not None else cfg["min_attempts"])
+
+        self.steps_ok = 0
+        self.steps_failed = 0
+        self.fail_streak = 0
+        self.fail_streak_max = 0
+        self.linear_failures = 0
+        self.nl_its_total = 0
+        self.nl_its_max = 0
+        self.dt_min: Optional[float] = None
+        self.dt_last: Optional[float] = None
+        self.sim_time_last: Optional[float] = None
+        self.diverge_reason: Optional[str] = None
+        self._nl_its = 0
+
+    def feed(self, line: str) -> None:
+        """Update the counters with one console line."""
+        line = _ANSI_RE.sub("", line).rstrip()
+        if not line:
+            return
+
+        m = _NONLINEAR_RE.match(line)
+        if m:
+            self._nl_its = int(m.group(1))
+            return
+
+        m = _TIME_STEP_RE.match(line)
+        if m:
+            self.sim_time_last = float(m.group(2))
+            if m.group(3) is not None:
+                dt = float(m.group(3))
+                self.dt_last = dt
+                self.dt_min = dt if self.dt_min is None else min(self.dt_min, dt)
+            self._nl_its = 0
+            return
+
+        if _LINEAR_FAIL_RE.search(line):
+            self.linear_failures += 1
+        elif _SOLVE_OK_RE.search(line):
+            self.steps_ok += 1
+            self.fail_streak = 0
+            self._end_step()
+        elif _SOLVE_FAIL_RE.search(line):
+            self.steps_failed += 1
+            self.fail_streak += 1
+            self.fail_streak_max = max(self.fail_streak_max, self.fail_streak)
+            self._end_step()
+
+    def _end_step(self) -> None:
+        self.nl_its_total += self._nl_its
+        self.nl_its_max = max(self.nl_its_max, self._nl_its)
+        if self.diverge_reason is None:
+            self.diverge_reason = self._check()
+        self._nl_its = 0
+
+    def _check(self) -> Optional[str]:
+        if self.max_fail_streak is not None and self.fail_streak >= self.max_fail_streak:
+            return f"{self.fail_streak} failed solves in a row"
+        if (self.min_dt is not None and self.fail_streak > 0
+                and self.dt_last is not None and self.dt_last < self.min_dt):
+            return f"dt = {self.dt_last:g} < min_dt = {self.min_dt:g} after a failed solve"
+        if self.max_nl_its is not None and self._nl_its > self.max_nl_its:
+            return f"{self._nl_its} nonlinear iterations in one step"
+        attempts = self.steps_ok + self.steps_failed
+        if (self.max_failed_frac is not None and attempts >= self.min_attempts
+                and self.steps_failed / attempts > self.max_failed_frac):
+            return f"{self.steps_failed}/{attempts} solves failed"
+        return None
+
+    def telemetry(self) -> Dict[str, Any]:
+        """Counters to log with the run (column name -> value)."""
+        return {
+            "steps_ok": self.steps_ok,
+            "steps_failed": self.steps_failed,
+            "fail_streak_max": self.fail_streak_max,
+            "linear_failures": self.linear_failures,
+            "nl_its_total": self.nl_its_total,
+            "nl_its_max": self.nl_its_max,
+            "dt_min": self.dt_min,
+            "dt_last": self.dt_last,
+            "sim_time_last": self.sim_time_last,
+            "diverge_reason": self.diverge_reason,
+        }
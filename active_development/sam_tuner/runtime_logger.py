@@ -4,19 +4,31 @@ runtime_logger.py
 Central runtime logging utilities for SAM runs.
 
 - Uses time.perf_counter() for high-resolution, monotonic timing.
-- Appends one row per run to a single CSV file: runtimes_master.csv
+- Records one row per run, either in the SQLite run store (run_store.py,
+  CONFIG["run_store"]["backend"] = "sqlite", the default) or appended to a
+  single CSV file: runtimes_master.csv ("csv")
 - Stores:
     - run_id, timestamps, case, paths
-    - status (success/fail/timeout/skipped)
+    - status (success/success_steady/fail/timeout/diverged/skipped)
     - return_code, runtime_sec, timeout_sec
     - hyperparams_json (serialized dict of hyperparameters)
+    - extra per-run columns passed by the launcher (e.g. steady_time and
+      the console telemetry: steps_ok, steps_failed, nl_its_total, dt_min, ...)
 
 This module is used by run_launcher.py and (later) optimizer loops.
 You normally don't call it directly from the command line.
+
+CSV appends are serialized with a thread lock (for run_launcher.run_sam_cases)
+plus an advisory file lock (for several Python processes sharing one log),
+so rows from concurrent runs never interleave. If a row brings a column the
+existing file does not have yet, the file is rewritten once with the wider
+header (old rows get empty cells), so columns always line up.
 """
 
 import csv
+import fcntl
 import json
+import threading
 import uuid
 from dataclasses import dataclass, asdict
 from datetime import datetime
@@ -25,6 +37,16 @@ from pathlib import Path
 from typing import Dict, Any, Optional
 
 from .config import CONFIG
+from . import run_store
+
+
+# Guards appends from worker threads in the same process.
+_LOG_LOCK = threading.Lock()
+
+# Statuses of runs that produced a usable result.
+#   success        : SAM reached end_time
+#   success_steady : stopped early by the steady-state watcher
+SUCCESS_STATUSES = ("success", "success_steady")
 
 
 # --- Internal dataclass for in-memory context ------------------------------
@@ -88,20 +110,24 @@ def start_run(case: str,
 def end_run(run_ctx: _RunContext,
             status: str,
             return_code: Optional[int] = None,
-            timeout_sec: Optional[float] = None) -> Dict[str, Any]:
+            timeout_sec: Optional[float] = None,
+            extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
-    Finalize a run and append a row to the master runtime CSV.
+    Finalize a run and record it in the runtime log (run store and/or CSV).
 
     Parameters
     ----------
     run_ctx : _RunContext
         Context returned by start_run().
     status : str
-        One of {"success", "fail", "timeout", "skipped"}.
+        One of {"success", "success_steady", "fail", "timeout", "diverged",
+        "skipped"}.
     return_code : int or None
         Subprocess return code (None for skipped/timeout if not available).
     timeout_sec : float or None
         Timeout used for this run, if any.
+    extra : dict or None
+        Additional columns to log for this run (e.g. {"steady_time": 712.4}).
 
     Returns
     -------
@@ -125,17 +151,56 @@ def end_run(run_ctx: _RunContext,
         "timeout_sec": timeout_sec,
         "hyperparams_json": run_ctx.hyperparams_json,
     }
+    if extra:
+        for key, val in extra.items():
+            row.setdefault(key, val)
+
+    store_cfg = CONFIG.get("run_store", {})
+    if store_cfg.get("backend", "csv") == "sqlite":
+        run_store.insert_run(row)
+        if not store_cfg.get("mirror_csv", False):
+            return row
 
     # Append to CSV (create with header if it doesn't exist)
     log_path = _get_runtime_log_path()
     log_path.parent.mkdir(parents=True, exist_ok=True)
-    file_exists = log_path.exists()
-
-    fieldnames = list(row.keys())
-    with log_path.open("a", newline="") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
+    _append_row(log_path, row)
 
     return row
+
+
+def _append_row(log_path: Path, row: Dict[str, Any]) -> None:
+    """
+    Append one row to the CSV log, holding both locks.
+
+    The header is read under the lock: a new file gets the row's keys as
+    header; an existing file whose header lacks some of the row's keys is
+    rewritten with the union of columns first.
+    """
+    with _LOG_LOCK, log_path.open("a+", newline="") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            f.seek(0)
+            header = next(csv.reader([f.readline()]), [])
+            if not header:
+                fieldnames = list(row.keys())
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+            else:
+                fieldnames = header
+                new_cols = [k for k in row if k not in header]
+                if new_cols:
+                    fieldnames = header + new_cols
+                    f.seek(0)
+                    old_rows = list(csv.DictReader(f))
+                    f.seek(0)
+                    f.truncate()
+                    writer = csv.DictWriter(f, fieldnames=fieldnames)
+                    writer.writeheader()
+                    writer.writerows(old_rows)
+                f.seek(0, 2)
+            writer = csv.DictWriter(f, fieldnames=fieldnames, restval="")
+            writer.writerow(row)
+            f.flush()
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
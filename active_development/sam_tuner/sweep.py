@@ -0,0 +1,647 @@
+"""
+sweep.py
+
+Resumable SAM sweeps on top of a persistent work queue.
+
+A sweep spec is a small declarative dict:
+
+    SPEC = {
+        "name": "mesh_study",                   # queue name (resume key)
+        "templates": ["jsalt1.i", "jsalt2.i"],  # case_name = template stem
+        "hyperparams": {                        # outermost loop first
+            "order": [1, 2],                    # list  -> swept
+            "h_amb": 1.0e5,                     # value -> fixed
+            "T_0": lambda case: [440.0, 446.0], # callable(case_name) -> value or list
+            "node_multiplier": [6, 12, 24],
+        },
+        "run_kwargs": {"force_rerun": False},   # passed on to run_sam_case
+    }
+
+expand_spec() turns it into one run_sam_case() item per combination, and
+run_sweep() puts them in the queue and works through it. Every item is
+pending, running or done (failed: could not be started, or orphaned
+max_attempts times):
+
+  - claim() moves the oldest pending item to running atomically, so any
+    number of worker threads / processes / nodes can share a queue without
+    running an item twice;
+  - a running item holds a lease (lease_sec) that its worker renews while
+    SAM runs; items whose lease ran out (worker killed, node lost) go back
+    to pending and are picked up by the next claim;
+  - enqueueing is idempotent (items are keyed by a hash of their content),
+    so re-running the same driver after a crash or a wall-clock limit only
+    does what is left.
+
+Two queue backends (CONFIG["sweep"]["backend"]):
+
+  - "sqlite": WorkQueue, one SQLite file (CONFIG["paths"]["sweep_queue"]);
+    claims are BEGIN IMMEDIATE transactions. For one node, or a file
+    system with working POSIX locks.
+  - "files":  FileQueue, one JSON file per item under
+    CONFIG["paths"]["sweep_queue_dir"]; every state change is an atomic
+    rename, so it needs no locks and works on shared (Lustre / NFS) file
+    systems. Used by the multi-node workers (worker.py).
+
+Usage (from active_development):
+
+    python script.py                               # enqueue + work on its spec
+    python -m sam_tuner.sweep status               # counts per sweep
+    python -m sam_tuner.sweep enqueue script       # queue script.py's SPEC only
+    python -m sam_tuner.sweep run script           # another worker on a queued sweep
+    python -m sam_tuner.sweep requeue script --failed
+"""
+
+import argparse
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import re
+import socket
+import sqlite3
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .config import CONFIG
+from .run_launcher import _resolve_max_workers, _run_batch_item
+
+
+STATUSES = ("pending", "running", "done", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  sweep TEXT NOT NULL,
+  item_key TEXT NOT NULL,
+  payload_json TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'pending',
+  attempts INTEGER NOT NULL DEFAULT 0,
+  worker TEXT,
+  lease_expires REAL,
+  enqueued_at REAL,
+  started_at REAL,
+  finished_at REAL,
+  result_status TEXT,
+  sam_input_path TEXT,
+  error TEXT,
+  UNIQUE (sweep, item_key)
+);
+CREATE INDEX IF NOT EXISTS idx_items_claim ON items (sweep, status, id);
+"""
+
+
+# === SPEC EXPANSION ========================================================
+
+def _plain(value: Any) -> Any:
+    """numpy scalars -> Python numbers (items are stored as JSON)."""
+    return value.item() if hasattr(value, "item") and not isinstance(value, (list, tuple)) else value
+
+
+def _axis(value: Any, case_name: str) -> List[Any]:
+    if callable(value):
+        value = value(case_name)
+    if isinstance(value, (list, tuple)) or type(value).__name__ == "ndarray":
+        return [_plain(v) for v in value]
+    return [_plain(value)]
+
+
+def expand_spec(spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    One run_sam_case() item per combination of a sweep spec (format in the
+    module docstring), templates outermost, then the hyperparameters in the
+    order they are listed.
+    """
+    items = []
+    run_kwargs = dict(spec.get("run_kwargs", {}))
+    for template_name in spec["templates"]:
+        case_name = Path(template_name).stem
+        names = list(spec["hyperparams"])
+        axes = [_axis(spec["hyperparams"][n], case_name) for n in names]
+        for combo in itertools.product(*axes):
+            items.append({
+                "case_name": case_name,
+                "template_name": template_name,
+                "hyperparams": dict(zip(names, combo)),
+                **run_kwargs,
+            })
+    return items
+
+
+def _item_key(item: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(item, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# === WORK QUEUE ============================================================
+
+class QueueItem:
+    """A claimed item: queue id (row id / file base) + the run_sam_case() keyword arguments."""
+
+    def __init__(self, item_id: Any, sweep: str, payload: Dict[str, Any], attempts: int):
+        self.id = item_id
+        self.sweep = sweep
+        self.payload = payload
+        self.attempts = attempts
+
+
+class WorkQueue:
+    """
+    SQLite work queue of sweep items (see module docstring).
+
+    Every method opens its own short-lived connection, so one WorkQueue can
+    be used from several threads.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        cfg = CONFIG.get("sweep", {})
+        self.path = Path(path if path is not None else CONFIG["paths"]["sweep_queue"]).resolve()
+        self.busy_ms = int(cfg.get("busy_timeout_ms", 30000))
+        self.journal_mode = cfg.get("journal_mode", "WAL")
+        self.max_attempts = int(cfg.get("max_attempts", 3))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=self.busy_ms / 1000.0, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_ms}")
+        conn.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def _transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run fn(conn) inside BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error)."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return out
+
+    def enqueue(self, sweep: str, items: Iterable[Dict[str, Any]]) -> int:
+        """Add items not yet in the sweep; returns how many were new."""
+        now = time.time()
+        rows = [(sweep, _item_key(it), json.dumps(it, default=str), now) for it in items]
+
+        def _insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO items (sweep, item_key, payload_json, enqueued_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            return conn.total_changes - before
+
+        return self._transaction(_insert)
+
+    def _requeue_expired(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute(
+            "UPDATE items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "worker = NULL, lease_expires = NULL, "
+            "error = 'lease expired (worker ' || COALESCE(worker, '?') || ')' "
+            "WHERE status = 'running' AND lease_expires < ?",
+            (self.max_attempts, now),
+        )
+
+    def claim(self, worker: str, lease_sec: float, sweep: Optional[str] = None) -> Optional[QueueItem]:
+        """
+        Atomically move the oldest pending item (of `sweep`, or of any sweep)
+        to running for `worker`. Orphaned items are requeued first.
+        Returns None if nothing is pending.
+        """
+        def _claim(conn):
+            now = time.time()
+            self._requeue_expired(conn, now)
+            sql = "SELECT id, sweep, payload_json, attempts FROM items WHERE status = 'pending'"
+            args: tuple = ()
+            if sweep is not None:
+                sql += " AND sweep = ?"
+                args = (sweep,)
+            row = conn.execute(sql + " ORDER BY id LIMIT 1", args).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE items SET status = 'running', worker = ?, lease_expires = ?, "
+                "started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now + lease_sec, now, row[0]),
+            )
+            return QueueItem(row[0], row[1], json.loads(row[2]), row[3] + 1)
+
+        return self._transaction(_claim)
+
+    def heartbeat(self, item_ids: Iterable[int], worker: str, lease_sec: float) -> None:
+        """Renew the leases of the given items (only those still held by worker)."""
+        ids = list(item_ids)
+        if not ids:
+            return
+        until = time.time() + lease_sec
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE items SET lease_expires = ? WHERE id = ? AND status = 'running' AND worker = ?",
+            [(until, i, worker) for i in ids],
+        ))
+
+    def complete(self, item_id: int, worker: str, summary: Dict[str, Any]) -> None:
+        """
+        Record a finished item. A run that SAM finished in any way (success,
+        fail, timeout, ...) is done; an item that could not be started
+        (run_launcher status 'error') is failed.
+        """
+        status = "failed" if summary.get("status") == "error" else "done"
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE items SET status = ?, finished_at = ?, lease_expires = NULL, "
+            "result_status = ?, sam_input_path = ?, error = ? "
+            "WHERE id = ? AND worker = ?",
+            (status, time.time(), summary.get("status"), summary.get("sam_input_path"),
+             summary.get("error"), item_id, worker),
+        ))
+
+    def release(self, item_ids: Iterable[int], worker: str) -> None:
+        """Give running items back (worker shutting down); they are retried."""
+        self._transaction(lambda conn: conn.executemany(
+            "UPDATE items SET status = 'pending', worker = NULL, lease_expires = NULL, "
+            "attempts = MAX(attempts - 1, 0) WHERE id = ? AND status = 'running' AND worker = ?",
+            [(i, worker) for i in item_ids],
+        ))
+
+    def requeue(self, sweep: str, statuses: Iterable[str] = ("failed",)) -> int:
+        """Put items of the given statuses back to pending; returns how many."""
+        statuses = list(statuses)
+        marks = ", ".join("?" * len(statuses))
+
+        def _requeue(conn):
+            cur = conn.execute(
+                f"UPDATE items SET status = 'pending', worker = NULL, lease_expires = NULL, "
+                f"attempts = 0, error = NULL WHERE sweep = ? AND status IN ({marks})",
+                (sweep, *statuses),
+            )
+            return cur.rowcount
+
+        return self._transaction(_requeue)
+
+    def counts(self, sweep: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """{sweep: {status: n}} (orphaned items count as running until claimed)."""
+        with closing(self._connect()) as conn:
+            sql = "SELECT sweep, status, COUNT(*) FROM items"
+            args: tuple = ()
+            if sweep is not None:
+                sql += " WHERE sweep = ?"
+                args = (sweep,)
+            rows = conn.execute(sql + " GROUP BY sweep, status", args).fetchall()
+        out: Dict[str, Dict[str, int]] = {}
+        for name, status, n in rows:
+            out.setdefault(name, {s: 0 for s in STATUSES})[status] = n
+        return out
+
+
+class FileQueue:
+    """
+    Work queue kept as one small JSON file per item in a directory tree, for
+    shared (network / parallel) file systems where SQLite's locking can't
+    be trusted across nodes. No lock is taken anywhere; every state change
+    is a single os.rename(), which only one worker can win:
+
+        <root>/<sweep>/pending/<base>__a<attempts>.json
+        <root>/<sweep>/running/<base>__a<attempts>__<worker>__<lease expiry>.json
+        <root>/<sweep>/done/<base>.json       (payload + result)
+        <root>/<sweep>/failed/<base>.json
+
+    <base> is <enqueue time ns>-<item key>, so pending items sort in queue
+    order. A lease is renewed by renaming to a later expiry. Lease expiry
+    compares wall clocks of different nodes, so keep lease_sec well above
+    their skew.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        cfg = CONFIG.get("sweep", {})
+        self.root = Path(path if path is not None else CONFIG["paths"]["sweep_queue_dir"]).resolve()
+        self.max_attempts = int(cfg.get("max_attempts", 3))
+        self.root.mkdir(parents=True, exist_ok=True)
+        # (item id, worker) -> current running file, for workers of this process
+        self._held: Dict[Tuple[str, str], Path] = {}
+
+    def _dir(self, sweep: str, status: str) -> Path:
+        d = self.root / sweep / status
+        d.mkdir(parents=True, exist_ok=True)
+        return d
+
+    def _sweeps(self, sweep: Optional[str]) -> List[str]:
+        if sweep is not None:
+            return [sweep]
+        return sorted(p.name for p in self.root.iterdir() if p.is_dir())
+
+    @staticmethod
+    def _parse(name: str) -> Dict[str, Any]:
+        """base, attempts and (running files) worker / expiry from a file name."""
+        parts = name[:-len(".json")].split("__")
+        out: Dict[str, Any] = {"base": parts[0], "attempts": 0}
+        if len(parts) > 1:
+            out["attempts"] = int(parts[1][1:])
+        if len(parts) > 3:
+            out["worker"] = parts[2]
+            out["expires"] = float(parts[3])
+        return out
+
+    @staticmethod
+    def _safe(worker: str) -> str:
+        return re.sub(r"[^A-Za-z0-9.-]", "-", worker)
+
+    def _take(self, item_id: str, worker: str, pop: bool = False) -> Optional[Path]:
+        """
+        Running file of item_id as held by `worker`, or None if this worker
+        no longer holds it (lease expired and requeued / re-claimed).
+        """
+        key = (item_id, self._safe(worker))
+        src = self._held.pop(key, None) if pop else self._held.get(key)
+        if src is None or self._parse(src.name).get("worker") != key[1]:
+            return None
+        return src
+
+    @staticmethod
+    def _write(path: Path, data: Dict[str, Any]) -> None:
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        tmp.write_text(json.dumps(data, default=str))
+        os.replace(tmp, path)
+
+    def enqueue(self, sweep: str, items: Iterable[Dict[str, Any]]) -> int:
+        known = set()
+        for status in STATUSES:
+            known.update(self._parse(p.name)["base"].split("-", 1)[1]
+                         for p in self._dir(sweep, status).glob("*.json"))
+        pending = self._dir(sweep, "pending")
+        n = 0
+        for item in items:
+            key = _item_key(item)
+            if key in known:
+                continue
+            known.add(key)
+            base = f"{time.time_ns():019d}-{key}"
+            self._write(pending / f"{base}__a0.json", {"sweep": sweep, "payload": item})
+            n += 1
+        return n
+
+    def _requeue_expired(self, sweep: str, now: float) -> None:
+        for p in self._dir(sweep, "running").glob("*.json"):
+            info = self._parse(p.name)
+            if info.get("expires", now) >= now:
+                continue
+            if info["attempts"] >= self.max_attempts:
+                dst = self._dir(sweep, "failed") / f"{info['base']}.json"
+            else:
+                dst = self._dir(sweep, "pending") / f"{info['base']}__a{info['attempts']}.json"
+            try:
+                os.rename(p, dst)
+            except FileNotFoundError:  # renewed, finished or requeued by someone else
+                pass
+
+    def claim(self, worker: str, lease_sec: float, sweep: Optional[str] = None) -> Optional[QueueItem]:
+        now = time.time()
+        for name in self._sweeps(sweep):
+            self._requeue_expired(name, now)
+            running = self._dir(name, "running")
+            for p in sorted(self._dir(name, "pending").glob("*.json")):
+                info = self._parse(p.name)
+                attempts = info["attempts"] + 1
+                dst = running / f"{info['base']}__a{attempts}__{self._safe(worker)}__{now + lease_sec:.3f}.json"
+                try:
+                    os.rename(p, dst)
+                except FileNotFoundError:  # another worker was faster
+                    continue
+                self._held[(info["base"], self._safe(worker))] = dst
+                data = json.loads(dst.read_text())
+                return QueueItem(info["base"], name, data["payload"], attempts)
+        return None
+
+    def heartbeat(self, item_ids: Iterable[str], worker: str, lease_sec: float) -> None:
+        until = time.time() + lease_sec
+        for item_id in item_ids:
+            src = self._take(item_id, worker)
+            if src is None:
+                continue
+            info = self._parse(src.name)
+            dst = src.with_name(f"{info['base']}__a{info['attempts']}__{self._safe(worker)}__{until:.3f}.json")
+            try:
+                os.rename(src, dst)
+                self._held[(item_id, self._safe(worker))] = dst
+            except FileNotFoundError:  # lease lost: requeued by another worker
+                self._held.pop((item_id, self._safe(worker)), None)
+
+    def complete(self, item_id: str, worker: str, summary: Dict[str, Any]) -> None:
+        src = self._take(item_id, worker, pop=True)
+        if src is None:
+            return
+        sweep = src.parent.parent.name
+        status = "failed" if summary.get("status") == "error" else "done"
+        dst = self._dir(sweep, status) / f"{item_id}.json"
+        try:
+            os.rename(src, dst)
+        except FileNotFoundError:
+            return
+        data = json.loads(dst.read_text())
+        data.update({
+            "worker": worker,
+            "finished_at": time.time(),
+            "result_status": summary.get("status"),
+            "sam_input_path": summary.get("sam_input_path"),
+            "error": summary.get("error"),
+        })
+        self._write(dst, data)
+
+    def release(self, item_ids: Iterable[str], worker: str) -> None:
+        for item_id in item_ids:
+            src = self._take(item_id, worker, pop=True)
+            if src is None:
+                continue
+            info = self._parse(src.name)
+            dst = self._dir(src.parent.parent.name, "pending") / f"{item_id}__a{max(info['attempts'] - 1, 0)}.json"
+            try:
+                os.rename(src, dst)
+            except FileNotFoundError:
+                pass
+
+    def requeue(self, sweep: str, statuses: Iterable[str] = ("failed",)) -> int:
+        n = 0
+        pending = self._dir(sweep, "pending")
+        for status in statuses:
+            for p in self._dir(sweep, status).glob("*.json"):
+                try:
+                    os.rename(p, pending / f"{self._parse(p.name)['base']}__a0.json")
+                    n += 1
+                except FileNotFoundError:
+                    pass
+        return n
+
+    def counts(self, sweep: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {s: sum(1 for _ in self._dir(name, s).glob("*.json")) for s in STATUSES}
+            for name in self._sweeps(sweep)
+        }
+
+
+def _backend() -> str:
+    return CONFIG.get("sweep", {}).get("backend", "sqlite")
+
+
+def open_queue():
+    """The sweep queue selected by CONFIG["sweep"]["backend"] ("sqlite" or "files")."""
+    return FileQueue() if _backend() == "files" else WorkQueue()
+
+
+def queue_exists() -> bool:
+    """True if the configured sweep queue exists (without creating it)."""
+    key = "sweep_queue_dir" if _backend() == "files" else "sweep_queue"
+    return Path(CONFIG["paths"][key]).exists()
+
+
+# === WORKER ================================================================
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def run_sweep(
+    spec: Optional[Dict[str, Any]] = None,
+    sweep: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    worker_id: Optional[str] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    wait_for_others: bool = True,
+    queue: Optional[WorkQueue] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Enqueue a sweep spec (if given) and run its items until none are left.
+
+    Parameters
+    ----------
+    spec : dict, optional
+        Sweep spec (module docstring). Its items are added to the queue if
+        they are not there yet, so calling this again resumes the sweep.
+    sweep : str, optional
+        Name of a sweep already in the queue (default: spec["name"]; with
+        neither, items of any sweep are taken).
+    max_workers : int or None
+        SAM runs at once in this process (None -> CONFIG["parallel"]["max_workers"]).
+    worker_id : str, optional
+        Name recorded on claimed items (default "<host>:<pid>").
+    on_result : callable, optional
+        Called with each run summary as soon as that run finishes.
+    wait_for_others : bool
+        When nothing is pending but other workers still hold items, keep
+        polling (CONFIG["sweep"]["poll_sec"]) so items orphaned by a dead
+        worker are picked up. False -> return as soon as nothing is pending.
+    queue : WorkQueue or FileQueue, optional
+        Queue to use (default: open_queue()).
+
+    Returns
+    -------
+    list of dict
+        Summaries of the runs done by this call, in completion order.
+    """
+    cfg = CONFIG.get("sweep", {})
+    lease_sec = float(cfg.get("lease_sec", 600.0))
+    heartbeat_sec = max(1.0, lease_sec / 3.0)
+    poll_sec = float(cfg.get("poll_sec", 30.0))
+
+    queue = queue or open_queue()
+    worker_id = worker_id or _default_worker_id()
+    if spec is not None:
+        sweep = sweep or spec["name"]
+        items = expand_spec(spec)
+        n_new = queue.enqueue(sweep, items)
+        print(f"[sweep] {sweep}: {len(items)} item(s) in spec, {n_new} newly queued.")
+    counts = queue.counts(sweep)
+    for name, c in counts.items():
+        print(f"[sweep] {name}: " + ", ".join(f"{s} {c[s]}" for s in STATUSES))
+
+    n_workers = _resolve_max_workers(max_workers)
+    print(f"[sweep] Worker {worker_id} running up to {n_workers} item(s) at once.")
+
+    results: List[Dict[str, Any]] = []
+    running: Dict[Any, QueueItem] = {}
+    ex = ThreadPoolExecutor(max_workers=n_workers)
+    try:
+        while True:
+            while len(running) < n_workers:
+                item = queue.claim(worker_id, lease_sec, sweep=sweep)
+                if item is None:
+                    break
+                running[ex.submit(_run_batch_item, item.payload)] = item
+
+            if not running:
+                others = sum(c["running"] for c in queue.counts(sweep).values())
+                if others == 0 or not wait_for_others:
+                    break
+                time.sleep(poll_sec)
+                continue
+
+            done, _ = wait(list(running), timeout=heartbeat_sec, return_when=FIRST_COMPLETED)
+            for fut in done:
+                item = running.pop(fut)
+                summary = fut.result()
+                queue.complete(item.id, worker_id, summary)
+                results.append(summary)
+                if on_result is not None:
+                    on_result(summary)
+            queue.heartbeat([it.id for it in running.values()], worker_id, lease_sec)
+    except KeyboardInterrupt:
+        print(f"\n[sweep] Interrupted; returning {len(running)} running item(s) to the queue.")
+        queue.release([it.id for it in running.values()], worker_id)
+        raise
+    finally:
+        ex.shutdown(wait=not running, cancel_futures=True)
+
+    print(f"[sweep] Worker {worker_id} finished {len(results)} run(s).")
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Persistent SAM sweep queue.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_status = sub.add_parser("status", help="Item counts per sweep.")
+    p_status.add_argument("sweep", nargs="?", default=None)
+
+    p_run = sub.add_parser("run", help="Work on queued items (of one sweep, or of all).")
+    p_run.add_argument("sweep", nargs="?", default=None)
+    p_run.add_argument("--max-workers", type=int, default=None)
+    p_run.add_argument("--no-wait", action="store_true",
+                       help="Exit when nothing is pending, even if other workers hold items.")
+
+    p_enqueue = sub.add_parser("enqueue", help="Queue the SPEC of a driver module without running it.")
+    p_enqueue.add_argument("module", help="Module defining SPEC, e.g. script or sam_tuner.demos.quick_sweep.")
+
+    p_requeue = sub.add_parser("requeue", help="Put failed (or done) items back to pending.")
+    p_requeue.add_argument("sweep")
+    p_requeue.add_argument("--failed", action="store_true", help="Requeue failed items (default).")
+    p_requeue.add_argument("--done", action="store_true", help="Also requeue finished items.")
+
+    args = parser.parse_args()
+    queue = open_queue()
+    if args.cmd == "status":
+        counts = queue.counts(args.sweep)
+        if not counts:
+            print("[sweep] Queue is empty.")
+        for name, c in counts.items():
+            print(f"{name:30s} " + "  ".join(f"{s}={c[s]}" for s in STATUSES))
+    elif args.cmd == "run":
+        run_sweep(sweep=args.sweep, max_workers=args.max_workers,
+                  wait_for_others=not args.no_wait, queue=queue)
+    elif args.cmd == "enqueue":
+        spec = importlib.import_module(args.module).SPEC
+        items = expand_spec(spec)
+        n = queue.enqueue(spec["name"], items)
+        print(f"[sweep] {spec['name']}: {len(items)} item(s) in spec, {n} newly queued.")
+    elif args.cmd == "requeue":
+        statuses = ["failed"] + (["done"] if args.done else [])
+        n = queue.requeue(args.sweep, statuses)
+        print(f"[sweep] {args.sweep}: {n} item(s) back to pending.")
+
+
+if __name__ == "__main__":
+    main()
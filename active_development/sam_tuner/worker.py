@@ -0,0 +1,123 @@
+"""
+worker.py
+
+Multi-node SAM worker. Start any number of these, on any number of nodes;
+each one pulls items from the shared sweep queue (sweep.py), runs them in
+node-local scratch and writes its runs to the one shared run store, so
+sweep throughput grows with the number of nodes.
+
+  - Queue: with CONFIG["sweep"]["backend"] = "files" the queue is a
+    directory of small JSON files on the shared file system
+    (CONFIG["paths"]["sweep_queue_dir"]); items are claimed by atomic
+    rename, no broker service and no file locks needed. Items of a worker
+    that dies (node failure, wall-clock limit) go back to pending once
+    their lease expires and are run by another worker.
+  - Scratch: SAM runs in <scratch dir>/sam_tuner_<worker>/<input stem>/
+    (CONFIG["worker"]["scratch_dir"], else $TMPDIR), i.e. on the node's own
+    disk. Only the rendered input, the last row of the output CSV and the
+    per-timestep table of the SAM log are copied back to
+    CONFIG["paths"]["runs_root"] (run_launcher, CONFIG["scratch"]).
+  - Results: every worker logs to CONFIG["paths"]["run_store"], so the
+    monitor, dashboard, analysis and optimizer see all nodes' runs. The
+    store takes short locked transactions; on a network file system set
+    CONFIG["run_store"]["journal_mode"] = "DELETE" (WAL needs shared memory
+    between the processes, i.e. one node).
+
+Usage (from active_development):
+
+    python -m sam_tuner.sweep enqueue script        # queue script.py's SPEC once
+    python -m sam_tuner worker script --max-workers 32
+
+    # e.g. one worker per node in a Slurm job:
+    srun --ntasks-per-node=1 python -m sam_tuner worker script
+"""
+
+import argparse
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .config import CONFIG
+from .sweep import _default_worker_id, run_sweep
+
+
+def _scratch_base(scratch_dir: Optional[str] = None) -> Path:
+    """Node-local directory for run directories: argument, CONFIG, $TMPDIR, /tmp."""
+    base = (scratch_dir or CONFIG.get("worker", {}).get("scratch_dir")
+            or os.environ.get("TMPDIR") or tempfile.gettempdir())
+    return Path(base).resolve()
+
+
+def run_worker(
+    sweep: Optional[str] = None,
+    max_workers: Optional[int] = None,
+    scratch_dir: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    wait_for_others: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Work on the shared sweep queue until nothing is left (see module docstring).
+
+    Parameters
+    ----------
+    sweep : str, optional
+        Only take items of this sweep (default: any sweep in the queue).
+    max_workers : int or None
+        SAM runs at once on this node (None -> CONFIG["parallel"]["max_workers"]).
+    scratch_dir : str, optional
+        Node-local directory to run in (default: CONFIG["worker"]["scratch_dir"],
+        then $TMPDIR).
+    worker_id : str, optional
+        Name recorded on claimed items (default "<host>:<pid>").
+    wait_for_others : bool
+        Keep polling while other workers hold items, to pick up the ones
+        orphaned by a worker that dies.
+
+    Returns
+    -------
+    list of dict
+        Summaries of the runs done by this worker.
+    """
+    worker_id = worker_id or _default_worker_id()
+    scratch = _scratch_base(scratch_dir) / f"sam_tuner_{re.sub(r'[^A-Za-z0-9.-]', '-', worker_id)}"
+    scratch.mkdir(parents=True, exist_ok=True)
+    CONFIG.setdefault("scratch", {})["root"] = str(scratch)
+
+    print(f"[worker] {worker_id}: running in {scratch}, results to {CONFIG['paths']['runs_root']}")
+    if CONFIG.get("sweep", {}).get("backend", "sqlite") != "files":
+        print("[worker] NOTE: CONFIG['sweep']['backend'] is not 'files'; the SQLite queue "
+              "is only safe across nodes if the file system supports POSIX locks.")
+    if str(CONFIG.get("run_store", {}).get("journal_mode", "WAL")).upper() == "WAL":
+        print("[worker] NOTE: the run store is in WAL mode, which only works on one node; "
+              "set CONFIG['run_store']['journal_mode'] = 'DELETE' for several nodes.")
+
+    try:
+        return run_sweep(sweep=sweep, max_workers=max_workers, worker_id=worker_id,
+                         wait_for_others=wait_for_others)
+    finally:
+        if not CONFIG.get("scratch", {}).get("keep_run_dirs", False):
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="SAM sweep worker (one per node).")
+    parser.add_argument("sweep", nargs="?", default=None,
+                        help="Sweep to work on (default: any queued sweep).")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="SAM runs at once on this node (default: CONFIG['parallel']['max_workers']).")
+    parser.add_argument("--scratch", type=str, default=None,
+                        help="Node-local scratch directory (default: CONFIG['worker']['scratch_dir'] or $TMPDIR).")
+    parser.add_argument("--worker-id", type=str, default=None,
+                        help="Worker name recorded in the queue (default: <host>:<pid>).")
+    parser.add_argument("--no-wait", action="store_true",
+                        help="Exit when nothing is pending, even if other workers hold items.")
+    args = parser.parse_args()
+    run_worker(sweep=args.sweep, max_workers=args.max_workers, scratch_dir=args.scratch,
+               worker_id=args.worker_id, wait_for_others=not args.no_wait)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,13 +12,17 @@ This roughly replaces the old script.py that:
   - manually tracked runtimes
 
 Now:
-  - It calls sam_tuner.run_sam_case() for each configuration.
-  - All timing/status info is written to analysis/runtimes_master.csv.
+  - It is a sweep spec for sam_tuner.sweep: the spec is expanded into one
+    item per configuration, stored in a persistent queue
+    (analysis/sweep_queue.sqlite) and run on up to MAX_WORKERS SAM
+    processes at once. If the job is killed, running this script again
+    only runs what is left.
+  - More workers can join with: python -m sam_tuner.sweep run script
+  - All timing/status info is written to the run store / runtimes_master.csv.
   - You can monitor progress with: python -m sam_tuner.monitor
 """
 
-from pathlib import Path
-from sam_tuner.run_launcher import run_sam_case
+from sam_tuner.sweep import run_sweep
 from sam_tuner.config import CONFIG
 import numpy as np 
 
@@ -47,67 +51,63 @@ T0_RANGE = CONFIG["temps"]["T0_range"]
 # HTC sweep values
 HAMB_LIST = [5.0e4, 1.0e5, 2.0e5]
 
+# Number of SAM runs at once (None -> CONFIG["parallel"]["max_workers"])
+MAX_WORKERS = None
+
+# Re-run SAM even when an identical input already has a cached result
+FORCE_RERUN = False
+
 
 
 # ---------------------------------------------------------------------------
 
+def _print_result(result) -> None:
+    """Print one run summary as soon as that run finishes."""
+    print(
+        f"\n=== Finished case={result.get('case')} | "
+        f"status={result.get('status')} ==="
+    )
+    for k, v in result.items():
+        print(f"  {k}: {v}")
+
+
+def _T0_values(case_name: str) -> list:
+    """T_0 grid around the case's baseline temperature."""
+    T0_base = TEMP_BASE_BY_CASE.get(case_name, TEMP_DEFAULTS)["T_0"]
+    half_width = float(T0_RANGE["half_width"])
+    n_points = int(T0_RANGE["n_points"])
+
+    # Option A: small grid in the range
+    values = np.linspace(T0_base - half_width, T0_base + half_width, n_points)
+
+    # Option B (comment A out, uncomment B) for random sampling. New random
+    # values are new queue items, so a restarted sweep would not resume.
+    # values = np.random.uniform(T0_base - half_width, T0_base + half_width, size=n_points)
+    return list(values)
+
+
+# Sweep spec (see sam_tuner/sweep.py). Loops run templates outermost, then
+# the hyperparameters in the order listed; a changed spec only adds the new
+# combinations to the queue.
+SPEC = {
+    "name": "script",
+    "templates": TEMPLATES,
+    "hyperparams": {
+        "order": ORDERS,
+        "T_c": lambda case: TEMP_BASE_BY_CASE.get(case, TEMP_DEFAULTS)["T_c"],
+        "T_h": lambda case: TEMP_BASE_BY_CASE.get(case, TEMP_DEFAULTS)["T_h"],
+        "T_0": _T0_values,
+        "h_amb": HAMB_LIST,
+        "node_multiplier": NODE_MULT_LIST,
+    },
+    "run_kwargs": {"force_rerun": FORCE_RERUN},
+}
+
+
 def main() -> None:
-    run_count = 0
-
-    for order in ORDERS:
-        for template_name in TEMPLATES:
-            case_name = Path(template_name).stem  # e.g. "jsalt1"
-
-            temps_base = TEMP_BASE_BY_CASE.get(case_name, TEMP_DEFAULTS)
-            T_c_base = temps_base["T_c"]
-            T_h_base = temps_base["T_h"]
-            T0_base  = temps_base["T_0"]
-
-            half_width = float(T0_RANGE["half_width"])
-            n_points   = int(T0_RANGE["n_points"])
-
-            T0_min = T0_base - half_width
-            T0_max = T0_base + half_width
-
-            # Option A: small grid in the range
-            T0_values = np.linspace(T0_min, T0_max, n_points)
-
-            # Option B (comment A out, uncomment B) for random sampling:
-            # T0_values = np.random.uniform(T0_min, T0_max, size=n_points)
-
-            for T0_value in T0_values:
-                for hamb in HAMB_LIST:
-                    for nm in NODE_MULT_LIST:
-                        hyperparams = {
-                            "T_c": T_c_base,
-                            "T_h": T_h_base,
-                            "T_0": float(T0_value),
-                            "h_amb": hamb,
-                            "node_multiplier": nm,
-                            "order": order,
-                        }
-
-                        print(
-                            f"\n=== Running case={case_name} | "
-                            f"order={order} | node_multiplier={nm} | "
-                            f"h_amb={hamb} | "
-                            f"T_c={T_c_base} | T_h={T_h_base} | "
-                            f"T_0={T0_value:.2f} "
-                            f"(range [{T0_min:.2f}, {T0_max:.2f}]) ==="
-                        )
-
-                        result = run_sam_case(
-                            case_name=case_name,
-                            template_name=template_name,
-                            hyperparams=hyperparams,
-                        )
-
-                        run_count += 1
-                        print("Run summary:")
-                        for k, v in result.items():
-                            print(f"  {k}: {v}")
-
-    print(f"\nFinished sweep. Total runs: {run_count}")
+    results = run_sweep(SPEC, max_workers=MAX_WORKERS, on_result=_print_result)
+
+    print(f"\nFinished sweep. Runs done by this worker: {len(results)}")
 
 if __name__ == "__main__":
     main()